@@ -17,9 +17,11 @@
 #
 # SPDX-License-Identifier: LGPL-3.0-or-later
 
+import time
 import typing as T
-from collections import ChainMap, defaultdict
-from functools import cached_property
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import cached_property, wraps
 
 from .errors import *
 from .lsp_utils import DocumentSymbol, LocationLink, SemanticToken
@@ -29,10 +31,17 @@ TType = T.TypeVar("TType")
 
 
 class Children:
-    """Allows accessing children by type using array syntax."""
+    """Allows accessing children by type using array syntax.
+
+    The children of each type are collected the first time that type is
+    requested, so the lists returned by `children[SomeType]` are shared and
+    must not be modified."""
+
+    __slots__ = ("_children", "_by_type")
 
     def __init__(self, children):
         self._children = children
+        self._by_type: T.Optional[T.Dict[type, T.List[AstNode]]] = None
 
     def __iter__(self) -> T.Iterator["AstNode"]:
         return iter(self._children)
@@ -50,10 +59,42 @@ class Children:
             else:
                 return self._children[key]
         else:
-            return [child for child in self._children if isinstance(child, key)]
+            if self._by_type is None:
+                self._by_type = {}
+            bucket = self._by_type.get(key)
+            if bucket is None:
+                bucket = [child for child in self._children if isinstance(child, key)]
+                self._by_type[key] = bucket
+            return bucket
+
+    def first(self, key: T.Type[TType]) -> T.Optional[TType]:
+        """Returns the first child of the given type, or None if there is
+        none."""
+        if self._by_type is not None and (bucket := self._by_type.get(key)) is not None:
+            return T.cast(T.Optional[TType], bucket[0] if len(bucket) else None)
+
+        for child in self._children:
+            if isinstance(child, key):
+                return child
+        return None
+
+
+class Tokens:
+    """Allows accessing the values matched by the parser by key. Keys that
+    weren't matched are None."""
+
+    __slots__ = ("_values",)
+
+    def __init__(self, values: T.Dict[str, T.Any]):
+        self._values = values
+
+    def __getitem__(self, key: str) -> T.Any:
+        return self._values.get(key)
 
 
 class Ranges:
+    __slots__ = ("_ranges",)
+
     def __init__(self, ranges: T.Dict[str, Range]):
         self._ranges = ranges
 
@@ -72,30 +113,30 @@ TAttr = T.TypeVar("TAttr")
 class Ctx:
     """Allows accessing values from higher in the syntax tree."""
 
+    __slots__ = ("node",)
+
     def __init__(self, node: "AstNode") -> None:
         self.node = node
 
     def __getitem__(self, key: T.Type[TCtx]) -> T.Optional[TCtx]:
-        attrs = self.node._attrs_by_type(Context)
-        for name, attr in attrs:
-            if attr.type == key:
-                return getattr(self.node, name)
-        if self.node.parent is not None:
-            return self.node.parent.context[key]
-        else:
+        if (provider := self.node._context_providers.get(key)) is None:
             return None
+        node, name = provider
+        return getattr(node, name)
 
 
 class AstNode:
     """Base class for nodes in the abstract syntax tree."""
 
     completers: T.List = []
+    # Set for each subclass in __init_subclass__
+    validators: T.List[T.Callable]
     attrs_by_type: T.Dict[T.Type, T.List] = {}
 
     def __init__(self, group, children, tokens, incomplete=False):
         self.group = group
         self.children = Children(children)
-        self.tokens = ChainMap(tokens, defaultdict(lambda: None))
+        self.tokens = Tokens(tokens)
         self.incomplete = incomplete
 
         self.parent: AstNode = None
@@ -119,22 +160,90 @@ class AstNode:
 
     @cached_property
     def root(self):
-        if self.parent is None:
-            return self
-        else:
-            return self.parent.root
+        # Cache the root on every node on the way up, so finding the root of
+        # each node in the tree takes linear time overall
+        path = []
+        node = self
+        while node.parent is not None and "root" not in node.__dict__:
+            path.append(node)
+            node = node.parent
+
+        root = node.__dict__.get("root", node)
+        for node in path:
+            node.__dict__["root"] = root
+        return root
+
+    @cached_property
+    def _context_providers(self) -> T.Dict[T.Type, T.Tuple["AstNode", str]]:
+        """For each type of context, the nearest node (this one or an
+        ancestor) that provides it and the name of the attribute that
+        provides it. Nodes that don't provide any context share their
+        parent's table."""
+
+        # Resolve the tables top-down from the nearest ancestor that already
+        # has one, so each node's table is only computed once
+        path = []
+        node: T.Optional[AstNode] = self
+        while node is not None and "_context_providers" not in node.__dict__:
+            path.append(node)
+            node = node.parent
+
+        providers = node.__dict__["_context_providers"] if node is not None else {}
+        for node in reversed(path):
+            own: T.Dict[T.Type, T.Tuple[AstNode, str]] = {}
+            for name, attr in node._attrs_by_type(Context):
+                own.setdefault(attr.type, (node, name))
+            if len(own):
+                providers = {**providers, **own}
+            node.__dict__["_context_providers"] = providers
+        return providers
 
     @property
     def range(self) -> Range:
         return Range(self.group.start, self.group.end, self.group.text)
 
+    @cached_property
+    def _child_starts(self) -> T.Optional[T.List[int]]:
+        """The start offsets of the node's children, or None if the children
+        overlap or are out of order, which happens in malformed documents."""
+
+        starts: T.List[int] = []
+        # How far the children so far extend
+        reach = 0
+        for child in self.children._children:
+            start = child.group.start
+            if start < reach:
+                return None
+            starts.append(start)
+            reach = max(reach, start, child.group.end)
+        return starts
+
+    def children_at(self, idx: int) -> T.List["AstNode"]:
+        """Returns the children whose range contains `idx`, in order. The
+        children are found by bisecting their start offsets, so looking up a
+        position doesn't take longer in bigger documents. If the children
+        overlap, they are scanned instead."""
+
+        children = self.children._children
+        if (starts := self._child_starts) is not None:
+            # Siblings don't overlap, so only the last child that starts
+            # before idx and the children that start exactly at idx can
+            # contain it
+            end = bisect_right(starts, idx)
+            start = end - 1
+            while start > 0 and starts[start] == idx:
+                start -= 1
+            children = children[max(start, 0) : end]
+
+        return [child for child in children if idx in child.range]
+
     def parent_by_type(self, type: T.Type[TType]) -> TType:
-        if self.parent is None:
-            raise CompilerBugError()
-        elif isinstance(self.parent, type):
-            return self.parent
-        else:
-            return self.parent.parent_by_type(type)
+        node = self.parent
+        while node is not None:
+            if isinstance(node, type):
+                return node
+            node = node.parent
+        raise CompilerBugError()
 
     @cached_property
     def errors(self):
@@ -153,21 +262,39 @@ class AstNode:
         )
 
     def _get_errors(self):
+        profile = ValidatorProfile.active
+
+        # Walk the tree with an explicit stack rather than recursion, so that
+        # deeply nested files don't hit the recursion limit
+        stack: T.List[AstNode] = [self]
+        while len(stack):
+            node = stack.pop()
+            fatal = yield from node._run_validators(profile)
+            if not fatal:
+                stack.extend(reversed(node.children._children))
+
+    def _run_validators(
+        self, profile: T.Optional["ValidatorProfile"] = None
+    ) -> T.Generator[CompileError, None, bool]:
+        """Runs the node's own validators. Returns True if one of them raised
+        a fatal error, in which case the node's children are not validated."""
+
         for validator in self.validators:
             try:
-                validator(self)
+                if profile is None:
+                    validator(self)
+                else:
+                    profile.run(validator, self)
             except CompileError as e:
                 yield e
                 if e.fatal:
-                    return
+                    return True
             except MultipleErrors as e:
                 for error in e.errors:
                     yield error
                     if error.fatal:
-                        return
-
-        for child in self.children:
-            yield from child._get_errors()
+                        return True
+        return False
 
     def _attrs_by_type(self, attr_type: T.Type[TAttr]) -> T.List[T.Tuple[str, TAttr]]:
         if attr_type not in self.attrs_by_type:
@@ -192,10 +319,9 @@ class AstNode:
                 if token and token.start <= idx < token.end:
                     return getattr(self, name)
 
-        for child in self.children:
-            if idx in child.range:
-                if docs := child.get_docs(idx):
-                    return docs
+        for child in self.children_at(idx):
+            if docs := child.get_docs(idx):
+                return docs
 
         for name, attr in self._attrs_by_type(Docs):
             if not attr.token_name:
@@ -208,10 +334,9 @@ class AstNode:
             yield from child.get_semantic_tokens()
 
     def get_reference(self, idx: int) -> T.Optional[LocationLink]:
-        for child in self.children:
-            if idx in child.range:
-                if ref := child.get_reference(idx):
-                    return ref
+        for child in self.children_at(idx):
+            if ref := child.get_reference(idx):
+                return ref
         return None
 
     @property
@@ -257,6 +382,7 @@ def validate(
     during validation are marked with range information from the tokens."""
 
     def decorator(func):
+        @wraps(func)
         def inner(self: AstNode):
             if skip_incomplete and self.incomplete:
                 return
@@ -298,6 +424,91 @@ def validate(
     return decorator
 
 
+@dataclass
+class ValidatorStats:
+    calls: int = 0
+    time: float = 0.0
+    errors: int = 0
+
+
+class ValidatorProfile:
+    """Records how many times each validator is called, how long it takes and
+    how many errors it raises. Profiling is active inside a `with` block:
+
+        with ValidatorProfile() as profile:
+            ast.errors
+        print(profile.format_table())
+    """
+
+    # The profile that validators are currently being recorded in, if any
+    active: T.Optional["ValidatorProfile"] = None
+
+    def __init__(self) -> None:
+        self.stats: T.Dict[T.Callable, ValidatorStats] = {}
+        self._previous: T.Optional[ValidatorProfile] = None
+
+    def __enter__(self) -> "ValidatorProfile":
+        self._previous = ValidatorProfile.active
+        ValidatorProfile.active = self
+        return self
+
+    def __exit__(self, *_) -> None:
+        ValidatorProfile.active = self._previous
+
+    def run(self, validator: T.Callable[[AstNode], None], node: AstNode):
+        if (stats := self.stats.get(validator)) is None:
+            stats = self.stats[validator] = ValidatorStats()
+
+        start = time.perf_counter()
+        try:
+            validator(node)
+        except CompileError:
+            stats.errors += 1
+            raise
+        except MultipleErrors as e:
+            stats.errors += len(e.errors)
+            raise
+        finally:
+            stats.calls += 1
+            stats.time += time.perf_counter() - start
+
+    def results(self) -> T.List[T.Tuple[str, ValidatorStats]]:
+        """Returns the name and stats of each validator that was called, slowest
+        first."""
+        results = [
+            (
+                f"{validator.__module__.rpartition('.')[2]}.{validator.__qualname__}",
+                stats,
+            )
+            for validator, stats in self.stats.items()
+        ]
+        return sorted(results, key=lambda result: result[1].time, reverse=True)
+
+    def to_json(self) -> T.List[T.Dict[str, T.Any]]:
+        return [
+            {
+                "validator": name,
+                "calls": stats.calls,
+                "time": stats.time,
+                "errors": stats.errors,
+            }
+            for name, stats in self.results()
+        ]
+
+    def format_table(self) -> str:
+        results = self.results()
+        width = max([len("validator"), *(len(name) for name, _ in results)])
+
+        lines = [
+            f"{'validator':<{width}}  {'calls':>8}  {'total ms':>10}  {'errors':>6}"
+        ]
+        for name, stats in results:
+            lines.append(
+                f"{name:<{width}}  {stats.calls:>8}  {stats.time * 1000:>10.2f}  {stats.errors:>6}"
+            )
+        return "\n".join(lines)
+
+
 class Autofix:
     def __init__(self, func: T.Callable[[], T.Optional[TextEdit]]):
         self.func = func
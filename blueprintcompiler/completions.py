@@ -18,6 +18,7 @@
 # SPDX-License-Identifier: LGPL-3.0-or-later
 
 import typing as T
+from bisect import bisect_left
 
 from . import annotations, gir, language
 from .ast_utils import AstNode
@@ -25,7 +26,7 @@ from .completions_utils import *
 from .language.types import ClassName
 from .lsp_utils import Completion, CompletionItemKind, TextEdit, get_docs_section
 from .parser import SKIP_TOKENS
-from .tokenizer import Token, TokenType
+from .tokenizer import Token, TokenStream, TokenType
 
 Pattern = T.List[T.Tuple[TokenType, T.Optional[str]]]
 
@@ -33,12 +34,12 @@ Pattern = T.List[T.Tuple[TokenType, T.Optional[str]]]
 def _complete(
     lsp,
     ast_node: AstNode,
-    tokens: T.List[Token],
+    tokens: TokenStream,
     idx: int,
     token_idx: int,
     next_token: Token,
 ) -> T.Iterator[Completion]:
-    for child in ast_node.children:
+    for child in ast_node.children_at(idx):
         if child.group.start <= idx and (
             idx < child.group.end or (idx == child.group.end and child.incomplete)
         ):
@@ -49,9 +50,8 @@ def _complete(
 
     # collect the 5 previous non-skipped tokens
     while len(prev_tokens) < 5 and token_idx >= 0:
-        token = tokens[token_idx]
-        if token.type not in SKIP_TOKENS:
-            prev_tokens.insert(0, token)
+        if tokens.type_at(token_idx) not in SKIP_TOKENS:
+            prev_tokens.insert(0, tokens[token_idx])
         token_idx -= 1
 
     for completer in ast_node.completers:
@@ -59,25 +59,25 @@ def _complete(
 
 
 def complete(
-    lsp, ast_node: AstNode, tokens: T.List[Token], idx: int
+    lsp, ast_node: AstNode, tokens: TokenStream, idx: int
 ) -> T.Iterator[Completion]:
-    token_idx = 0
-    # find the current token
-    for i, token in enumerate(tokens):
-        if token.start < idx <= token.end:
-            token_idx = i
+    # find the current token: the last one that starts before idx, if idx is
+    # inside it or at its end
+    token_idx = bisect_left(tokens.starts, idx) - 1
+    if token_idx < 0 or idx > tokens.end_at(token_idx):
+        token_idx = 0
 
-    if tokens[token_idx].type == TokenType.EOF:
+    if tokens.type_at(token_idx) == TokenType.EOF:
         next_token = tokens[token_idx]
     else:
         next_token_idx = token_idx + 1
-        while tokens[next_token_idx].type == TokenType.WHITESPACE:
+        while tokens.type_at(next_token_idx) == TokenType.WHITESPACE:
             next_token_idx += 1
         next_token = tokens[next_token_idx]
 
     # if the current token is an identifier or whitespace, move to the token before it
-    while tokens[token_idx].type in [TokenType.IDENT, TokenType.WHITESPACE]:
-        idx = tokens[token_idx].start
+    while tokens.type_at(token_idx) in [TokenType.IDENT, TokenType.WHITESPACE]:
+        idx = tokens.start_at(token_idx)
         token_idx -= 1
 
     yield from _complete(lsp, ast_node, tokens, idx, token_idx, next_token)
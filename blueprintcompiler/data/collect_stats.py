@@ -30,8 +30,7 @@ import os
 from collections import defaultdict
 from dataclasses import dataclass, field
 
-from ..ast_utils import AstNode
-from ..language import Child, Object, Property, Signal, Template
+from ..language import UI, Child, Property, Signal, Template
 from ..parser import parse
 from ..tokenizer import tokenize
 
@@ -55,27 +54,26 @@ class ClassStats:
 def collect_stats(dir: str):
     class_stats: defaultdict[str, ClassStats] = defaultdict(lambda: ClassStats())
 
-    def walk_ast(ast: AstNode):
-        if isinstance(ast, Object) and not isinstance(ast, Template):
+    def collect(ast: UI):
+        for obj in ast.symbols.objects:
+            if isinstance(obj, Template):
+                continue
             if (
-                not ast.class_name.is_extern
-                and ast.class_name.gir_type is not None
-                and not ast.class_name.gir_type.deprecated
+                not obj.class_name.is_extern
+                and obj.class_name.gir_type is not None
+                and not obj.class_name.gir_type.deprecated
             ):
-                class_name = ast.class_name.gir_type.full_name
+                class_name = obj.class_name.gir_type.full_name
                 class_stat = class_stats[class_name]
-                for prop in ast.content.children[Property]:
+                for prop in obj.content.children[Property]:
                     class_stat.usages["p:" + prop.name] += 1
-                for signal in ast.content.children[Signal]:
+                for signal in obj.content.children[Signal]:
                     class_stat.usages["s:" + signal.full_name] += 1
-                for child in ast.content.children[Child]:
+                for child in obj.content.children[Child]:
                     if not child.object.class_name.is_extern:
                         child_class_name = child.object.class_name.gir_type.full_name
                         class_stat.usages["c:" + child_class_name] += 1
 
-        for child in ast.children:
-            walk_ast(child)
-
     for root, _, files in os.walk(dir):
         for fname in files:
             if not fname.endswith(".blp"):
@@ -90,7 +88,7 @@ def collect_stats(dir: str):
             if errors is not None or ast is None:
                 continue
 
-            walk_ast(ast)
+            collect(ast)
 
     results = {k: v.summarize() for k, v in class_stats.items()}
     results = {k: v for k, v in results.items() if v is not None}
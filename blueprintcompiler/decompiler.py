@@ -61,6 +61,10 @@ class DecompileCtx:
         self._last_line_type: LineType = LineType.NONE
         self._obj_type_stack: list[T.Optional[GirType]] = []
         self._node_stack: list[Element] = []
+        # C names that type_by_cname() couldn't find, and fallback namespaces
+        # that couldn't be used
+        self._unknown_cnames: T.Set[str] = set()
+        self._unavailable_namespaces: T.Set[str] = set()
 
         self.gir.add_namespace(get_namespace("Gtk", "4.0"))
 
@@ -81,18 +85,27 @@ class DecompileCtx:
         return formatter.format(imports + self._result)
 
     def type_by_cname(self, cname: str) -> T.Optional[GirType]:
+        if cname in self._unknown_cnames:
+            return None
+
         if type := self.gir.get_type_by_cname(cname):
             return type
 
         for ns, version in _NAMESPACES:
+            if ns in self._unavailable_namespaces:
+                continue
+
             try:
                 namespace = get_namespace(ns, version)
                 if type := namespace.get_type_by_cname(cname):
                     self.gir.add_namespace(namespace)
                     return type
             except:
-                pass
+                self._unavailable_namespaces.add(ns)
 
+        # Every namespace the name could come from has been searched, so it
+        # won't be found later either
+        self._unknown_cnames.add(cname)
         return None
 
     def start_block(self) -> None:
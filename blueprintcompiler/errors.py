@@ -100,14 +100,10 @@ class CompileError(PrintableError):
     def pretty_print(self, filename: str, code: str, stream=sys.stdout) -> None:
         assert self.range is not None
 
-        line_num, col_num = utils.idx_to_pos(self.range.start + 1, code)
-        end_line_num, end_col_num = utils.idx_to_pos(self.range.end + 1, code)
-        code_lines = code.splitlines(True)
-        # When the code ends in a newline (or is an empty string), splitlines() does not add a newline
-        # for the final, empty "line" (the newline is considered part of the previous line).
-        # If an error is reported at the very end of such a file, line_num may be greater than the number of lines
-        # in code_lines
-        line = code_lines[line_num] if line_num < len(code_lines) else ""
+        line_index = utils.get_line_index(code)
+        line_num, col_num = line_index.idx_to_pos(self.range.start + 1)
+        end_line_num, end_col_num = line_index.idx_to_pos(self.range.end + 1)
+        line = line_index.line_text(line_num)
 
         # Display 1-based line numbers
         line_num += 1
@@ -158,8 +154,8 @@ at {filename} line {line_num} column {col_num}:
                 )
 
         for ref in self.references:
-            line_num, col_num = utils.idx_to_pos(ref.range.start + 1, code)
-            line = code.splitlines(True)[line_num]
+            line_num, col_num = line_index.idx_to_pos(ref.range.start + 1)
+            line = line_index.line_text(line_num)
             line_num += 1
 
             stream.write(
@@ -201,13 +201,16 @@ def format(data, tab_size=2, insert_space=True):
         current_line = ""
         prev_line_type = line_type
 
-    for item in tokens:
-        str_item = str(item)
-
-        if item.type == TokenType.WHITESPACE:
-            last_whitespace_contains_newline = "\n" in str_item
+    for i in range(len(tokens)):
+        # Check the type before creating a Token, since most of the tokens in
+        # a typical file are whitespace
+        if tokens.type_at(i) == TokenType.WHITESPACE:
+            last_whitespace_contains_newline = "\n" in tokens.text_at(i)
             continue
 
+        item = tokens[i]
+        str_item = str(item)
+
         if str_item in ("bind", "expr") and str(last_not_whitespace) == ":":
             is_expression = True
         elif str_item == ";":
@@ -19,13 +19,14 @@
 
 import os
 import sys
+import time
 import typing as T
 from functools import cached_property
 
 import gi  # type: ignore
 from gi.repository import GLib, GObject  # type: ignore
 
-from . import xml_reader
+from . import gir_cache, gir_docs
 from .errors import CompileError, CompilerBugError
 from .types import *
 
@@ -112,11 +113,20 @@ except ValueError:
     value_info_get_value = GIRepository.value_info_get_value
 
 _namespace_cache: T.Dict[str, "Namespace"] = {}
-_xml_cache: T.Dict[str, xml_reader.Element] = {}
+_docs_cache: T.Dict[str, T.Optional[gir_docs.DocIndex]] = {}
 
 _user_typelib_search_paths = []
 _user_gir_search_paths = []
 
+# One GIRepository for each list of user search paths, shared by all the
+# namespaces loaded with it, so that their common dependencies are only loaded
+# once
+_gir_repos: T.Dict[T.Tuple[str, ...], GIRepository.Repository] = {}
+
+# How long loading each namespace took, in seconds, and whether it was read
+# from the "cache" or from its "typelib"
+load_times: T.Dict[str, T.Tuple[str, float]] = {}
+
 
 def add_typelib_search_path(path: str):
     _user_typelib_search_paths.append(path)
@@ -130,32 +140,95 @@ def get_namespace(namespace: str, version: str) -> "Namespace":
     filename = f"{namespace}-{version}.typelib"
 
     if filename not in _namespace_cache:
-        try:
-            gir_repo = GIRepository.Repository()
-
-            for path in reversed(_user_typelib_search_paths):
-                gir_repo.prepend_search_path(path)
-
-            gir_repo.require(namespace, version, 0)
-            repo = Repository(gir_repo, namespace)
-            _namespace_cache[filename] = repo.lookup_namespace(namespace)
-        except GLib.GError as e:
-            if e.matches(
-                GIRepository.Repository.error_quark(),
-                GIRepository.RepositoryError.TYPELIB_NOT_FOUND,
-            ):
-                raise CompileError(
-                    f"Namespace {namespace}-{version} could not be found",
-                    hints=[
-                        "search path: " + os.pathsep.join(gir_repo.get_search_path())
-                    ],
-                )
-            else:
-                raise e
+        start = time.perf_counter()
+        records = _load_records(namespace, version)
+        source = "cache" if isinstance(records, gir_cache.CachedRecords) else "typelib"
+        load_times[f"{namespace}-{version}"] = (source, time.perf_counter() - start)
+
+        repo = Repository(records)
+        _namespace_cache[filename] = repo.lookup_namespace(namespace)
 
     return _namespace_cache[filename]
 
 
+def _new_gir_repo() -> GIRepository.Repository:
+    gir_repo = GIRepository.Repository()
+    for path in reversed(_user_typelib_search_paths):
+        gir_repo.prepend_search_path(path)
+    return gir_repo
+
+
+def _shared_gir_repo() -> GIRepository.Repository:
+    key = tuple(_user_typelib_search_paths)
+    if key not in _gir_repos:
+        _gir_repos[key] = _new_gir_repo()
+    return _gir_repos[key]
+
+
+def _require(gir_repo: GIRepository.Repository, namespace: str, version: str):
+    try:
+        gir_repo.require(namespace, version, 0)
+    except GLib.GError as e:
+        if e.matches(
+            GIRepository.Repository.error_quark(),
+            GIRepository.RepositoryError.TYPELIB_NOT_FOUND,
+        ):
+            raise CompileError(
+                f"Namespace {namespace}-{version} could not be found",
+                hints=["search path: " + os.pathsep.join(gir_repo.get_search_path())],
+            )
+        else:
+            raise e
+
+
+def _find_typelib(namespace: str, version: str) -> T.Optional[str]:
+    """Finds the typelib file that GIRepository would load for a namespace."""
+
+    filename = f"{namespace}-{version}.typelib"
+    search_paths = [
+        *_user_typelib_search_paths,
+        *_shared_gir_repo().get_search_path(),
+    ]
+    for search_path in search_paths:
+        path = os.path.join(search_path, filename)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def _load_records(namespace: str, version: str) -> gir_cache.Records:
+    """Loads the metadata of a namespace from the on-disk cache, or from its
+    typelib if it isn't cached yet."""
+
+    if (typelib := _find_typelib(namespace, version)) is not None:
+        if (path := gir_cache.cache_path(namespace, version, typelib)) is not None:
+            if (cached := gir_cache.load(path)) is not None:
+                return cached
+
+    # If the namespace was a dependency of one loaded earlier, it is already
+    # loaded, and this is cheap
+    gir_repo = _shared_gir_repo()
+    try:
+        _require(gir_repo, namespace, version)
+    except GLib.GError:
+        # Most likely another version of the namespace, or of one of its
+        # dependencies, is loaded in the shared repository. Load it in a
+        # repository of its own.
+        gir_repo = _new_gir_repo()
+        _require(gir_repo, namespace, version)
+
+    records = TypelibRecords(gir_repo, namespace)
+
+    # Key the cache by the typelib that was actually loaded
+    typelib = gir_repo.get_typelib_path(namespace)
+    if typelib and (path := gir_cache.cache_path(namespace, version, typelib)):
+        # Errors writing the file are ignored, but not errors reading the
+        # typelib
+        gir_cache.write(path, records)
+
+    return records
+
+
 _available_namespaces: list[tuple[str, str]] = []
 
 
@@ -163,10 +236,9 @@ def get_available_namespaces() -> T.List[T.Tuple[str, str]]:
     if len(_available_namespaces):
         return _available_namespaces
 
-    gir_repo = GIRepository.Repository()
     search_paths: list[str] = [
         *_user_typelib_search_paths,
-        *gir_repo.get_search_path(),
+        *_shared_gir_repo().get_search_path(),
     ]
 
     for search_path in search_paths:
@@ -183,7 +255,7 @@ def get_available_namespaces() -> T.List[T.Tuple[str, str]]:
     return _available_namespaces
 
 
-def get_xml(namespace: str, version: str):
+def _gir_search_paths() -> T.List[str]:
     from .main import DATADIR
 
     search_paths = []
@@ -211,23 +283,32 @@ def get_xml(namespace: str, version: str):
     if sys.platform != "win32":
         search_paths += ["/usr/share/gir-1.0", "/usr/local/share/gir-1.0"]
 
+    return search_paths
+
+
+def _find_gir(namespace: str, version: str) -> T.Optional[str]:
     filename = f"{namespace}-{version}.gir"
 
-    if filename not in _xml_cache:
-        for search_path in search_paths:
-            path = os.path.join(search_path, filename)
+    for search_path in _gir_search_paths():
+        path = os.path.join(search_path, filename)
 
-            if os.path.exists(path) and os.path.isfile(path):
-                _xml_cache[filename] = xml_reader.parse(path)
-                break
+        if os.path.exists(path) and os.path.isfile(path):
+            return path
 
-        if filename not in _xml_cache:
-            raise CompileError(
-                f"GObject introspection file '{namespace}-{version}.gir' could not be found",
-                hints=["search path: " + os.pathsep.join(search_paths)],
-            )
+    return None
+
+
+def get_docs(namespace: str, version: str) -> T.Optional[gir_docs.DocIndex]:
+    """Returns the documentation index of a namespace's .gir file, or None if
+    the file is not installed."""
+
+    filename = f"{namespace}-{version}.gir"
+
+    if filename not in _docs_cache:
+        path = _find_gir(namespace, version)
+        _docs_cache[filename] = gir_docs.load(path) if path is not None else None
 
-    return _xml_cache[filename]
+    return _docs_cache[filename]
 
 
 ONLINE_DOCS = {
@@ -247,17 +328,217 @@ ONLINE_DOCS = {
 }
 
 
+def _entry_ref(info: GIRepository.BaseInfo) -> T.Tuple[str, str]:
+    return (info.get_namespace(), info.get_name())
+
+
+def _type_ref(typeinfo: GIRepository.BaseInfo) -> tuple:
+    """Describes a type as plain data, to be resolved to a GirType by
+    Repository._resolve_type()."""
+
+    type_tag = type_info_get_tag(typeinfo)
+    if type_tag == GIRepository.TypeTag.VOID:
+        return ("void",)
+    elif type_tag == GIRepository.TypeTag.BOOLEAN:
+        return ("bool",)
+    elif type_tag in [GIRepository.TypeTag.FLOAT, GIRepository.TypeTag.DOUBLE]:
+        return ("float",)
+    elif type_tag in [
+        GIRepository.TypeTag.INT8,
+        GIRepository.TypeTag.INT16,
+        GIRepository.TypeTag.INT32,
+        GIRepository.TypeTag.INT64,
+    ]:
+        return ("int",)
+    elif type_tag in [
+        GIRepository.TypeTag.UINT8,
+        GIRepository.TypeTag.UINT16,
+        GIRepository.TypeTag.UINT32,
+        GIRepository.TypeTag.UINT64,
+    ]:
+        return ("uint",)
+    elif type_tag == GIRepository.TypeTag.UTF8:
+        return ("string",)
+    elif type_tag == GIRepository.TypeTag.GTYPE:
+        return ("type",)
+    elif type_tag == GIRepository.TypeTag.INTERFACE:
+        return ("interface", *_entry_ref(type_info_get_interface(typeinfo)))
+    elif type_tag == GIRepository.TypeTag.ARRAY:
+        return ("array", _type_ref(type_info_get_param_type(typeinfo, 0)))
+    elif type_tag == GIRepository.TypeTag.GLIST:
+        return ("glist", _type_ref(type_info_get_param_type(typeinfo, 0)))
+    else:
+        # Only an error if the type is actually used
+        return ("unknown", str(type_tag))
+
+
+def _introspect_property(info: GIRepository.BaseInfo) -> tuple:
+    flags = property_info_get_flags(info)
+    return (
+        info.get_name(),
+        _type_ref(property_info_get_type_info(info)),
+        bool(flags & GObject.ParamFlags.WRITABLE),
+        bool(flags & GObject.ParamFlags.CONSTRUCT_ONLY),
+        info.is_deprecated(),
+    )
+
+
+def _introspect_signal(info: GIRepository.BaseInfo) -> tuple:
+    args = []
+    for i in range(callable_info_get_n_args(info)):
+        arg_info = callable_info_get_arg(info, i)
+        args.append((arg_info.get_name(), _type_ref(arg_info_get_type_info(arg_info))))
+
+    return (
+        info.get_name(),
+        info.is_deprecated(),
+        args,
+        _type_ref(callable_info_get_return_type(info)),
+    )
+
+
+def _introspect_entry(kind: str, info: GIRepository.BaseInfo) -> T.Dict[str, T.Any]:
+    record: T.Dict[str, T.Any] = {"deprecated": info.is_deprecated()}
+
+    if kind == "class":
+        parent = object_info_get_parent(info)
+        record.update(
+            type_name=object_info_get_type_name(info),
+            abstract=(
+                info.get_abstract()
+                if gir3
+                else GIRepository.object_info_get_abstract(info)
+            ),
+            parent=_entry_ref(parent) if parent else None,
+            implements=[
+                _entry_ref(object_info_get_interface(info, i))
+                for i in range(object_info_get_n_interfaces(info))
+            ],
+            properties=[
+                _introspect_property(object_info_get_property(info, i))
+                for i in range(object_info_get_n_properties(info))
+            ],
+            signals=[
+                _introspect_signal(object_info_get_signal(info, i))
+                for i in range(object_info_get_n_signals(info))
+            ],
+        )
+    elif kind == "interface":
+        record.update(
+            type_name=registered_type_info_get_type_name(info),
+            prerequisites=[
+                _entry_ref(interface_info_get_prerequisite(info, i))
+                for i in range(interface_info_get_n_prerequisites(info))
+            ],
+            properties=[
+                _introspect_property(interface_info_get_property(info, i))
+                for i in range(interface_info_get_n_properties(info))
+            ],
+            signals=[
+                _introspect_signal(interface_info_get_signal(info, i))
+                for i in range(interface_info_get_n_signals(info))
+            ],
+        )
+    elif kind in ["enum", "flags"]:
+        get_n_values, get_value = (
+            (GIRepository.EnumInfo.get_n_values, GIRepository.EnumInfo.get_value)
+            if gir3
+            else (GIRepository.enum_info_get_n_values, GIRepository.enum_info_get_value)
+        )
+        members = []
+        for i in range(get_n_values(info)):
+            value_info = get_value(info, i)
+            members.append(
+                (
+                    value_info.get_name(),
+                    value_info_get_value(value_info),
+                    value_info.get_attribute("c:identifier"),
+                    value_info.is_deprecated(),
+                )
+            )
+        record.update(
+            type_name=registered_type_info_get_type_name(info), members=members
+        )
+    else:
+        record.update(type_name=registered_type_info_get_type_name(info))
+
+    return record
+
+
+def _info_kind(info: GIRepository.BaseInfo) -> T.Optional[str]:
+    if gir3:
+        if isinstance(info, GIRepository.FlagsInfo):
+            return "flags"
+        elif isinstance(info, GIRepository.EnumInfo):
+            return "enum"
+        elif isinstance(info, GIRepository.ObjectInfo):
+            return "class"
+        elif isinstance(info, GIRepository.InterfaceInfo):
+            return "interface"
+        elif isinstance(info, GIRepository.StructInfo):
+            return "boxed"
+    else:
+        entry_type = info.get_type()
+
+        if entry_type == GIRepository.InfoType.ENUM:
+            return "enum"
+        elif entry_type == GIRepository.InfoType.FLAGS:
+            return "flags"
+        elif entry_type == GIRepository.InfoType.OBJECT:
+            return "class"
+        elif entry_type == GIRepository.InfoType.INTERFACE:
+            return "interface"
+        elif (
+            entry_type == GIRepository.InfoType.BOXED
+            or entry_type == GIRepository.InfoType.STRUCT
+        ):
+            return "boxed"
+
+    return None
+
+
+class TypelibRecords:
+    """Reads the records of a namespace (see gir_cache.Records) from its
+    typelib, through GIRepository. Each entry is read when it is first
+    requested."""
+
+    def __init__(self, gir_repo: GIRepository.Repository, name: str) -> None:
+        self.name = name
+        self.version = gir_repo.get_version(name)
+        # The repository may have other namespaces loaded too, so only list
+        # this one's dependencies
+        self.dependencies = {name: self.version}
+        for dependency in gir_repo.get_dependencies(name):
+            ns, version = dependency.rsplit("-", 1)
+            self.dependencies[ns] = version
+
+        self.kinds: T.Dict[str, T.Optional[str]] = {}
+        self._infos: T.Dict[str, GIRepository.BaseInfo] = {}
+        for i in range(gir_repo.get_n_infos(name)):
+            info = gir_repo.get_info(name, i)
+            self.kinds[info.get_name()] = _info_kind(info)
+            self._infos[info.get_name()] = info
+
+    def __getitem__(self, name: str) -> T.Dict[str, T.Any]:
+        kind = self.kinds[name]
+        assert kind is not None
+        return _introspect_entry(kind, self._infos[name])
+
+
 TNode = T.TypeVar("TNode", bound="GirNode")
 
 
 class GirNode:
-    xml_tag: str
+    # Set by nodes that can be deprecated
+    _deprecated = False
 
-    def __init__(
-        self, container: T.Optional["GirNode"], info: T.Optional[GIRepository.BaseInfo]
-    ) -> None:
+    def __init__(self, container: T.Optional["GirNode"], name: str) -> None:
         self.container = container
-        self.info = info
+        self._name = name
+
+    @property
+    def deprecated(self) -> bool:
+        return self._deprecated
 
     def get_containing(self, container_type: T.Type[TNode]) -> TNode:
         if self.container is None:
@@ -267,13 +548,6 @@ class GirNode:
         else:
             return self.container.get_containing(container_type)
 
-    @cached_property
-    def xml(self):
-        for el in self.container.xml.children:
-            if el.attrs.get("name") == self.name:
-                if el.tag == self.xml_tag:
-                    return el
-
     @cached_property
     def full_name(self) -> str:
         if self.container is None:
@@ -281,25 +555,44 @@ class GirNode:
         else:
             return f"{self.container.name}.{self.name}"
 
-    @cached_property
+    @property
     def name(self) -> str:
-        assert self.info is not None
-        return self.info.get_name()
+        return self._name
+
+    @property
+    def doc_symbol(self) -> T.Optional[str]:
+        """The name of this node in its namespace's documentation index (see
+        gir_docs.py), or None if it isn't documented."""
+        return None
+
+    def _get_doc(self, tag: str = "doc") -> T.Optional[str]:
+        """Reads this node's <doc> or <doc-deprecated> element from the .gir
+        file. Raises KeyError if the file is not installed or doesn't list
+        this node."""
+        return self._doc_index().get_doc(T.cast(str, self.doc_symbol), tag)
+
+    def _doc_index(self) -> gir_docs.DocIndex:
+        ns = self if isinstance(self, Namespace) else self.get_containing(Namespace)
+        docs = get_docs(ns.name, ns.version)
+        if docs is None or self.doc_symbol is None or self.doc_symbol not in docs:
+            raise KeyError(self.doc_symbol)
+        return docs
 
     @cached_property
-    def available_in(self) -> str:
-        return self.xml.get("version")
+    def available_in(self) -> T.Optional[str]:
+        try:
+            return self._doc_index().get_version(T.cast(str, self.doc_symbol))
+        except KeyError:
+            return None
 
     @cached_property
     def detail(self) -> T.Optional[str]:
         try:
-            el = self.xml.get_elements("doc")
-            if len(el) == 1:
-                return el[0].cdata.strip().partition("\n")[0]
-            else:
-                return None
-        except:
-            return None
+            if (doc := self._get_doc()) is not None:
+                return doc.strip().partition("\n")[0]
+        except KeyError:
+            pass
+        return None
 
     @cached_property
     def doc(self) -> T.Optional[str]:
@@ -309,10 +602,9 @@ class GirNode:
             sections.append("```\n" + self.signature + "\n```")
 
         try:
-            el = self.xml.get_elements("doc")
-            if len(el) == 1:
-                sections.append(el[0].cdata.strip())
-        except:
+            if (doc := self._get_doc()) is not None:
+                sections.append(doc.strip())
+        except KeyError:
             # Not a huge deal, but if you want docs in the language server you
             # should ensure .gir files are installed
             sections.append("Documentation is not installed")
@@ -334,48 +626,81 @@ class GirNode:
     def type(self) -> GirType:
         raise NotImplementedError()
 
-    @property
-    def deprecated(self) -> bool:
-        if self.info is None:
-            return False
-        else:
-            return self.info.is_deprecated()
-
     @property
     def deprecated_doc(self) -> T.Optional[str]:
         try:
-            return self.xml.get_elements("doc-deprecated")[0].cdata.strip()
-        except:
-            return None
+            if (doc := self._get_doc("doc-deprecated")) is not None:
+                return doc.strip()
+        except KeyError:
+            pass
+        return None
 
 
-class Property(GirNode):
-    xml_tag = "property"
+TMember = T.TypeVar("TMember", bound=GirNode)
+
+
+class MemberTable(T.Mapping[str, TMember]):
+    """The properties or signals of a class: its own, followed by those of its
+    parent and its interfaces. Rather than copying the inherited members into
+    a new dict for every class, the table keeps a list of layers, each the own
+    members of one class or interface, shared between all the tables that
+    include it. If a name is in several layers, the first one wins."""
+
+    __slots__ = ("_layers",)
 
     def __init__(
-        self, klass: T.Union["Class", "Interface"], info: GIRepository.BaseInfo
-    ):
-        super().__init__(klass, info)
+        self,
+        own: T.Mapping[str, TMember],
+        inherited: T.Iterable[T.Mapping[str, TMember]],
+    ) -> None:
+        self._layers = [own]
+        seen = {id(own)}
+        for table in inherited:
+            layers = table._layers if isinstance(table, MemberTable) else [table]
+            for layer in layers:
+                # An interface may be implemented by several ancestors
+                if id(layer) not in seen:
+                    seen.add(id(layer))
+                    self._layers.append(layer)
+
+    def __getitem__(self, name: str) -> TMember:
+        for layer in self._layers:
+            if (member := layer.get(name)) is not None:
+                return member
+        raise KeyError(name)
+
+    def __contains__(self, name: object) -> bool:
+        return any(name in layer for layer in self._layers)
+
+    def __iter__(self) -> T.Iterator[str]:
+        seen = set()
+        for layer in self._layers:
+            for name in layer:
+                if name not in seen:
+                    seen.add(name)
+                    yield name
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class Property(GirNode):
+    def __init__(self, klass: T.Union["Class", "Interface"], record: tuple):
+        name, self._type, self.writable, self.construct_only, self._deprecated = record
+        super().__init__(klass, name)
 
     @cached_property
     def type(self):
-        return self.get_containing(Repository)._resolve_type_info(
-            property_info_get_type_info(self.info)
-        )
+        return self.get_containing(Repository)._resolve_type(self._type)
 
     @cached_property
     def signature(self):
         return f"{self.type.full_name} {self.container.name}:{self.name}"
 
     @property
-    def writable(self) -> bool:
-        flags = property_info_get_flags(self.info)
-        return bool(flags & GObject.ParamFlags.WRITABLE)
-
-    @property
-    def construct_only(self) -> bool:
-        flags = property_info_get_flags(self.info)
-        return bool(flags & GObject.ParamFlags.CONSTRUCT_ONLY)
+    def doc_symbol(self) -> str:
+        assert self.container is not None
+        return f"{self.container.full_name}:{self.name}"
 
     @property
     def online_docs(self) -> T.Optional[str]:
@@ -387,45 +712,43 @@ class Property(GirNode):
 
 
 class Argument(GirNode):
-    def __init__(self, container: GirNode, info: GIRepository.BaseInfo) -> None:
-        super().__init__(container, info)
+    def __init__(self, container: GirNode, record: tuple) -> None:
+        name, self._type = record
+        super().__init__(container, name)
 
     @cached_property
     def type(self) -> GirType:
-        typeinfo = arg_info_get_type_info(self.info)
-        return self.get_containing(Repository)._resolve_type_info(typeinfo)
+        return self.get_containing(Repository)._resolve_type(self._type)
 
 
 class Signature(GirNode):
-    def __init__(self, container: GirNode, info: GIRepository.BaseInfo) -> None:
-        super().__init__(container, info)
+    def __init__(self, container: GirNode, args: list, return_type: tuple) -> None:
+        super().__init__(container, container.name)
+        self._args = args
+        self._return_type = return_type
 
     @cached_property
     def args(self) -> T.List[Argument]:
-        result = []
-        for i in range(callable_info_get_n_args(self.info)):
-            arg_info = callable_info_get_arg(self.info, i)
-            result.append(Argument(self, arg_info))
-        return result
+        return [Argument(self, arg) for arg in self._args]
 
     @cached_property
     def return_type(self) -> GirType:
-        return self.get_containing(Repository)._resolve_type_info(
-            callable_info_get_return_type(self.info)
-        )
+        return self.get_containing(Repository)._resolve_type(self._return_type)
 
 
 class Signal(GirNode):
-    xml_tag = "glib:signal"
-
-    def __init__(
-        self, klass: T.Union["Class", "Interface"], info: GIRepository.BaseInfo
-    ) -> None:
-        super().__init__(klass, info)
+    def __init__(self, klass: T.Union["Class", "Interface"], record: tuple) -> None:
+        name, self._deprecated, self._args, self._return_type = record
+        super().__init__(klass, name)
 
     @cached_property
     def gir_signature(self) -> Signature:
-        return Signature(self, self.info)
+        return Signature(self, self._args, self._return_type)
+
+    @property
+    def doc_symbol(self) -> str:
+        assert self.container is not None
+        return f"{self.container.full_name}::{self.name}"
 
     @property
     def signature(self):
@@ -446,61 +769,70 @@ class Signal(GirNode):
             return None
 
 
-class Interface(GirNode, ObjectType):
-    xml_tag = "interface"
+class NamespaceEntry(GirNode):
+    """A type defined in a namespace. Its record is read from the typelib or
+    the cache the first time it is needed."""
 
-    def __init__(self, ns: "Namespace", info: GIRepository.BaseInfo):
-        super().__init__(ns, info)
+    def __init__(self, ns: "Namespace", name: str) -> None:
+        super().__init__(ns, name)
 
+    @cached_property
+    def record(self) -> T.Dict[str, T.Any]:
+        return self.get_containing(Namespace).records[self.name]
+
+    @property
+    def deprecated(self) -> bool:
+        return self.record["deprecated"]
+
+    @cached_property
+    def glib_type_name(self) -> str:
+        return self.record["type_name"]
+
+    @property
+    def doc_symbol(self) -> str:
+        return self.full_name
+
+
+class Interface(NamespaceEntry, ObjectType):
     @cached_property
     def properties(self) -> T.Mapping[str, Property]:
-        n_properties = interface_info_get_n_properties(self.info)
-        result = {}
-        for i in range(n_properties):
-            property = Property(self, interface_info_get_property(self.info, i))
-            result[property.name] = property
-        return result
+        return {
+            property.name: property
+            for property in (Property(self, p) for p in self.record["properties"])
+        }
 
     @cached_property
     def signals(self) -> T.Mapping[str, Signal]:
-        n_signals = interface_info_get_n_signals(self.info)
-        result = {}
-        for i in range(n_signals):
-            signal = Signal(self, interface_info_get_signal(self.info, i))
-            result[signal.name] = signal
-        return result
+        return {
+            signal.name: signal
+            for signal in (Signal(self, s) for s in self.record["signals"])
+        }
 
     @cached_property
     def prerequisites(self) -> T.List[T.Union["Class", "Interface"]]:
-        n_prerequisites = interface_info_get_n_prerequisites(self.info)
-        if n_prerequisites == 0:
+        if len(self.record["prerequisites"]) == 0:
             gobject = self.get_containing(Repository).get_type("Object", "GObject")
             assert isinstance(gobject, Class)
             return [gobject]
 
-        result = []
-        for i in range(n_prerequisites):
-            entry = interface_info_get_prerequisite(self.info, i)
-            result.append(self.get_containing(Repository)._resolve_entry(entry))
-        return result
+        return [
+            self.get_containing(Repository)._resolve_entry(entry)
+            for entry in self.record["prerequisites"]
+        ]
+
+    @cached_property
+    def supertypes(self) -> T.FrozenSet[GirType]:
+        """Every type this interface can be assigned to, including itself."""
+        return frozenset([self]).union(*[pre.supertypes for pre in self.prerequisites])
 
     def assignable_to(self, other: GirType) -> bool:
-        if self == other:
-            return True
-        for pre in self.prerequisites:
-            if pre.assignable_to(other):
-                return True
-        return False
+        return other in self.supertypes
 
     def parent_types(self) -> T.Iterable[GirType]:
         for pre in self.prerequisites:
             yield pre
             yield from pre.parent_types()
 
-    @cached_property
-    def glib_type_name(self) -> str:
-        return registered_type_info_get_type_name(self.info)
-
     @property
     def cname(self) -> str:
         return self.glib_type_name
@@ -545,50 +877,35 @@ class ExternType(ObjectType):
         return True
 
 
-class Class(GirNode, ObjectType):
-    xml_tag = "class"
-
-    def __init__(self, ns: "Namespace", info: GIRepository.BaseInfo) -> None:
-        super().__init__(ns, info)
-
+class Class(NamespaceEntry, ObjectType):
     @property
     def abstract(self) -> bool:
-        if gir3:
-            assert self.info is not None
-            return self.info.get_abstract()
-        else:
-            return GIRepository.object_info_get_abstract(self.info)
+        return self.record["abstract"]
 
     @cached_property
     def implements(self) -> T.List[Interface]:
-        n_interfaces = object_info_get_n_interfaces(self.info)
-        result = []
-        for i in range(n_interfaces):
-            entry = object_info_get_interface(self.info, i)
-            result.append(self.get_containing(Repository)._resolve_entry(entry))
-        return result
+        return [
+            self.get_containing(Repository)._resolve_entry(entry)
+            for entry in self.record["implements"]
+        ]
 
     @cached_property
     def own_properties(self) -> T.Mapping[str, Property]:
-        n_properties = object_info_get_n_properties(self.info)
-        result = {}
-        for i in range(n_properties):
-            property = Property(self, object_info_get_property(self.info, i))
-            result[property.name] = property
-        return result
+        return {
+            property.name: property
+            for property in (Property(self, p) for p in self.record["properties"])
+        }
 
     @cached_property
     def own_signals(self) -> T.Mapping[str, Signal]:
-        n_signals = object_info_get_n_signals(self.info)
-        result = {}
-        for i in range(n_signals):
-            signal = Signal(self, object_info_get_signal(self.info, i))
-            result[signal.name] = signal
-        return result
+        return {
+            signal.name: signal
+            for signal in (Signal(self, s) for s in self.record["signals"])
+        }
 
     @cached_property
     def parent(self) -> T.Optional["Class"]:
-        if entry := object_info_get_parent(self.info):
+        if entry := self.record["parent"]:
             return self.get_containing(Repository)._resolve_entry(entry)
         else:
             return None
@@ -608,55 +925,46 @@ class Class(GirNode, ObjectType):
 
     @cached_property
     def properties(self) -> T.Mapping[str, Property]:
-        return {p.name: p for p in self._enum_properties()}
+        return MemberTable(
+            self.own_properties,
+            [
+                *([self.parent.properties] if self.parent is not None else []),
+                *[impl.properties for impl in self.implements],
+            ],
+        )
 
     @cached_property
     def signals(self) -> T.Mapping[str, Signal]:
-        return {s.name: s for s in self._enum_signals()}
-
-    @cached_property
-    def glib_type_name(self) -> str:
-        return object_info_get_type_name(self.info)
+        return MemberTable(
+            self.own_signals,
+            [
+                *([self.parent.signals] if self.parent is not None else []),
+                *[impl.signals for impl in self.implements],
+            ],
+        )
 
     @cached_property
     def cname(self) -> str:
         return self.glib_type_name
 
-    def assignable_to(self, other: GirType) -> bool:
-        if self == other:
-            return True
-        elif self.parent and self.parent.assignable_to(other):
-            return True
-        else:
-            for iface in self.implements:
-                if iface.assignable_to(other):
-                    return True
+    @cached_property
+    def supertypes(self) -> T.FrozenSet[GirType]:
+        """Every type this class can be assigned to, including itself: its
+        ancestors, and the interfaces they implement and their
+        prerequisites."""
+        bases: T.List[T.Union[Class, Interface]] = [*self.implements]
+        if self.parent is not None:
+            bases.insert(0, self.parent)
+        return frozenset([self]).union(*[base.supertypes for base in bases])
 
-            return False
+    def assignable_to(self, other: GirType) -> bool:
+        return other in self.supertypes
 
     def parent_types(self) -> T.Iterable["Class"]:
         if self.parent:
             yield self.parent
             yield from self.parent.parent_types()
 
-    def _enum_properties(self) -> T.Iterable[Property]:
-        yield from self.own_properties.values()
-
-        if self.parent is not None:
-            yield from self.parent.properties.values()
-
-        for impl in self.implements:
-            yield from impl.properties.values()
-
-    def _enum_signals(self) -> T.Iterable[Signal]:
-        yield from self.own_signals.values()
-
-        if self.parent is not None:
-            yield from self.parent.signals.values()
-
-        for impl in self.implements:
-            yield from impl.signals.values()
-
     @property
     def online_docs(self) -> T.Optional[str]:
         if ns := self.get_containing(Namespace).online_docs:
@@ -720,58 +1028,35 @@ class TemplateType(ObjectType):
 
 
 class EnumMember(GirNode):
-    xml_tag = "member"
-
-    def __init__(self, enum: "Enumeration", info: GIRepository.BaseInfo) -> None:
-        super().__init__(enum, info)
-
-    @property
-    def value(self) -> int:
-        return value_info_get_value(self.info)
+    def __init__(self, enum: "Enumeration", record: tuple) -> None:
+        name, self.value, self.c_ident, self._deprecated = record
+        super().__init__(enum, name)
 
     @cached_property
     def nick(self) -> str:
         return self.name.replace("_", "-")
 
     @property
-    def c_ident(self) -> T.Optional[str]:
-        if self.info is None:
-            return None
-        else:
-            return self.info.get_attribute("c:identifier")
+    def doc_symbol(self) -> str:
+        assert self.container is not None
+        return f"{self.container.full_name}.{self.name}"
 
     @property
     def signature(self) -> str:
         return f"enum member {self.full_name} = {self.value}"
 
 
-class Enumeration(GirNode, GirType):
-    xml_tag = "enumeration"
-
-    def __init__(self, ns: "Namespace", info: GIRepository.BaseInfo) -> None:
-        super().__init__(ns, info)
-
-    @cached_property
-    def glib_type_name(self) -> str:
-        return registered_type_info_get_type_name(self.info)
-
+class Enumeration(NamespaceEntry, GirType):
     @cached_property
     def cname(self) -> str:
-        return registered_type_info_get_type_name(self.info)
+        return self.glib_type_name
 
     @cached_property
     def members(self) -> T.Dict[str, EnumMember]:
-        members = {}
-        get_n_values, get_value = (
-            (GIRepository.EnumInfo.get_n_values, GIRepository.EnumInfo.get_value)
-            if gir3
-            else (GIRepository.enum_info_get_n_values, GIRepository.enum_info_get_value)
-        )
-        n_values = get_n_values(self.info)
-        for i in range(n_values):
-            member = EnumMember(self, get_value(self.info, i))
-            members[member.name] = member
-        return members
+        return {
+            member.name: member
+            for member in (EnumMember(self, m) for m in self.record["members"])
+        }
 
     @property
     def signature(self) -> str:
@@ -788,16 +1073,7 @@ class Enumeration(GirNode, GirType):
             return None
 
 
-class Boxed(GirNode, GirType):
-    xml_tag = "glib:boxed"
-
-    def __init__(self, ns: "Namespace", info: GIRepository.BaseInfo) -> None:
-        super().__init__(ns, info)
-
-    @cached_property
-    def glib_type_name(self) -> str:
-        return registered_type_info_get_type_name(self.info)
-
+class Boxed(NamespaceEntry, GirType):
     @property
     def signature(self) -> str:
         return f"boxed {self.full_name}"
@@ -814,77 +1090,39 @@ class Boxed(GirNode, GirType):
 
 
 class Bitfield(Enumeration):
-    xml_tag = "bitfield"
+    pass
 
-    def __init__(self, ns: "Namespace", info: GIRepository.BaseInfo) -> None:
-        super().__init__(ns, info)
-
-
-class Namespace(GirNode):
-    def __init__(
-        self, repo: "Repository", gir_repo: GIRepository.Repository, name: str
-    ) -> None:
-        super().__init__(repo, None)
-        self.gir_repo = gir_repo
-        self.name = name
 
-    def _create_entry(self, entry: GIRepository.BaseInfo):
-        if gir3:
-            if isinstance(entry, GIRepository.FlagsInfo):
-                return Bitfield(self, entry)
-            elif isinstance(entry, GIRepository.EnumInfo):
-                return Enumeration(self, entry)
-            elif isinstance(entry, GIRepository.ObjectInfo):
-                return Class(self, entry)
-            elif isinstance(entry, GIRepository.InterfaceInfo):
-                return Interface(self, entry)
-            elif isinstance(entry, GIRepository.StructInfo):
-                return Boxed(self, entry)
-        else:
-            entry_type = entry.get_type()
-
-            if entry_type == GIRepository.InfoType.ENUM:
-                return Enumeration(self, entry)
-            elif entry_type == GIRepository.InfoType.FLAGS:
-                return Bitfield(self, entry)
-            elif entry_type == GIRepository.InfoType.OBJECT:
-                return Class(self, entry)
-            elif entry_type == GIRepository.InfoType.INTERFACE:
-                return Interface(self, entry)
-            elif (
-                entry_type == GIRepository.InfoType.BOXED
-                or entry_type == GIRepository.InfoType.STRUCT
-            ):
-                return Boxed(self, entry)
-
-    @cached_property
-    def entries(self) -> T.Mapping[str, GirType]:
-        entries: dict[str, GirType] = {}
-
-        n_entries = self.gir_repo.get_n_infos(self.name)
-        for i in range(n_entries):
-            entry = self.gir_repo.get_info(self.name, i)
-            entry_name = entry.get_name()
-            entries[entry_name] = self._create_entry(entry)
-
-        return entries
+_ENTRY_TYPES: T.Dict[str, T.Callable[["Namespace", str], GirType]] = {
+    "class": Class,
+    "interface": Interface,
+    "enum": Enumeration,
+    "flags": Bitfield,
+    "boxed": Boxed,
+}
 
-    @cached_property
-    def xml(self):
-        return get_xml(self.name, self.version).get_elements("namespace")[0]
 
-    @cached_property
-    def name(self) -> str:
-        return self.name
+class Namespace(GirNode):
+    def __init__(self, repo: "Repository", records: gir_cache.Records) -> None:
+        super().__init__(repo, records.name)
+        self.records = records
+        self.version = records.version
 
     @cached_property
-    def version(self) -> str:
-        return self.gir_repo.get_version(self.name)
+    def entries(self) -> T.Mapping[str, T.Optional[GirType]]:
+        return {
+            name: _ENTRY_TYPES[kind](self, name) if kind is not None else None
+            for name, kind in self.records.kinds.items()
+        }
 
     @property
     def signature(self) -> str:
         return f"namespace {self.name} {self.version}"
 
+    @property
+    def doc_symbol(self) -> str:
+        return self.name
+
     @cached_property
     def classes(self) -> T.Mapping[str, Class]:
         return {
@@ -897,20 +1135,21 @@ class Namespace(GirNode):
         """Gets a type (class, interface, enum, etc.) from this namespace."""
         return self.entries.get(name)
 
+    @cached_property
+    def _types_by_cname(self) -> T.Dict[str, GirType]:
+        types: T.Dict[str, GirType] = {}
+        for item in self.entries.values():
+            if item is not None and (cname := getattr(item, "cname", None)):
+                # If two entries have the same C name, the first one wins
+                types.setdefault(cname, item)
+        return types
+
     def get_type_by_cname(self, cname: str) -> T.Optional[GirType]:
         """Gets a type from this namespace by its C name."""
-        for basic in BASIC_TYPES.values():
-            if basic.glib_type_name == cname:
-                return basic()
+        if basic := _BASIC_TYPES_BY_CNAME.get(cname):
+            return basic
 
-        for item in self.entries.values():
-            if (
-                hasattr(item, "cname")
-                and item.cname is not None
-                and item.cname == cname
-            ):
-                return item
-        return None
+        return self._types_by_cname.get(cname)
 
     def lookup_type(self, type_name: str) -> T.Optional[GirType]:
         """Looks up a type in the scope of this namespace (including in the
@@ -924,12 +1163,30 @@ class Namespace(GirNode):
         return ONLINE_DOCS.get(f"{self.name}-{self.version}")
 
 
+# The basic types, by their C names. Reversed, so that if several have the
+# same C name, the first one wins.
+_BASIC_TYPES_BY_CNAME: T.Dict[str, GirType] = {
+    basic().glib_type_name: basic() for basic in reversed(BASIC_TYPES.values())
+}
+
+# The basic types that type references (see _type_ref()) can name
+_BASIC_TYPE_REFS: T.Dict[str, T.Type[GirType]] = {
+    "void": VoidType,
+    "bool": BoolType,
+    "float": FloatType,
+    "int": IntType,
+    "uint": UIntType,
+    "string": StringType,
+    "type": TypeType,
+}
+
+
 class Repository(GirNode):
-    def __init__(self, gir_repo: GIRepository.Repository, ns: str) -> None:
-        super().__init__(None, None)
-        self.gir_repo = gir_repo
+    def __init__(self, records: gir_cache.Records) -> None:
+        super().__init__(None, records.name)
+        self.dependencies = records.dependencies
 
-        self._namespace = Namespace(self, gir_repo, ns)
+        self._namespace = Namespace(self, records)
 
     def get_type(self, name: str, ns: str) -> T.Optional[GirType]:
         return self.lookup_namespace(ns).get_type(name)
@@ -939,48 +1196,26 @@ class Repository(GirNode):
         if ns == self._namespace.name:
             return self._namespace
 
-        version = self.gir_repo.get_version(ns)
+        if (version := self.dependencies.get(ns)) is None:
+            raise CompileError(f"Namespace {ns} is not a dependency of {self.name}")
         return get_namespace(ns, version)
 
-    def _resolve_entry(self, baseinfo: GIRepository.BaseInfo):
-        return self.get_type(baseinfo.get_name(), baseinfo.get_namespace())
-
-    def _resolve_type_info(self, typeinfo: GIRepository.BaseInfo) -> GirType:
-        type_tag = type_info_get_tag(typeinfo)
-        if type_tag == GIRepository.TypeTag.VOID:
-            return VoidType()
-        elif type_tag == GIRepository.TypeTag.BOOLEAN:
-            return BoolType()
-        elif type_tag in [GIRepository.TypeTag.FLOAT, GIRepository.TypeTag.DOUBLE]:
-            return FloatType()
-        elif type_tag in [
-            GIRepository.TypeTag.INT8,
-            GIRepository.TypeTag.INT16,
-            GIRepository.TypeTag.INT32,
-            GIRepository.TypeTag.INT64,
-        ]:
-            return IntType()
-        elif type_tag in [
-            GIRepository.TypeTag.UINT8,
-            GIRepository.TypeTag.UINT16,
-            GIRepository.TypeTag.UINT32,
-            GIRepository.TypeTag.UINT64,
-        ]:
-            return UIntType()
-        elif type_tag == GIRepository.TypeTag.UTF8:
-            return StringType()
-        elif type_tag == GIRepository.TypeTag.GTYPE:
-            return TypeType()
-        elif type_tag == GIRepository.TypeTag.INTERFACE:
-            return self._resolve_entry(type_info_get_interface(typeinfo))
-        elif type_tag == GIRepository.TypeTag.ARRAY:
-            item_type = type_info_get_param_type(typeinfo, 0)
-            return ArrayType(self._resolve_type_info(item_type))
-        elif type_tag == GIRepository.TypeTag.GLIST:
-            item_type = type_info_get_param_type(typeinfo, 0)
-            return GListType(self._resolve_type_info(item_type))
+    def _resolve_entry(self, entry: T.Tuple[str, str]):
+        ns, name = entry
+        return self.get_type(name, ns)
+
+    def _resolve_type(self, type_ref: tuple) -> GirType:
+        kind = type_ref[0]
+        if kind in _BASIC_TYPE_REFS:
+            return _BASIC_TYPE_REFS[kind]()
+        elif kind == "interface":
+            return self._resolve_entry(type_ref[1:])
+        elif kind == "array":
+            return ArrayType(self._resolve_type(type_ref[1]))
+        elif kind == "glist":
+            return GListType(self._resolve_type(type_ref[1]))
         else:
-            raise CompilerBugError("Unknown type tag", type_tag)
+            raise CompilerBugError("Unknown type tag", type_ref[1])
 
 
 class GirContext:
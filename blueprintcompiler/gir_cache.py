@@ -0,0 +1,163 @@
+# gir_cache.py
+#
+# Copyright 2026 agent <agent@local>
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This file is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+
+"""On-disk cache of the metadata that gir.py reads from typelibs.
+
+Reading a namespace through GIRepository means calling into it for every
+class, property, signal and enum member that is used, on every run of the
+compiler. Instead, the first run writes the metadata of the whole namespace
+to a cache file, as plain records (see `Records`), and later runs read it
+from there without loading the typelib at all.
+
+A cache file starts with a header that lists the entries in the namespace
+and where their records are, followed by the marshalled record of each
+entry. The file is memory-mapped, and an entry's record is only unmarshalled
+when it is first used, so loading a namespace is cheap no matter how many
+entries it has."""
+
+import marshal
+import mmap
+import os
+import struct
+import typing as T
+from pathlib import Path
+
+from .utils import cache_dir, cache_owner, file_cache_key, write_cache_file
+
+# Change this whenever the format of the records changes
+FORMAT_VERSION = 1
+
+_MAGIC = b"BPGIR"
+_HEADER_LENGTH = struct.Struct("<I")
+
+
+class Records(T.Protocol):
+    """The metadata of a namespace, as plain data.
+
+    `kinds` maps the name of each entry in the namespace to its kind:
+    "class", "interface", "enum", "flags" or "boxed", or None for entries
+    that the compiler doesn't use. Indexing returns the record of an entry,
+    a dict whose contents depend on its kind."""
+
+    name: str
+    version: str
+    # The version of each namespace that this one depends on
+    dependencies: T.Dict[str, str]
+    kinds: T.Dict[str, T.Optional[str]]
+
+    def __getitem__(self, name: str) -> T.Dict[str, T.Any]: ...
+
+
+class CachedRecords:
+    """The records of a namespace, read from a memory-mapped cache file."""
+
+    def __init__(
+        self,
+        name: str,
+        version: str,
+        dependencies: T.Dict[str, str],
+        kinds: T.Dict[str, T.Optional[str]],
+        index: T.Dict[str, T.Tuple[int, int]],
+        buffer: mmap.mmap,
+    ) -> None:
+        self.name = name
+        self.version = version
+        self.dependencies = dependencies
+        self.kinds = kinds
+        self._index = index
+        self._buffer = buffer
+
+    def __getitem__(self, name: str) -> T.Dict[str, T.Any]:
+        start, end = self._index[name]
+        return marshal.loads(self._buffer[start:end])
+
+
+def cache_path(namespace: str, version: str, typelib: str) -> T.Optional[Path]:
+    """Returns the path of the cache file for a typelib. The path changes
+    whenever the typelib or the compiler does. Returns None if the typelib
+    can't be read."""
+
+    if (key := file_cache_key(typelib, str(FORMAT_VERSION))) is None:
+        return None
+    owner = cache_owner(os.path.abspath(typelib))
+    return cache_dir() / "gir" / f"{namespace}-{version}-{owner}-{key}.cache"
+
+
+def load(path: Path) -> T.Optional[CachedRecords]:
+    """Loads a cache file, or returns None if it doesn't exist or is not
+    valid."""
+
+    try:
+        with open(path, "rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        if buffer[: len(_MAGIC)] != _MAGIC:
+            return None
+        start = len(_MAGIC) + _HEADER_LENGTH.size
+        (length,) = _HEADER_LENGTH.unpack(buffer[len(_MAGIC) : start])
+        name, version, dependencies, kinds, index, size = marshal.loads(
+            buffer[start : start + length]
+        )
+        # Make sure the file isn't truncated, so reading records can't fail
+        # later
+        if len(buffer) != start + length + size:
+            return None
+    except (EOFError, ValueError, TypeError, struct.error):
+        return None
+
+    base = start + length
+    index = {key: (base + offset, base + end) for key, (offset, end) in index.items()}
+    return CachedRecords(name, version, dependencies, kinds, index, buffer)
+
+
+def write(path: Path, records: Records):
+    """Writes the records of every entry in a namespace to a cache file, and
+    removes the files cached for older versions of the same typelib."""
+
+    index: T.Dict[str, T.Tuple[int, int]] = {}
+    blobs: T.List[bytes] = []
+    size = 0
+    for name, kind in records.kinds.items():
+        if kind is not None:
+            blob = marshal.dumps(records[name])
+            index[name] = (size, size + len(blob))
+            blobs.append(blob)
+            size += len(blob)
+
+    header = marshal.dumps(
+        (
+            records.name,
+            records.version,
+            records.dependencies,
+            records.kinds,
+            index,
+            size,
+        )
+    )
+    # The name of the file ends with a key that changes with the typelib
+    # (see cache_path())
+    owner = path.name.rsplit("-", 1)[0]
+    write_cache_file(
+        path,
+        b"".join([_MAGIC, _HEADER_LENGTH.pack(len(header)), header, *blobs]),
+        replaces=f"{owner}-*.cache",
+    )
@@ -0,0 +1,195 @@
+# gir_docs.py
+#
+# Copyright 2026 agent <agent@local>
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This file is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+
+"""Reads documentation from .gir files, for the language server.
+
+Rather than keeping the whole .gir file in memory as an element tree, the
+first lookup in a file scans it once and builds an index. The index maps the
+name of each documented symbol to the byte offsets of its <doc> and
+<doc-deprecated> elements, and is saved in the cache directory. A lookup then
+parses only that one element from the memory-mapped file.
+
+Symbols are named like this:
+- namespaces: "Gtk"
+- classes, interfaces, enums, bitfields and boxed types: "Gtk.Button"
+- properties: "Gtk.Button:label"
+- signals: "Gtk.Button::clicked"
+- enum members: "Gtk.Align.start"
+"""
+
+import marshal
+import mmap
+import os
+import re
+import typing as T
+from pathlib import Path
+from xml.parsers import expat
+
+from .utils import cache_dir, cache_owner, file_cache_key, write_cache_file
+
+# Change this whenever the format of the index changes
+FORMAT_VERSION = 1
+
+# The tags of namespace entries that are indexed
+ENTRY_TAGS = {"class", "interface", "enumeration", "bitfield", "glib:boxed"}
+
+# The tags of the members of entries that are indexed, and the separator that
+# joins their names to the name of the entry
+MEMBER_TAGS = {
+    "property": ":",
+    "glib:signal": "::",
+    "member": ".",
+}
+
+DOC_TAGS = ["doc", "doc-deprecated"]
+
+_END_TAG = re.compile(rb"</([^\s>]+)\s*>")
+
+# For each symbol: the (start, end) offsets of its <doc> and <doc-deprecated>
+# elements, or None if it doesn't have them, and its "version" attribute
+Index = T.Dict[
+    str,
+    T.Tuple[
+        T.Optional[T.Tuple[int, int]], T.Optional[T.Tuple[int, int]], T.Optional[str]
+    ],
+]
+
+
+def build_index(data: bytes) -> Index:
+    """Scans the contents of a .gir file and indexes its documentation."""
+
+    index: T.Dict[str, list] = {}
+    # The symbol of each open element, or None if it isn't indexed
+    stack: T.List[T.Optional[str]] = []
+    tags: T.List[str] = []
+    starts: T.List[int] = []
+
+    parser = expat.ParserCreate()
+
+    def start_element(tag: str, attrs: T.Dict[str, str]):
+        parent = stack[-1] if stack else None
+        parent_tag = tags[-1] if tags else None
+        symbol = None
+
+        if tag == "namespace":
+            symbol = attrs.get("name")
+        elif tag in ENTRY_TAGS and parent_tag == "namespace":
+            symbol = f"{parent}.{attrs.get('name')}"
+        elif tag in MEMBER_TAGS and parent_tag in ENTRY_TAGS and parent is not None:
+            symbol = f"{parent}{MEMBER_TAGS[tag]}{attrs.get('name')}"
+        elif tag in DOC_TAGS:
+            starts.append(parser.CurrentByteIndex)
+
+        if symbol is not None:
+            index[symbol] = [None, None, attrs.get("version")]
+
+        stack.append(symbol)
+        tags.append(tag)
+
+    def end_element(tag: str):
+        stack.pop()
+        tags.pop()
+
+        if tag in DOC_TAGS:
+            start = starts.pop()
+            end = parser.CurrentByteIndex
+            # The offset is at the start of the end tag, or after the element
+            # if it is self-closing
+            if (match := _END_TAG.match(data, end)) and match[1] == tag.encode():
+                end = match.end()
+
+            # Only the docs of indexed symbols are kept, not those of methods,
+            # parameters, etc.
+            if stack and (symbol := stack[-1]) is not None:
+                index[symbol][DOC_TAGS.index(tag)] = (start, end)
+
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    parser.Parse(data, True)
+
+    return {symbol: tuple(entry) for symbol, entry in index.items()}  # type: ignore
+
+
+class DocIndex:
+    """The documentation in a .gir file."""
+
+    def __init__(self, path: str, index: Index) -> None:
+        self.path = path
+        self._index = index
+        self._buffer: T.Optional[mmap.mmap] = None
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._index
+
+    def get_doc(self, symbol: str, tag: str = "doc") -> T.Optional[str]:
+        """Returns the text of a symbol's <doc> or <doc-deprecated> element, or
+        None if it doesn't have one. Raises KeyError if the symbol is not in
+        the file."""
+
+        # The first entries of each symbol are the spans of its docs
+        span = T.cast(
+            T.Optional[T.Tuple[int, int]], self._index[symbol][DOC_TAGS.index(tag)]
+        )
+        if span is None:
+            return None
+
+        if self._buffer is None:
+            with open(self.path, "rb") as file:
+                self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        start, end = span
+        chunks: T.List[str] = []
+        parser = expat.ParserCreate()
+        parser.CharacterDataHandler = chunks.append
+        try:
+            parser.Parse(self._buffer[start:end], True)
+        except expat.ExpatError:
+            # The file changed since it was indexed
+            return None
+        return "".join(chunks)
+
+    def get_version(self, symbol: str) -> T.Optional[str]:
+        """Returns the version a symbol was added in. Raises KeyError if the
+        symbol is not in the file."""
+
+        return self._index[symbol][2]
+
+
+def load(path: str) -> DocIndex:
+    """Loads the documentation index of a .gir file from the cache, or builds
+    it if it isn't cached yet."""
+
+    key = file_cache_key(path, str(FORMAT_VERSION))
+    owner = f"{Path(path).stem}-{cache_owner(os.path.abspath(path))}"
+    cache_path = (
+        cache_dir() / "gir-docs" / f"{owner}-{key}.index" if key is not None else None
+    )
+
+    if cache_path is not None:
+        try:
+            if isinstance(index := marshal.loads(cache_path.read_bytes()), dict):
+                return DocIndex(path, index)
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+    index = build_index(Path(path).read_bytes())
+    if cache_path is not None:
+        # Replace the indexes of older versions of the file
+        write_cache_file(cache_path, marshal.dumps(index), replaces=f"{owner}-*.index")
+    return DocIndex(path, index)
@@ -82,7 +82,7 @@ class AdwBreakpointSetter(AstNode):
 
     @property
     def value(self) -> T.Optional[Value]:
-        return self.children[Value][0] if len(self.children[Value]) > 0 else None
+        return self.children.first(Value)
 
     @property
     def gir_class(self) -> T.Optional[GirType]:
@@ -48,18 +48,18 @@ class ScopeCtx:
             return self.node
 
     @cached_property
+    def _scope(self):
+        return self.node.root.symbols.scopes[self.node]
+
+    @property
     def objects(self) -> T.Dict[str, Object]:
-        return {
-            obj.tokens["id"]: obj
-            for obj in self._iter_recursive(self.node)
-            if obj.tokens["id"] is not None
-        }
+        return self._scope.objects
 
     def validate_unique_ids(self) -> None:
         from .gtk_list_item_factory import ExtListItemFactory
 
         passed = {}
-        for obj in self._iter_recursive(self.node):
+        for obj in self._scope.members:
             from .gtk_menu import Menu
 
             if not (isinstance(obj, Object) or isinstance(obj, Menu)) or obj.id is None:
@@ -76,12 +76,6 @@ class ScopeCtx:
                     )
             passed[obj.id] = obj
 
-    def _iter_recursive(self, node: AstNode):
-        yield node
-        for child in node.children:
-            if child.context[ScopeCtx] is self:
-                yield from self._iter_recursive(child)
-
 
 @dataclass
 class ExprValueCtx:
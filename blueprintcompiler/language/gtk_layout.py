@@ -34,10 +34,7 @@ class LayoutProperty(AstNode):
 
     @property
     def value(self) -> T.Optional[Value]:
-        if len(self.children[Value]) > 0:
-            return self.children[Value][0]
-        else:
-            return None
+        return self.children.first(Value)
 
     @property
     def document_symbol(self) -> DocumentSymbol:
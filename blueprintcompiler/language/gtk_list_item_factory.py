@@ -44,10 +44,7 @@ class ExtListItemFactory(AstNode):
 
     @property
     def type_name(self) -> T.Optional[TypeName]:
-        if len(self.children[TypeName]) == 1:
-            return self.children[TypeName][0]
-        else:
-            return None
+        return self.children.first(TypeName)
 
     @property
     def gir_class(self):
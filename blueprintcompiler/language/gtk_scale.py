@@ -53,10 +53,7 @@ class ExtScaleMark(AstNode):
 
     @property
     def label(self) -> T.Optional[StringValue]:
-        if len(self.children[StringValue]) == 1:
-            return self.children[StringValue][0]
-        else:
-            return None
+        return self.children.first(StringValue)
 
     @property
     def document_symbol(self) -> DocumentSymbol:
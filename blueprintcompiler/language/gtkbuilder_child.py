@@ -74,8 +74,7 @@ class Child(AstNode):
 
     @property
     def annotation(self) -> T.Optional[ChildAnnotation]:
-        annotations = self.children[ChildAnnotation]
-        return annotations[0] if len(annotations) else None
+        return self.children.first(ChildAnnotation)
 
     @property
     def object(self) -> Object:
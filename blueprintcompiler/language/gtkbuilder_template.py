@@ -69,10 +69,10 @@ class Template(Object):
 
     @property
     def parent_type(self) -> T.Optional[ClassName]:
-        if len(self.children[ClassName]) == 2:
-            return self.children[ClassName][1]
-        else:
-            return None
+        # The template's own class name is a TemplateClassName, which is also
+        # a ClassName, so the parent is the second one
+        class_names = self.children[ClassName]
+        return class_names[1] if len(class_names) == 2 else None
 
     @validate()
     def parent_only_if_extern(self):
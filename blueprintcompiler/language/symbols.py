@@ -0,0 +1,106 @@
+# symbols.py
+#
+# Copyright 2026 agent <agent@local>
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This file is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+
+
+import typing as T
+from dataclasses import dataclass, field
+from functools import cached_property
+
+from .common import *
+from .contexts import ScopeCtx
+from .gobject_object import Object, ObjectContent
+from .gobject_property import Property
+from .gtkbuilder_child import Child
+from .types import TypeName
+from .values import ObjectValue
+
+
+@dataclass
+class Scope:
+    """The nodes in an object ID scope (see ScopeCtx), in document order, and
+    the nodes with an ID by that ID."""
+
+    node: AstNode
+    members: T.List[AstNode] = field(default_factory=list)
+    objects: T.Dict[str, AstNode] = field(default_factory=dict)
+
+
+class SymbolTable:
+    """Information about the whole document that would otherwise take a walk
+    over the entire AST to find. It is collected in a single pass, once per
+    parse, and queried by validators and lint rules."""
+
+    def __init__(self, root: AstNode) -> None:
+        self.scopes: T.Dict[AstNode, Scope] = {}
+        # Every object in the document, in document order
+        self.objects: T.List[Object] = []
+        self.type_names: T.List[TypeName] = []
+
+        # The objects nested in each object, as children or as property
+        # values (in that order)
+        child_objects: T.Dict[Object, T.List[Object]] = {}
+        value_objects: T.Dict[Object, T.List[Object]] = {}
+
+        stack = [root]
+        while len(stack):
+            node = stack.pop()
+            stack.extend(reversed(node.children._children))
+
+            if (scope_ctx := node.context[ScopeCtx]) is not None:
+                if (scope := self.scopes.get(scope_ctx.node)) is None:
+                    scope = self.scopes[scope_ctx.node] = Scope(scope_ctx.node)
+                scope.members.append(node)
+                if (id := node.tokens["id"]) is not None:
+                    scope.objects[id] = node
+
+            if isinstance(node, TypeName):
+                self.type_names.append(node)
+            elif isinstance(node, Object):
+                self.objects.append(node)
+
+                if isinstance(node.parent, Child):
+                    nested = child_objects
+                    content = node.parent.parent
+                elif isinstance(node.parent, ObjectValue) and isinstance(
+                    node.parent.parent, Property
+                ):
+                    nested = value_objects
+                    content = node.parent.parent.parent
+                else:
+                    continue
+
+                if isinstance(content, ObjectContent) and isinstance(
+                    content.parent, Object
+                ):
+                    nested.setdefault(content.parent, []).append(node)
+
+        self.nested_objects: T.Dict[Object, T.List[Object]] = {
+            obj: child_objects.get(obj, []) + value_objects.get(obj, [])
+            for obj in child_objects.keys() | value_objects.keys()
+        }
+
+    @cached_property
+    def used_namespaces(self) -> T.Set[str]:
+        """The namespaces of all the types named in the document."""
+
+        result = set()
+        for type_name in self.type_names:
+            if (ns := type_name.gir_ns) is not None:
+                result.add(ns.name)
+        return result
@@ -44,6 +44,7 @@ class UI(AstNode):
                 Object,
             ),
             Eof(),
+            reusable=True,
         ),
     ]
 
@@ -98,10 +99,7 @@ class UI(AstNode):
 
     @property
     def template(self) -> T.Optional[Template]:
-        if len(self.children[Template]):
-            return self.children[Template][0]
-        else:
-            return None
+        return self.children.first(Template)
 
     def is_legacy_template(self, id: str) -> bool:
         return (
@@ -129,20 +127,14 @@ class UI(AstNode):
         )
 
     @cached_property
+    def symbols(self):
+        from .symbols import SymbolTable
+
+        return SymbolTable(self)
+
+    @property
     def used_imports(self) -> T.Optional[T.Set[str]]:
-        def _iter_recursive(node: AstNode):
-            yield node
-            for child in node.children:
-                if isinstance(child, AstNode):
-                    yield from _iter_recursive(child)
-
-        result = set()
-        for node in _iter_recursive(self):
-            if isinstance(node, TypeName):
-                ns = node.gir_ns
-                if ns is not None:
-                    result.add(ns.name)
-        return result
+        return self.symbols.used_namespaces
 
     @context(ScopeCtx)
     def scope_ctx(self) -> ScopeCtx:
@@ -22,7 +22,7 @@ from typing import Callable
 
 from .ast_utils import AstNode
 from .errors import CompileError
-from .language import UI, Child, Object, Property
+from .language import UI, Object
 from .linter_rules import LINTER_RULES
 
 
@@ -41,13 +41,9 @@ def walk_ast(
             type = node.class_name.gir_type.full_name
             func(type, node, stack)
 
-        for child in node.content.children[Child]:
-            walk_ast(child.object, func, stack + [node])
-
-        # for properties that have object as value
-        for prop in node.content.children[Property]:
-            if hasattr(prop, "value") and hasattr(prop.value, "object"):
-                walk_ast(prop.value.object, func, stack + [node])
+        # child objects, then objects that are property values
+        for obj in node.root.symbols.nested_objects.get(node, []):
+            walk_ast(obj, func, stack + [node])
 
 
 def lint(
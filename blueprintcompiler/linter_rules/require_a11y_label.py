@@ -24,11 +24,9 @@ class RequireA11yLabel(LinterRule):
                 elif property.name == "tooltip-text":
                     tooltip_text = property.value
 
-            accessibility_child = child.content.children[ExtAccessibility]
-            if len(accessibility_child) > 0:
-                accessibility_properties = child.content.children[ExtAccessibility][
-                    0
-                ].properties
+            accessibility_child = child.content.children.first(ExtAccessibility)
+            if accessibility_child is not None:
+                accessibility_properties = accessibility_child.properties
                 for accessibility_property in accessibility_properties:
                     if accessibility_property.name in ("label", "labelled-by"):
                         accessibility_label = True
@@ -51,11 +49,9 @@ class RequireA11yLabel(LinterRule):
                 ):
                     return
 
-            accessibility_child = child.content.children[ExtAccessibility]
-            if len(accessibility_child) > 0:
-                accessibility_properties = child.content.children[ExtAccessibility][
-                    0
-                ].properties
+            accessibility_child = child.content.children.first(ExtAccessibility)
+            if accessibility_child is not None:
+                accessibility_properties = accessibility_child.properties
                 for accessibility_property in accessibility_properties:
                     if accessibility_property.name in ("label", "labelled-by"):
                         return
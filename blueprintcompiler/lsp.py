@@ -24,14 +24,14 @@ import traceback
 import typing as T
 from difflib import SequenceMatcher
 
-from . import decompiler, formatter, language, parser, tokenizer, utils, xml_reader
+from . import decompiler, formatter, language, parser, tokenizer, utils
 from .ast_utils import AstNode
 from .completions import complete
 from .errors import CompileError, MultipleErrors
 from .linter import lint
 from .lsp_utils import *
 from .outputs.xml import XmlOutput
-from .tokenizer import Token
+from .tokenizer import TokenStream
 
 
 def printerr(*args, **kwargs):
@@ -52,7 +52,8 @@ class OpenFile:
         self.text = text
         self.version = version
         self.ast: T.Optional[AstNode] = None
-        self.tokens: T.Optional[list[Token]] = None
+        self.tokens: T.Optional[TokenStream] = None
+        self.parser = parser.IncrementalParser()
 
         self._update()
 
@@ -60,6 +61,7 @@ class OpenFile:
         for change in changes:
             if "range" not in change:
                 self.text = change["text"]
+                self.tokens = None
                 continue
             start = utils.pos_to_idx(
                 change["range"]["start"]["line"],
@@ -72,13 +74,24 @@ class OpenFile:
                 self.text,
             )
             self.text = self.text[:start] + change["text"] + self.text[end:]
+
+            # Only re-scan the tokens around the edit. If that fails, _update()
+            # will tokenize the whole file again and report the error.
+            if self.tokens is not None:
+                try:
+                    self.tokens = tokenizer.retokenize(
+                        self.tokens, self.text, start, end, start + len(change["text"])
+                    )
+                except CompileError:
+                    self.tokens = None
         self._update()
 
     def _update(self) -> None:
         self.diagnostics: list[CompileError] = []
         try:
-            self.tokens = tokenizer.tokenize(self.text)
-            self.ast, errors, warnings = parser.parse(self.tokens)
+            if self.tokens is None:
+                self.tokens = tokenizer.tokenize(self.text)
+            self.ast, errors, warnings = self.parser.parse(self.tokens)
             self.diagnostics += warnings
             if errors is not None:
                 self.diagnostics += errors.errors
@@ -94,9 +107,10 @@ class OpenFile:
             return []
 
         tokens = list(self.ast.get_semantic_tokens())
+        line_index = utils.get_line_index(self.text)
         token_lists = [
             [
-                *utils.idx_to_pos(token.start, self.text),  # line and column
+                *line_index.idx_to_pos(token.start),  # line and column
                 token.end - token.start,  # length
                 token.type,
                 0,  # token modifiers
@@ -124,10 +138,6 @@ class LanguageServer:
         self._exited = False
 
     def run(self):
-        # Read <doc> tags from gir files. During normal compilation these are
-        # ignored.
-        xml_reader.PARSE_GIR.add("doc")
-
         try:
             while not self._exited:
                 line = ""
@@ -347,20 +357,21 @@ class LanguageServer:
         )
 
         hints = []
+        line_index = utils.get_line_index(open_file.text)
 
         def collect_hints(node: AstNode):
             if node.range.end < range_start or node.range.start > range_end:
                 return
 
-            start_line = utils.idx_to_pos(node.range.start, node.range.original_text)[0]
-            end_line = utils.idx_to_pos(node.range.end, node.range.original_text)[0]
+            start_line = line_index.idx_to_pos(node.range.start)[0]
+            end_line = line_index.idx_to_pos(node.range.end)[0]
 
             # Don't show hints for very short blocks
             if end_line - start_line < 3:
                 return
 
             if isinstance(node, (language.Object)):
-                line, col = utils.idx_to_pos(node.range.end, node.range.original_text)
+                line, col = line_index.idx_to_pos(node.range.end)
                 hints.append(
                     {
                         "position": {"line": line, "character": col},
@@ -19,13 +19,16 @@
 
 
 import argparse
+import contextlib
 import difflib
+import json
 import os
 import pathlib
 import sys
 import typing as T
 
 from . import formatter, interactive_port, linter, parser, tokenizer
+from .ast_utils import ValidatorProfile
 from .decompiler import decompile_string
 from .errors import (
     CompileError,
@@ -59,6 +62,7 @@ class BlueprintApp:
             "--minify",
             action="store_true",
         )
+        self.add_profile_arguments(compile)
         compile.add_argument(
             "input", metavar="filename", default=sys.stdin, type=argparse.FileType("r")
         )
@@ -76,6 +80,7 @@ class BlueprintApp:
             "--minify",
             action="store_true",
         )
+        self.add_profile_arguments(batch_compile)
         batch_compile.add_argument(
             "inputs",
             nargs="+",
@@ -199,6 +204,34 @@ class BlueprintApp:
         parser.set_defaults(func=func)
         return parser
 
+    def add_profile_arguments(self, parser):
+        parser.add_argument(
+            "--profile-validators",
+            help="Print how often each validator ran and how long it took",
+            action="store_true",
+        )
+        parser.add_argument(
+            "--profile-validators-json",
+            metavar="FILE",
+            help="Write the validator profile to a JSON file",
+        )
+
+    @contextlib.contextmanager
+    def profile_validators(self, opts):
+        if not opts.profile_validators and opts.profile_validators_json is None:
+            yield
+            return
+
+        with ValidatorProfile() as profile:
+            try:
+                yield
+            finally:
+                if opts.profile_validators:
+                    print(profile.format_table(), file=sys.stderr)
+                if opts.profile_validators_json is not None:
+                    with open(opts.profile_validators_json, "w") as file:
+                        json.dump(profile.to_json(), file, indent=2)
+
     def cmd_help(self, opts):
         self.parser.print_help()
 
@@ -213,7 +246,8 @@ class BlueprintApp:
 
         data = opts.input.read()
         try:
-            xml, warnings = self._compile(data, minify=opts.minify)
+            with self.profile_validators(opts):
+                xml, warnings = self._compile(data, minify=opts.minify)
 
             for warning in warnings:
                 warning.pretty_print(opts.input.name, data, stream=sys.stderr)
@@ -244,41 +278,42 @@ class BlueprintApp:
             )
             sys.exit(1)
 
-        for file in opts.inputs:
-            file_path = pathlib.Path(file.name).resolve(strict=True)
+        with self.profile_validators(opts):
+            for file in opts.inputs:
+                file_path = pathlib.Path(file.name).resolve(strict=True)
 
-            if not file_path.is_relative_to(input_dir_path):
-                print(
-                    f"{Colors.RED}{Colors.BOLD}error: input file '{file.name}' is not in input directory '{opts.input_dir}'{Colors.CLEAR}"
-                )
-                sys.exit(1)
+                if not file_path.is_relative_to(input_dir_path):
+                    print(
+                        f"{Colors.RED}{Colors.BOLD}error: input file '{file.name}' is not in input directory '{opts.input_dir}'{Colors.CLEAR}"
+                    )
+                    sys.exit(1)
 
-            path = os.path.join(
-                opts.output_dir,
-                str(file_path.relative_to(input_dir_path).with_suffix(".ui")),
-            )
+                path = os.path.join(
+                    opts.output_dir,
+                    str(file_path.relative_to(input_dir_path).with_suffix(".ui")),
+                )
 
-            if os.path.isfile(path):
-                in_time = os.path.getmtime(file.name)
-                out_time = os.path.getmtime(path)
+                if os.path.isfile(path):
+                    in_time = os.path.getmtime(file.name)
+                    out_time = os.path.getmtime(path)
 
-                if out_time >= in_time:
-                    continue
+                    if out_time >= in_time:
+                        continue
 
-            data = file.read()
+                data = file.read()
 
-            try:
-                xml, warnings = self._compile(data, minify=opts.minify)
+                try:
+                    xml, warnings = self._compile(data, minify=opts.minify)
 
-                for warning in warnings:
-                    warning.pretty_print(file.name, data, stream=sys.stderr)
+                    for warning in warnings:
+                        warning.pretty_print(file.name, data, stream=sys.stderr)
 
-                os.makedirs(os.path.dirname(path), exist_ok=True)
-                with open(path, "w") as file:
-                    file.write(xml)
-            except PrintableError as e:
-                e.pretty_print(file.name, data)
-                sys.exit(1)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, "w") as file:
+                        file.write(xml)
+                except PrintableError as e:
+                    e.pretty_print(file.name, data)
+                    sys.exit(1)
 
     def cmd_format(self, opts):
         input_files = []
@@ -19,7 +19,9 @@
 
 """Utilities for parsing an AST from a token stream."""
 
+import copy
 import typing as T
+from dataclasses import dataclass
 from enum import Enum
 
 from . import utils
@@ -31,7 +33,7 @@ from .errors import (
     UnexpectedTokenError,
     assert_true,
 )
-from .tokenizer import Range, Token, TokenType
+from .tokenizer import Range, Token, TokenStream, TokenType, unchanged_tokens
 
 SKIP_TOKENS = [TokenType.COMMENT, TokenType.WHITESPACE]
 
@@ -57,18 +59,36 @@ class ParseResult(Enum):
         return self == ParseResult.FAILURE
 
 
+# Shared by every match group that has no keys or ranges, which is most of
+# them. It must never be modified; ParseGroup replaces it with a new dict
+# before adding the first entry.
+_EMPTY: T.Dict[str, T.Any] = {}
+
+
 class ParseGroup:
     """A matching group. Match groups have an AST type, children grouped by
     type, and key=value pairs. At the end of parsing, the match groups will
     be converted to AST nodes by passing the children and key=value pairs to
     the AST node constructor."""
 
+    __slots__ = (
+        "ast_type",
+        "children",
+        "keys",
+        "tokens",
+        "ranges",
+        "start",
+        "end",
+        "incomplete",
+        "text",
+    )
+
     def __init__(self, ast_type: T.Type[AstNode], start: int, text: str):
         self.ast_type = ast_type
         self.children: T.List[ParseGroup] = []
-        self.keys: T.Dict[str, T.Any] = {}
-        self.tokens: T.Dict[str, T.Optional[Token]] = {}
-        self.ranges: T.Dict[str, Range] = {}
+        self.keys: T.Dict[str, T.Any] = _EMPTY
+        self.tokens: T.Dict[str, T.Optional[Token]] = _EMPTY
+        self.ranges: T.Dict[str, Range] = _EMPTY
         self.start = start
         self.end: T.Optional[int] = None
         self.incomplete = False
@@ -80,6 +100,9 @@ class ParseGroup:
     def set_val(self, key: str, val: T.Any, token: T.Optional[Token]):
         assert_true(key not in self.keys)
 
+        if self.keys is _EMPTY:
+            self.keys = {}
+            self.tokens = {}
         self.keys[key] = val
         self.tokens[key] = token
         if token:
@@ -87,12 +110,55 @@ class ParseGroup:
 
     def set_range(self, key: str, range: Range):
         assert_true(key not in self.ranges)
+        if self.ranges is _EMPTY:
+            self.ranges = {}
         self.ranges[key] = range
 
+    def shifted(self, delta: int, text: str) -> "ParseGroup":
+        """Returns a copy of the match group for a new version of the text,
+        with its offsets shifted by `delta` characters."""
+
+        group = ParseGroup(self.ast_type, self.start + delta, text)
+        group.children = [child.shifted(delta, text) for child in self.children]
+        if len(self.keys):
+            group.keys = dict(self.keys)
+            group.tokens = {
+                key: (
+                    Token(token.type, token.start + delta, token.end + delta, text)
+                    if token
+                    else None
+                )
+                for key, token in self.tokens.items()
+            }
+        if len(self.ranges):
+            group.ranges = {
+                key: Range(range.start + delta, range.end + delta, text)
+                for key, range in self.ranges.items()
+            }
+        group.end = self.end + delta if self.end is not None else None
+        group.incomplete = self.incomplete
+        return group
+
     def to_ast(self):
-        """Creates an AST node from the match group."""
-        children = [child.to_ast() for child in self.children]
+        """Creates an AST node from the match group. The tree is built with an
+        explicit stack rather than recursion, so deeply nested files don't
+        hit the recursion limit."""
 
+        # Each entry is a group and the AST nodes built so far for its children
+        stack: T.List[T.Tuple[ParseGroup, T.List[AstNode]]] = [(self, [])]
+        while True:
+            group, children = stack[-1]
+            if len(children) < len(group.children):
+                stack.append((group.children[len(children)], []))
+                continue
+
+            stack.pop()
+            node = group._create_ast(children)
+            if not len(stack):
+                return node
+            stack[-1][1].append(node)
+
+    def _create_ast(self, children: T.List[AstNode]):
         try:
             return self.ast_type(self, children, self.keys, incomplete=self.incomplete)
         except TypeError:  # pragma: no cover
@@ -104,9 +170,21 @@ class ParseGroup:
 class ParseContext:
     """Contains the state of the parser."""
 
-    def __init__(self, tokens: T.List[Token], text: str, index=0):
+    # Set by IncrementalContext to reuse the results of a previous parse
+    reparse: T.Optional["Reparse"] = None
+
+    def __init__(
+        self,
+        tokens: TokenStream,
+        text: str,
+        index=0,
+        memo: T.Optional[T.Dict[T.Tuple["Group", int], "GroupMemo"]] = None,
+    ):
         self.tokens = tokens
+        self.next_significant = tokens.next_significant
         self.text = text
+        # Cache of Group parse results, or None if packrat parsing is off
+        self.memo = memo
 
         self.binding_power = 0
         self.index = index
@@ -126,7 +204,7 @@ class ParseContext:
         context will be used to parse one node. If parsing is successful, the
         new context will be applied to "self". If parsing fails, the new
         context will be discarded."""
-        ctx = ParseContext(self.tokens, self.text, self.index)
+        ctx = type(self)(self.tokens, self.text, self.index, self.memo)
         ctx.errors = self.errors
         ctx.warnings = self.warnings
         ctx.binding_power = self.binding_power
@@ -144,7 +222,7 @@ class ParseContext:
                 other.group.add_child(child)
             for key, range in other.group_ranges.items():
                 other.group.set_range(key, range)
-            other.group.end = other.tokens[other.index - 1].end
+            other.group.end = other.tokens.end_at(other.index - 1)
             other.group.incomplete = other.group_incomplete
             self.group_children.append(other.group)
         else:
@@ -166,7 +244,7 @@ class ParseContext:
     def start_group(self, ast_type: T.Type[AstNode]):
         """Sets this context to have its own match group."""
         assert_true(self.group is None)
-        self.group = ParseGroup(ast_type, self.tokens[self.index].start, self.text)
+        self.group = ParseGroup(ast_type, self.tokens.start_at(self.index), self.text)
 
     def set_group_val(self, key: str, value: T.Any, token: T.Optional[Token]):
         """Sets a matched key=value pair on the current match group."""
@@ -175,9 +253,8 @@ class ParseContext:
 
     def set_mark(self, key: str):
         """Sets a zero-length range on the current match group at the current position."""
-        self.group_ranges[key] = Range(
-            self.tokens[self.index].start, self.tokens[self.index].start, self.text
-        )
+        start = self.tokens.start_at(self.index)
+        self.group_ranges[key] = Range(start, start, self.text)
 
     def set_group_incomplete(self):
         """Marks the current match group as incomplete (it could not be fully
@@ -186,11 +263,7 @@ class ParseContext:
 
     def skip(self):
         """Skips whitespace and comments."""
-        while (
-            self.index < len(self.tokens)
-            and self.tokens[self.index].type in SKIP_TOKENS
-        ):
-            self.index += 1
+        self.index = self.next_significant[self.index]
 
     def next_token(self) -> Token:
         """Advances the token iterator and returns the next token."""
@@ -199,6 +272,19 @@ class ParseContext:
         self.index += 1
         return token
 
+    def next_token_text(self) -> str:
+        """Advances the token iterator and returns the text of the next token.
+        Unlike next_token(), this doesn't need to create a Token."""
+        self.skip()
+        text = self.tokens.text_at(self.index)
+        self.index += 1
+        return text
+
+    def peek_index(self) -> int:
+        """Returns the index of the next token that isn't whitespace or a
+        comment, without advancing the iterator."""
+        return self.next_significant[self.index]
+
     def peek_token(self) -> Token:
         """Returns the next token without advancing the iterator."""
         self.skip()
@@ -209,10 +295,10 @@ class ParseContext:
         """Skips a token and logs an "unexpected token" error."""
 
         self.skip()
-        start = self.tokens[self.index].start
-        self.next_token()
+        start = self.tokens.start_at(self.index)
+        self.index += 1
         self.skip()
-        end = self.tokens[self.index - 1].end
+        end = self.tokens.end_at(self.index - 1)
 
         if (
             len(self.errors)
@@ -224,7 +310,62 @@ class ParseContext:
             self.errors.append(UnexpectedTokenError(Range(start, end, self.text)))
 
     def is_eof(self) -> bool:
-        return self.index >= len(self.tokens) or self.peek_token().type == TokenType.EOF
+        if self.index >= len(self.tokens):
+            return True
+        self.skip()
+        return self.tokens.types[self.index] == TokenType.EOF.value
+
+
+@dataclass(frozen=True)
+class FirstSet:
+    """The tokens that a ParseNode can start with: either one of `texts`, or
+    any token whose type value is in `types`. If `nullable` is true, the node
+    can also match without consuming anything, so what follows it matters
+    too."""
+
+    texts: T.FrozenSet[str] = frozenset()
+    types: T.FrozenSet[int] = frozenset()
+    nullable: bool = False
+
+    def union(self, other: "FirstSet", nullable: bool) -> "FirstSet":
+        return FirstSet(self.texts | other.texts, self.types | other.types, nullable)
+
+    def may_start_with(self, type: int, text: str) -> bool:
+        return self.nullable or text in self.texts or type in self.types
+
+
+def first_set(node: "ParseNode", seen=None) -> T.Optional[FirstSet]:
+    """Computes the FIRST set of a parse node. Returns None if the node's
+    behavior doesn't depend only on the next token, e.g. because it may log
+    an error or raise an exception before (or instead of) consuming it. Such
+    nodes must always be tried."""
+
+    if seen is None:
+        seen = set()
+
+    # The grammar is recursive, but a rule can only reach itself again
+    # without consuming a token if it is left-recursive, which the parser
+    # can't handle anyway. Bail out rather than recursing forever.
+    if node in seen:
+        return None
+
+    seen.add(node)
+    try:
+        return node._first_set(seen)
+    finally:
+        seen.remove(node)
+
+
+def _sequence_first_set(children: T.List["ParseNode"], seen) -> T.Optional[FirstSet]:
+    result = FirstSet(nullable=True)
+    for child in children:
+        first = first_set(child, seen)
+        if first is None:
+            return None
+        result = result.union(first, first.nullable)
+        if not first.nullable:
+            break
+    return result
 
 
 class ParseNode:
@@ -247,6 +388,11 @@ class ParseNode:
     def _parse(self, ctx: ParseContext) -> bool:
         raise NotImplementedError()
 
+    def _first_set(self, seen) -> T.Optional[FirstSet]:
+        """Returns the node's FIRST set; see first_set(). Subclasses that
+        don't override this are always tried."""
+        return None
+
     def err(self, message: str) -> "Err":
         """Causes this ParseNode to raise an exception if it fails to parse.
         This prevents the parser from backtracking, so you should understand
@@ -267,14 +413,10 @@ class Err(ParseNode):
 
     def _parse(self, ctx: ParseContext):
         if self.child.parse(ctx).failed():
-            start_idx = ctx.start
-            while ctx.tokens[start_idx].type in SKIP_TOKENS:
-                start_idx += 1
-            start_token = ctx.tokens[start_idx]
+            start_idx = ctx.next_significant[ctx.start]
+            start = ctx.tokens.start_at(start_idx)
 
-            raise CompileError(
-                self.message, Range(start_token.start, start_token.start, ctx.text)
-            )
+            raise CompileError(self.message, Range(start, start, ctx.text))
         return True
 
 
@@ -287,9 +429,7 @@ class Fail(ParseNode):
 
     def _parse(self, ctx: ParseContext):
         if self.child.parse(ctx).succeeded():
-            start_idx = ctx.start
-            while ctx.tokens[start_idx].type in SKIP_TOKENS:
-                start_idx += 1
+            start_idx = ctx.next_significant[ctx.start]
 
             start_token = ctx.tokens[start_idx]
             end_token = ctx.tokens[ctx.index]
@@ -298,19 +438,160 @@ class Fail(ParseNode):
             )
         return True
 
+    def _first_set(self, seen):
+        # Fail matches empty unless its child matches, in which case it
+        # raises an error
+        first = first_set(self.child, seen)
+        if first is None or first.nullable:
+            return None
+        return FirstSet(first.texts, first.types, nullable=True)
+
+
+TError = T.TypeVar("TError", bound=CompileError)
+
+
+def _copy_error(error: TError) -> TError:
+    # The parser may extend the range of the last error, so replayed errors
+    # must not share their range with the originals
+    error = copy.copy(error)
+    if error.range is not None:
+        error.range = copy.copy(error.range)
+    return error
+
+
+@dataclass
+class GroupMemo:
+    """The outcome of parsing a Group at a given token index, recorded so it
+    can be replayed instead of parsing the same tokens again."""
+
+    matched: bool
+    start: int
+    keys: T.Dict[str, T.Tuple[T.Any, T.Optional[Token]]]
+    children: T.List[ParseGroup]
+    ranges: T.Dict[str, Range]
+    incomplete: bool
+    index: int
+    errors: T.List[CompileError]
+    warnings: T.List[CompileWarning]
+    exception: T.Optional[CompileError] = None
+
 
 class Group(ParseNode):
-    """ParseNode that creates a match group."""
+    """ParseNode that creates a match group.
+
+    If the ParseContext has a memo table (packrat parsing), the outcome of
+    parsing the group at each token index is cached there. When the parser
+    backtracks and tries the same group at the same index again, the cached
+    result is replayed, including any errors that were logged along the way.
+    """
 
     def __init__(self, ast_type: T.Type[AstNode], child):
         self.ast_type = ast_type
         self.child = to_parse_node(child)
 
+    def parse(self, ctx: ParseContext) -> ParseResult:
+        if ctx.memo is not None:
+            return self._parse_memoized(ctx)
+
+        # Same as ParseNode.parse(), inlined so that groups don't add a stack
+        # frame to the recursive descent
+        start_idx = ctx.index
+        inner_ctx = ctx.create_child()
+
+        if self._parse(inner_ctx):
+            ctx.apply_child(inner_ctx)
+            if ctx.index == start_idx:
+                return ParseResult.EMPTY
+            else:
+                return ParseResult.SUCCESS
+        else:
+            return ParseResult.FAILURE
+
+    def _parse_memoized(self, ctx: ParseContext) -> ParseResult:
+        memo_table = ctx.memo
+        assert memo_table is not None
+
+        start_idx = ctx.index
+        if (memo := memo_table.get((self, start_idx))) is not None:
+            return self._replay(ctx, memo)
+
+        n_errors = len(ctx.errors)
+        n_warnings = len(ctx.warnings)
+        # If parsing extends the range of an existing error, the result
+        # can't be replayed
+        last_error = ctx.errors[-1] if n_errors else None
+        last_error_end = (
+            last_error.range.end if last_error and last_error.range else None
+        )
+
+        def record(matched: bool, inner_ctx: ParseContext, exception=None):
+            if last_error is not None and last_error.range is not None:
+                if last_error.range.end != last_error_end:
+                    return
+
+            memo_table[(self, start_idx)] = GroupMemo(
+                matched,
+                inner_ctx.group.start if inner_ctx.group else 0,
+                inner_ctx.group_keys,
+                inner_ctx.group_children,
+                inner_ctx.group_ranges,
+                inner_ctx.group_incomplete,
+                inner_ctx.index,
+                [_copy_error(e) for e in ctx.errors[n_errors:]],
+                [_copy_error(w) for w in ctx.warnings[n_warnings:]],
+                exception,
+            )
+
+        inner_ctx = ctx.create_child()
+        try:
+            matched = self._parse(inner_ctx)
+        except CompileError as e:
+            record(False, inner_ctx, _copy_error(e))
+            raise
+
+        record(matched, inner_ctx)
+
+        if matched:
+            ctx.apply_child(inner_ctx)
+            if ctx.index == start_idx:
+                return ParseResult.EMPTY
+            else:
+                return ParseResult.SUCCESS
+        else:
+            return ParseResult.FAILURE
+
+    def _replay(self, ctx: ParseContext, memo: GroupMemo) -> ParseResult:
+        ctx.errors += [_copy_error(e) for e in memo.errors]
+        ctx.warnings += [_copy_error(w) for w in memo.warnings]
+
+        if memo.exception is not None:
+            raise _copy_error(memo.exception)
+        if not memo.matched:
+            return ParseResult.FAILURE
+
+        start_idx = ctx.index
+        inner_ctx = ctx.create_child()
+        inner_ctx.group = ParseGroup(self.ast_type, memo.start, ctx.text)
+        inner_ctx.group_keys = memo.keys
+        inner_ctx.group_children = memo.children
+        inner_ctx.group_ranges = memo.ranges
+        inner_ctx.group_incomplete = memo.incomplete
+        inner_ctx.index = memo.index
+        ctx.apply_child(inner_ctx)
+
+        if ctx.index == start_idx:
+            return ParseResult.EMPTY
+        else:
+            return ParseResult.SUCCESS
+
     def _parse(self, ctx: ParseContext) -> bool:
         ctx.skip()
         ctx.start_group(self.ast_type)
         return self.child.parse(ctx).succeeded()
 
+    def _first_set(self, seen):
+        return first_set(self.child, seen)
+
 
 class Sequence(ParseNode):
     """ParseNode that attempts to match all of its children in sequence."""
@@ -324,6 +605,9 @@ class Sequence(ParseNode):
                 return False
         return True
 
+    def _first_set(self, seen):
+        return _sequence_first_set(self.children, seen)
+
 
 class Statement(ParseNode):
     """ParseNode that attempts to match all of its children in sequence. If any
@@ -349,10 +633,24 @@ class Statement(ParseNode):
             ctx.next_token()
         return True
 
+    def _first_set(self, seen):
+        first = _sequence_first_set(self.children, seen)
+        if first is None or first.nullable:
+            # If all the children match empty, the statement always matches
+            # and may log an error about the missing semicolon
+            return None
+        return first
+
 
 class AnyOf(ParseNode):
     """ParseNode that attempts to match exactly one of its children. Child
-    nodes are attempted in order."""
+    nodes are attempted in order.
+
+    Rather than trying every child, AnyOf looks at the next token and only
+    tries the children whose FIRST set allows it (see first_set()), still in
+    order. The FIRST sets are computed the first time the node is parsed,
+    since hooks like OBJECT_CONTENT_HOOKS are filled in after the grammar is
+    defined."""
 
     def __init__(self, *children):
         self.children = children
@@ -364,27 +662,77 @@ class AnyOf(ParseNode):
     @children.setter
     def children(self, children):
         self._children = [to_parse_node(child) for child in children]
+        self._first_sets: T.Optional[T.List[T.Optional[FirstSet]]] = None
+        self._texts: T.FrozenSet[str] = frozenset()
+        self._candidates: T.Dict[T.Any, T.List[ParseNode]] = {}
+
+    def _candidates_for(self, type: int, text: str) -> T.List[ParseNode]:
+        if self._first_sets is None:
+            self._first_sets = [first_set(child) for child in self._children]
+            self._texts = frozenset(
+                text
+                for first in self._first_sets
+                if first is not None
+                for text in first.texts
+            )
+
+        # Tokens are told apart by their text only if some child cares about
+        # it, so the table stays small
+        key = (type, text) if text in self._texts else type
+        if (candidates := self._candidates.get(key)) is None:
+            candidates = self._candidates[key] = [
+                child
+                for child, first in zip(self._children, self._first_sets)
+                if first is None or first.may_start_with(type, text)
+            ]
+        return candidates
 
     def _parse(self, ctx):
-        for child in self.children:
+        tokens = ctx.tokens
+        index = ctx.peek_index()
+
+        if index < len(tokens):
+            children = self._candidates_for(tokens.types[index], tokens.text_at(index))
+        else:
+            children = self._children
+
+        for child in children:
             if child.parse(ctx).succeeded():
                 return True
         return False
 
+    def _first_set(self, seen):
+        result = FirstSet()
+        for child in self.children:
+            first = first_set(child, seen)
+            if first is None:
+                return None
+            result = result.union(first, result.nullable or first.nullable)
+        return result
+
 
 class Until(ParseNode):
     """ParseNode that repeats its child until a delimiting token is found. If
     the child does not match, one token is skipped and the match is attempted
-    again."""
+    again.
+
+    If `reusable` is true, the result of each repetition may be reused when
+    the document is parsed again after an edit (see Reparse). Each
+    repetition must only add match groups, not key=value pairs."""
 
-    def __init__(self, child, delimiter, between_delimiter=None):
+    def __init__(self, child, delimiter, between_delimiter=None, reusable=False):
         self.child = to_parse_node(child)
         self.delimiter = to_parse_node(delimiter)
         self.between_delimiter = (
             to_parse_node(between_delimiter) if between_delimiter is not None else None
         )
+        assert_true(not reusable or between_delimiter is None)
+        self.reusable = reusable
 
     def _parse(self, ctx: ParseContext):
+        if self.reusable and ctx.reparse is not None:
+            return ctx.reparse.parse_until(self, ctx)
+
         while not self.delimiter.parse(ctx).succeeded():
             if ctx.is_eof():
                 return False
@@ -410,6 +758,231 @@ class Until(ParseNode):
         return True
 
 
+def _shift_error(error: TError, delta: int, text: str) -> TError:
+    error = copy.copy(error)
+    assert error.range is not None
+    error.range = Range(error.range.start + delta, error.range.end + delta, text)
+    return error
+
+
+def _mergeable_end(errors: T.List[CompileError]) -> T.Optional[int]:
+    """If the last error can be extended by skip_unexpected_token(), returns
+    where it ends."""
+    if len(errors) and isinstance((err := errors[-1]), UnexpectedTokenError):
+        assert err.range is not None
+        return err.range.end
+    return None
+
+
+@dataclass
+class UntilIteration:
+    """One repetition of a reusable Until node, recorded so it can be
+    replayed instead of parsing the same tokens again."""
+
+    start: int
+    end: int
+    # The last token that may have been looked at while parsing the
+    # repetition
+    examined: int
+    # If the first error the repetition logged was an unexpected token, where
+    # that token starts. Whether it was merged into the error before the
+    # repetition depends on where that error ends.
+    skip_start: T.Optional[int]
+    # Where the error before the repetition was extended to, if it was
+    merged_end: T.Optional[int]
+    groups: T.List[ParseGroup]
+    errors: T.List[CompileError]
+    warnings: T.List[CompileWarning]
+
+
+class Reparse:
+    """Reuses the results of parsing the previous version of a document.
+
+    Each repetition of a reusable Until node (in practice, each top-level
+    block of the file) is recorded. When the next version is parsed, a
+    repetition that starts at the same token and only looked at tokens
+    before the edit, or that starts at the corresponding token after the
+    edit, is replayed with its offsets shifted instead of being parsed
+    again. Only the blocks that the edit touched are parsed."""
+
+    def __init__(self, tokens: TokenStream, previous: T.Optional["Reparse"] = None):
+        self.tokens = tokens
+        self.iterations: T.Dict[T.Tuple[Until, int], UntilIteration] = {}
+        # The highest token index reached while parsing the current repetition
+        self.furthest = 0
+        # Number of repetitions that were replayed, for testing
+        self.reused = 0
+
+        if previous is None:
+            self.previous: T.Dict[T.Tuple[Until, int], UntilIteration] = {}
+            self.prefix = self.old_suffix = self.new_suffix = len(tokens)
+            self.char_delta = 0
+        else:
+            self.previous = previous.iterations
+            self.prefix, self.old_suffix, self.new_suffix = unchanged_tokens(
+                previous.tokens, tokens
+            )
+            self.char_delta = len(tokens.string) - len(previous.tokens.string)
+
+    def parse_until(self, until: Until, ctx: ParseContext) -> bool:
+        while not until.delimiter.parse(ctx).succeeded():
+            if ctx.is_eof():
+                return False
+
+            if not self._replay(until, ctx):
+                self._record(until, ctx)
+
+        return True
+
+    def _replay(self, until: Until, ctx: ParseContext) -> bool:
+        index = ctx.index
+        entry_end = _mergeable_end(ctx.errors)
+
+        if index < self.prefix:
+            token_delta = char_delta = 0
+            iteration = self.previous.get((until, index))
+            if iteration is None or iteration.examined >= self.prefix:
+                return False
+        elif index >= self.new_suffix:
+            token_delta = self.new_suffix - self.old_suffix
+            char_delta = self.char_delta
+            iteration = self.previous.get((until, index - token_delta))
+            if iteration is None:
+                return False
+        else:
+            return False
+
+        skip_start = None
+        if iteration.skip_start is not None:
+            skip_start = iteration.skip_start + char_delta
+            if (entry_end == skip_start) != (iteration.merged_end is not None):
+                return False
+
+        text = ctx.text
+        merged_end = None
+        if iteration.merged_end is not None:
+            merged_end = iteration.merged_end + char_delta
+            merged_range = ctx.errors[-1].range
+            assert merged_range is not None
+            merged_range.end = merged_end
+
+        groups = [group.shifted(char_delta, text) for group in iteration.groups]
+        ctx.group_children += groups
+        if len(groups):
+            ctx.last_group = groups[-1]
+        ctx.errors += [_shift_error(e, char_delta, text) for e in iteration.errors]
+        ctx.warnings += [_shift_error(w, char_delta, text) for w in iteration.warnings]
+        ctx.index = iteration.end + token_delta
+        self.furthest = max(self.furthest, iteration.examined + token_delta)
+
+        # Keep separate copies of the errors, since later repetitions may
+        # extend the range of the last one
+        self.iterations[(until, index)] = UntilIteration(
+            index,
+            ctx.index,
+            iteration.examined + token_delta,
+            skip_start,
+            merged_end,
+            groups,
+            [_shift_error(e, char_delta, text) for e in iteration.errors],
+            [_shift_error(w, char_delta, text) for w in iteration.warnings],
+        )
+        self.reused += 1
+        return True
+
+    def _record(self, until: Until, ctx: ParseContext):
+        start = ctx.index
+        errors, warnings, children = ctx.errors, ctx.warnings, ctx.group_children
+        n_errors, n_warnings, n_children = len(errors), len(warnings), len(children)
+        entry_end = _mergeable_end(errors)
+        entry_range = errors[-1].range if entry_end is not None else None
+        keys, ranges = dict(ctx.group_keys), dict(ctx.group_ranges)
+        incomplete, last_group = ctx.group_incomplete, ctx.last_group
+
+        outer_furthest = self.furthest
+        self.furthest = start
+        try:
+            try:
+                if not until.child.parse(ctx).matched():
+                    ctx.skip_unexpected_token()
+            except CompileError as e:
+                ctx.errors.append(e)
+                ctx.next_token()
+        finally:
+            furthest = self.furthest
+            self.furthest = max(outer_furthest, furthest)
+
+        # Only record repetitions whose effect on the context can be replayed
+        groups = children[n_children:]
+        new_errors = [*errors[n_errors:], *warnings[n_warnings:]]
+        if (
+            ctx.group_children is not children
+            or ctx.last_group is not (groups[-1] if len(groups) else last_group)
+            or ctx.group_keys != keys
+            or ctx.group_ranges != ranges
+            or ctx.group_incomplete != incomplete
+            or any(e.range is None or e.actions or e.references for e in new_errors)
+        ):
+            return
+
+        skip_start = merged_end = None
+        if entry_range is not None and entry_range.end != entry_end:
+            skip_start = entry_end
+            merged_end = entry_range.end
+        elif len(errors) > n_errors and isinstance(
+            (err := errors[n_errors]), UnexpectedTokenError
+        ):
+            assert err.range is not None
+            skip_start = err.range.start
+
+        next_significant = ctx.next_significant
+        self.iterations[(until, start)] = UntilIteration(
+            start,
+            ctx.index,
+            next_significant[min(furthest, len(next_significant) - 1)],
+            skip_start,
+            merged_end,
+            groups,
+            [_copy_error(e) for e in errors[n_errors:]],
+            [_copy_error(w) for w in warnings[n_warnings:]],
+        )
+
+
+class IncrementalContext(ParseContext):
+    """A ParseContext for parsing a document with Reparse. It keeps track of
+    how far ahead the parser has looked, so that Reparse knows which tokens
+    each repetition depends on."""
+
+    def create_child(self) -> "ParseContext":
+        ctx = super().create_child()
+        ctx.reparse = self.reparse
+        return ctx
+
+    def _reached(self, index: int):
+        assert self.reparse is not None
+        if index > self.reparse.furthest:
+            self.reparse.furthest = index
+
+    def skip(self):
+        super().skip()
+        self._reached(self.index)
+
+    def next_token(self) -> Token:
+        token = super().next_token()
+        self._reached(self.index)
+        return token
+
+    def next_token_text(self) -> str:
+        text = super().next_token_text()
+        self._reached(self.index)
+        return text
+
+    def peek_index(self) -> int:
+        index = super().peek_index()
+        self._reached(index)
+        return index
+
+
 class ZeroOrMore(ParseNode):
     """ParseNode that matches its child any number of times (including zero
     times). It cannot fail to parse. If its child raises an exception, one token
@@ -427,6 +1000,9 @@ class ZeroOrMore(ParseNode):
                 ctx.errors.append(e)
                 ctx.next_token()
 
+    def _first_set(self, seen):
+        return _optional_first_set(self.child, seen)
+
 
 class Delimited(ParseNode):
     """ParseNode that matches its first child any number of times (including zero
@@ -441,6 +1017,9 @@ class Delimited(ParseNode):
             pass
         return True
 
+    def _first_set(self, seen):
+        return _optional_first_set(self.child, seen)
+
 
 class Optional(ParseNode):
     """ParseNode that matches its child zero or one times. It cannot fail to
@@ -453,6 +1032,16 @@ class Optional(ParseNode):
         self.child.parse(ctx)
         return True
 
+    def _first_set(self, seen):
+        return _optional_first_set(self.child, seen)
+
+
+def _optional_first_set(child: ParseNode, seen) -> T.Optional[FirstSet]:
+    first = first_set(child, seen)
+    if first is None:
+        return None
+    return FirstSet(first.texts, first.types, nullable=True)
+
 
 class Eof(ParseNode):
     """ParseNode that matches an EOF token."""
@@ -461,6 +1050,9 @@ class Eof(ParseNode):
         token = ctx.next_token()
         return token.type == TokenType.EOF
 
+    def _first_set(self, seen):
+        return FirstSet(types=frozenset([TokenType.EOF.value]))
+
 
 class Match(ParseNode):
     """ParseNode that matches the given literal token."""
@@ -469,8 +1061,10 @@ class Match(ParseNode):
         self.op = op
 
     def _parse(self, ctx: ParseContext) -> bool:
-        token = ctx.next_token()
-        return str(token) == self.op
+        return ctx.next_token_text() == self.op
+
+    def _first_set(self, seen):
+        return FirstSet(texts=frozenset([self.op]))
 
     def expected(self, expect: T.Optional[str] = None):
         """Convenience method for err()."""
@@ -495,6 +1089,9 @@ class UseIdent(ParseNode):
         ctx.set_group_val(self.key, str(token), token)
         return True
 
+    def _first_set(self, seen):
+        return FirstSet(types=frozenset([TokenType.IDENT.value]))
+
 
 class UseNumber(ParseNode):
     """ParseNode that matches a number and sets it in a key=value pair on
@@ -512,6 +1109,9 @@ class UseNumber(ParseNode):
         ctx.set_group_val(self.key, number, token)
         return True
 
+    def _first_set(self, seen):
+        return FirstSet(types=frozenset([TokenType.NUMBER.value]))
+
 
 class UseNumberText(ParseNode):
     """ParseNode that matches a number, but sets its *original text* it in a
@@ -528,6 +1128,9 @@ class UseNumberText(ParseNode):
         ctx.set_group_val(self.key, str(token), token)
         return True
 
+    def _first_set(self, seen):
+        return FirstSet(types=frozenset([TokenType.NUMBER.value]))
+
 
 class UseQuoted(ParseNode):
     """ParseNode that matches a quoted string and sets it in a key=value pair
@@ -546,7 +1149,7 @@ class UseQuoted(ParseNode):
         try:
             unescaped = utils.unescape_quote(str(token))
         except utils.UnescapeError as e:
-            start = ctx.tokens[ctx.index - 1].start
+            start = ctx.tokens.start_at(ctx.index - 1)
             range = Range(start + e.start, start + e.end, ctx.text)
             ctx.errors.append(
                 CompileError(f"Invalid escape sequence '{range.text}'", range)
@@ -556,6 +1159,9 @@ class UseQuoted(ParseNode):
 
         return True
 
+    def _first_set(self, seen):
+        return FirstSet(types=frozenset([TokenType.QUOTED.value]))
+
 
 class UseLiteral(ParseNode):
     """ParseNode that doesn't match anything, but rather sets a static key=value
@@ -570,6 +1176,9 @@ class UseLiteral(ParseNode):
         ctx.set_group_val(self.key, self.literal, None)
         return True
 
+    def _first_set(self, seen):
+        return FirstSet(nullable=True)
+
 
 class UseExact(ParseNode):
     """Matches the given identifier and sets it as a named token."""
@@ -583,6 +1192,9 @@ class UseExact(ParseNode):
         ctx.set_group_val(self.key, self.string, token)
         return str(token) == self.string
 
+    def _first_set(self, seen):
+        return FirstSet(texts=frozenset([self.string]))
+
 
 class Keyword(ParseNode):
     """Matches the given identifier and sets it as a named token, with the name
@@ -597,6 +1209,9 @@ class Keyword(ParseNode):
         ctx.set_group_val(self.kw, True, token)
         return str(token) == self.kw
 
+    def _first_set(self, seen):
+        return FirstSet(texts=frozenset([self.kw]))
+
 
 class Mark(ParseNode):
     def __init__(self, key: str):
@@ -606,6 +1221,14 @@ class Mark(ParseNode):
         ctx.set_mark(self.key)
         return True
 
+    def _first_set(self, seen):
+        return FirstSet(nullable=True)
+
+
+# Groups for AstNode classes are shared, so that packrat parsing recognizes
+# them as the same rule wherever they appear in the grammar
+_ast_groups: T.Dict[type, Group] = {}
+
 
 def to_parse_node(value) -> ParseNode:
     if isinstance(value, str):
@@ -613,7 +1236,9 @@ def to_parse_node(value) -> ParseNode:
     elif isinstance(value, list):
         return Sequence(*value)
     elif isinstance(value, type) and hasattr(value, "grammar"):
-        return Group(value, getattr(value, "grammar"))
+        if value not in _ast_groups:
+            _ast_groups[value] = Group(value, getattr(value, "grammar"))
+        return _ast_groups[value]
     elif isinstance(value, ParseNode):
         return value
     else:
@@ -18,21 +18,70 @@
 # SPDX-License-Identifier: LGPL-3.0-or-later
 
 
+from functools import lru_cache
+
+from . import parser_codegen
 from .errors import MultipleErrors, PrintableError
 from .language import OBJECT_CONTENT_HOOKS, UI, Template
 from .parse_tree import *
 from .tokenizer import TokenType
 
+_ROOT = AnyOf(UI)
+
+
+@lru_cache
+def _compiled_parser() -> T.Optional[parser_codegen.CompiledParser]:
+    return parser_codegen.load_parser(_ROOT)
+
 
 def parse(
-    tokens: T.List[Token],
+    tokens: TokenStream,
+    packrat: bool = False,
 ) -> T.Tuple[T.Optional[UI], T.Optional[MultipleErrors], T.List[CompileError]]:
-    """Parses a list of tokens into an abstract syntax tree."""
+    """Parses a stream of tokens into an abstract syntax tree.
+
+    If `packrat` is true, the result of parsing each group at each position
+    is cached, so backtracking never parses the same group twice. This uses
+    more memory, but can be faster for inputs that need a lot of backtracking,
+    such as files with many syntax errors.
+
+    Otherwise, the grammar is compiled to Python code (see parser_codegen)
+    if possible, and interpreted if not."""
+
+    if packrat:
+        ctx = ParseContext(tokens, tokens.string, memo={})
+        return _parse_with(ctx, _ROOT.parse)
+    else:
+        ctx = ParseContext(tokens, tokens.string)
+        return _parse_with(ctx, _compiled_parser() or _ROOT.parse)
 
+
+class IncrementalParser:
+    """Parses successive versions of a document, such as a file that is open
+    in the language server. Top-level blocks that an edit didn't touch are
+    reused from the previous version instead of being parsed again (see
+    Reparse). The AST is still built and validated from scratch, since
+    validation can depend on anything in the document."""
+
+    def __init__(self) -> None:
+        self.previous: T.Optional[Reparse] = None
+
+    def parse(
+        self, tokens: TokenStream
+    ) -> T.Tuple[T.Optional[UI], T.Optional[MultipleErrors], T.List[CompileError]]:
+        """Like parse(), for the next version of the document."""
+        reparse = Reparse(tokens, self.previous)
+        ctx = IncrementalContext(tokens, tokens.string)
+        ctx.reparse = reparse
+        self.previous = reparse
+        return _parse_with(ctx, _ROOT.parse)
+
+
+def _parse_with(
+    ctx: ParseContext, parse_root: T.Callable[[ParseContext], T.Any]
+) -> T.Tuple[T.Optional[UI], T.Optional[MultipleErrors], T.List[CompileError]]:
     try:
-        original_text = tokens[0].string if len(tokens) else ""
-        ctx = ParseContext(tokens, original_text)
-        AnyOf(UI).parse(ctx)
+        parse_root(ctx)
 
         assert ctx.last_group is not None
         ast_node = ctx.last_group.to_ast()
@@ -0,0 +1,585 @@
+# parser_codegen.py
+#
+# Copyright 2026 agent <agent@local>
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This file is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+
+"""Compiles the parse node grammar into a Python module.
+
+The grammar in blueprintcompiler.language is built out of the combinators in
+parse_tree.py, which are interpreted at runtime. This module translates the
+same grammar into plain recursive-descent functions: one function per
+non-trivial node, with leaf nodes like Match and UseIdent inlined into their
+parents and AnyOf dispatch tables written out as constant sets. The generated
+parser behaves exactly like the interpreter, which remains the reference
+implementation and the fallback.
+
+The compiled code is cached in the user's cache directory, keyed on a hash of
+the grammar's structure, so it is only regenerated when the grammar or this
+file changes. Run `python3 -m blueprintcompiler.parser_codegen` to fill the
+cache ahead of time (e.g. at build time), or with `--print` to see the
+generated code."""
+
+import argparse
+import hashlib
+import marshal
+import sys
+import types
+import typing as T
+from pathlib import Path
+
+from .parse_tree import (
+    AnyOf,
+    Delimited,
+    Eof,
+    Err,
+    Fail,
+    Group,
+    Keyword,
+    Mark,
+    Match,
+    Optional,
+    ParseContext,
+    ParseNode,
+    ParseResult,
+    Sequence,
+    Statement,
+    Until,
+    UseExact,
+    UseIdent,
+    UseLiteral,
+    UseNumber,
+    UseNumberText,
+    UseQuoted,
+    ZeroOrMore,
+    first_set,
+)
+from .tokenizer import TokenType
+from .utils import cache_dir, cache_owner, write_cache_file
+
+CompiledParser = T.Callable[[ParseContext], ParseResult]
+
+# Nodes that are compiled into a function of their own. Everything else of a
+# known type is inlined into its parent; unknown node types are handed to
+# the interpreter.
+_FUNCTION_NODES = (
+    AnyOf,
+    Delimited,
+    Err,
+    Fail,
+    Group,
+    Optional,
+    Sequence,
+    Statement,
+    Until,
+    ZeroOrMore,
+)
+_LEAF_NODES = (
+    Eof,
+    Keyword,
+    Mark,
+    Match,
+    UseExact,
+    UseIdent,
+    UseLiteral,
+    UseNumber,
+    UseNumberText,
+    UseQuoted,
+)
+
+
+def _node_children(node: ParseNode) -> T.List[ParseNode]:
+    if isinstance(node, (AnyOf, Sequence, Statement)):
+        return list(node.children)
+    elif isinstance(node, (Err, Fail, Group, Optional, ZeroOrMore)):
+        return [node.child]
+    elif isinstance(node, Delimited):
+        return [node.child, node.delimiter]
+    elif isinstance(node, Until):
+        children = [node.child, node.delimiter]
+        if node.between_delimiter is not None:
+            children.append(node.between_delimiter)
+        return children
+    else:
+        return []
+
+
+def collect_nodes(root: ParseNode) -> T.List[ParseNode]:
+    """Lists every node reachable from `root`, in a stable order."""
+
+    nodes: T.List[ParseNode] = []
+    seen: T.Set[int] = set()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        nodes.append(node)
+        stack.extend(reversed(_node_children(node)))
+    return nodes
+
+
+def _describe(node: ParseNode, ids: T.Dict[int, int]) -> T.Tuple:
+    """Describes everything about a node that the generated code depends
+    on, for fingerprinting the grammar."""
+
+    params: T.List[T.Any] = [
+        type(node).__module__,
+        type(node).__qualname__,
+        [ids[id(child)] for child in _node_children(node)],
+    ]
+    for name, value in sorted(vars(node).items()):
+        if name.startswith("_") or isinstance(value, (ParseNode, list)):
+            # Children are listed above; underscored attributes are caches,
+            # such as AnyOf's dispatch table
+            continue
+        elif isinstance(value, type):
+            params.append((name, value.__module__, value.__qualname__))
+        else:
+            params.append((name, repr(value)))
+    return tuple(params)
+
+
+def fingerprint(nodes: T.List[ParseNode]) -> str:
+    ids = {id(node): i for i, node in enumerate(nodes)}
+    hash = hashlib.sha256()
+    hash.update(Path(__file__).read_bytes())
+    for node in nodes:
+        hash.update(repr(_describe(node, ids)).encode())
+    return hash.hexdigest()[:32]
+
+
+class _Generator:
+    def __init__(self, nodes: T.List[ParseNode]):
+        self.nodes = nodes
+        self.ids = {id(node): i for i, node in enumerate(nodes)}
+        # Values that can't be written as literals are looked up in the
+        # node list when the module is loaded
+        self.bindings: T.List[str] = []
+
+    def id(self, node: ParseNode) -> int:
+        return self.ids[id(node)]
+
+    def const(self, node: ParseNode, attr: str) -> str:
+        value = getattr(node, attr)
+        if type(value) in (str, int, bool) or value is None:
+            return repr(value)
+
+        name = f"{attr}_{self.id(node)}"
+        self.bindings.append(f"{name} = nodes[{self.id(node)}].{attr}")
+        return name
+
+    def generate(self, fingerprint: str) -> str:
+        functions: T.List[str] = []
+        for node in self.nodes:
+            if type(node) in _FUNCTION_NODES:
+                functions.extend(self.function(node))
+                functions.append("")
+            elif type(node) not in _LEAF_NODES:
+                name = f"node_{self.id(node)}"
+                self.bindings.append(f"{name} = nodes[{self.id(node)}]")
+
+        root = self.call(self.nodes[0])
+        return "\n".join(
+            [
+                "# Generated by blueprintcompiler/parser_codegen.py. Do not edit.",
+                "",
+                "from blueprintcompiler import utils",
+                "from blueprintcompiler.errors import CompileError",
+                "from blueprintcompiler.parse_tree import ParseResult",
+                "from blueprintcompiler.tokenizer import Range",
+                "",
+                f"FINGERPRINT = {fingerprint!r}",
+                "",
+                "SUCCESS = ParseResult.SUCCESS",
+                "FAILURE = ParseResult.FAILURE",
+                "EMPTY = ParseResult.EMPTY",
+                "",
+                "",
+                "def bind(nodes):",
+                *["    " + line for line in self.bindings],
+                "",
+                *["    " + line if line else "" for line in functions],
+                "    def parse(ctx):",
+                "        tokens = ctx.tokens",
+                "        ns = ctx.next_significant",
+                "        types = tokens.types",
+                "        starts = tokens.starts",
+                "        ends = tokens.ends",
+                "        string = tokens.string",
+                *["        " + line for line in root],
+                "        return r",
+                "",
+                "    return parse",
+                "",
+            ]
+        )
+
+    def function(self, node: ParseNode) -> T.List[str]:
+        body = getattr(self, "body_" + type(node).__name__)(node)
+        return [
+            f"def p{self.id(node)}(ctx):",
+            "    tokens = ctx.tokens",
+            "    ns = ctx.next_significant",
+            "    types = tokens.types",
+            "    starts = tokens.starts",
+            "    ends = tokens.ends",
+            "    string = tokens.string",
+            *["    " + line for line in body],
+        ]
+
+    def call(self, node: ParseNode) -> T.List[str]:
+        """Returns code that does the equivalent of `r = node.parse(ctx)`."""
+
+        if type(node) in _FUNCTION_NODES:
+            return [
+                "s = ctx.index",
+                "cc = ctx.create_child()",
+                f"if p{self.id(node)}(cc):",
+                "    ctx.apply_child(cc)",
+                "    r = EMPTY if ctx.index == s else SUCCESS",
+                "else:",
+                "    r = FAILURE",
+            ]
+        elif type(node) in _LEAF_NODES:
+            return getattr(self, "leaf_" + type(node).__name__)(node)
+        else:
+            return [f"r = node_{self.id(node)}.parse(ctx)"]
+
+    # Leaf nodes. These don't need a child context: they can't match part
+    # of the input and then fail, so they only touch `ctx` on success.
+
+    def leaf_token(
+        self, condition: str, key: T.Optional[str] = None, value: str = ""
+    ) -> T.List[str]:
+        lines = [
+            "i = ns[ctx.index]",
+            f"if {condition}:",
+            "    ctx.index = i + 1",
+        ]
+        if key is not None:
+            lines.append(f"    ctx.group_keys[{key}] = ({value}, tokens[i])")
+        return lines + ["    r = SUCCESS", "else:", "    r = FAILURE"]
+
+    def leaf_Match(self, node: Match) -> T.List[str]:
+        return self.leaf_token(
+            f"string[starts[i] : ends[i]] == {self.const(node, 'op')}"
+        )
+
+    def leaf_Keyword(self, node: Keyword) -> T.List[str]:
+        kw = self.const(node, "kw")
+        return self.leaf_token(f"string[starts[i] : ends[i]] == {kw}", kw, "True")
+
+    def leaf_UseExact(self, node: UseExact) -> T.List[str]:
+        string = self.const(node, "string")
+        return self.leaf_token(
+            f"string[starts[i] : ends[i]] == {string}", self.const(node, "key"), string
+        )
+
+    def leaf_UseIdent(self, node: UseIdent) -> T.List[str]:
+        return self.leaf_token(
+            f"types[i] == {TokenType.IDENT.value}",
+            self.const(node, "key"),
+            "string[starts[i] : ends[i]]",
+        )
+
+    def leaf_UseNumberText(self, node: UseNumberText) -> T.List[str]:
+        return self.leaf_token(
+            f"types[i] == {TokenType.NUMBER.value}",
+            self.const(node, "key"),
+            "string[starts[i] : ends[i]]",
+        )
+
+    def leaf_UseNumber(self, node: UseNumber) -> T.List[str]:
+        return [
+            "i = ns[ctx.index]",
+            f"if types[i] == {TokenType.NUMBER.value}:",
+            "    token = tokens[i]",
+            "    number = token.get_number()",
+            "    ctx.index = i + 1",
+            f"    ctx.group_keys[{self.const(node, 'key')}] = (number, token)",
+            "    r = SUCCESS",
+            "else:",
+            "    r = FAILURE",
+        ]
+
+    def leaf_UseQuoted(self, node: UseQuoted) -> T.List[str]:
+        return [
+            "i = ns[ctx.index]",
+            f"if types[i] == {TokenType.QUOTED.value}:",
+            "    token = tokens[i]",
+            "    unescaped = None",
+            "    try:",
+            "        unescaped = utils.unescape_quote(str(token))",
+            "    except utils.UnescapeError as e:",
+            "        range = Range(starts[i] + e.start, starts[i] + e.end, ctx.text)",
+            "        ctx.errors.append(",
+            "            CompileError(f\"Invalid escape sequence '{range.text}'\", range)",
+            "        )",
+            "    ctx.index = i + 1",
+            f"    ctx.group_keys[{self.const(node, 'key')}] = (unescaped, token)",
+            "    r = SUCCESS",
+            "else:",
+            "    r = FAILURE",
+        ]
+
+    def leaf_UseLiteral(self, node: UseLiteral) -> T.List[str]:
+        key = self.const(node, "key")
+        return [
+            f"ctx.group_keys[{key}] = ({self.const(node, 'literal')}, None)",
+            "r = EMPTY",
+        ]
+
+    def leaf_Mark(self, node: Mark) -> T.List[str]:
+        return [
+            "i = starts[ctx.index]",
+            f"ctx.group_ranges[{self.const(node, 'key')}] = Range(i, i, ctx.text)",
+            "r = EMPTY",
+        ]
+
+    def leaf_Eof(self, node: Eof) -> T.List[str]:
+        return self.leaf_token(f"types[i] == {TokenType.EOF.value}")
+
+    # Function nodes. Each body does the same as the node's _parse() method.
+
+    def body_Group(self, node: Group) -> T.List[str]:
+        return [
+            "ctx.index = ns[ctx.index]",
+            f"ctx.start_group({self.const(node, 'ast_type')})",
+            *self.call(node.child),
+            "return r is not FAILURE",
+        ]
+
+    def body_Sequence(self, node: Sequence) -> T.List[str]:
+        lines = []
+        for child in node.children:
+            lines += self.call(child)
+            lines += ["if r is FAILURE:", "    return False"]
+        return lines + ["return True"]
+
+    def body_Statement(self, node: Statement) -> T.List[str]:
+        lines = ["try:"]
+        for child in node.children:
+            lines += ["    " + line for line in self.call(child)]
+            lines += ["    if r is FAILURE:", "        return False"]
+        return lines + [
+            "except CompileError as e:",
+            "    ctx.errors.append(e)",
+            "    ctx.set_group_incomplete()",
+            "    return True",
+            "",
+            "token = ctx.peek_token()",
+            'if str(token) != ";":',
+            '    ctx.errors.append(CompileError("Expected `;`", token.range))',
+            "else:",
+            "    ctx.next_token()",
+            "return True",
+        ]
+
+    def body_AnyOf(self, node: AnyOf) -> T.List[str]:
+        lines = [
+            "i = ns[ctx.index]",
+            "if i < len(types):",
+            "    t = types[i]",
+            "    text = string[starts[i] : ends[i]]",
+            "else:",
+            "    t = text = None",
+        ]
+        for child in node.children:
+            first = first_set(child)
+            call = self.call(child) + ["if r is not FAILURE:", "    return True"]
+            if first is None or first.nullable:
+                lines += call
+                continue
+
+            conditions = ["t is None"]
+            if first.texts:
+                conditions.append(f"text in {_set_literal(first.texts)}")
+            if first.types:
+                conditions.append(f"t in {_set_literal(first.types)}")
+            lines.append(f"if {' or '.join(conditions)}:")
+            lines += ["    " + line for line in call]
+        return lines + ["return False"]
+
+    def body_Err(self, node: Err) -> T.List[str]:
+        return [
+            *self.call(node.child),
+            "if r is FAILURE:",
+            "    i = starts[ns[ctx.start]]",
+            f"    raise CompileError({self.const(node, 'message')}, Range(i, i, ctx.text))",
+            "return True",
+        ]
+
+    def body_Fail(self, node: Fail) -> T.List[str]:
+        return [
+            *self.call(node.child),
+            "if r is not FAILURE:",
+            "    start_token = tokens[ns[ctx.start]]",
+            "    end_token = tokens[ctx.index]",
+            "    raise CompileError(",
+            f"        {self.const(node, 'message')},",
+            "        Range.join(start_token.range, end_token.range),",
+            "    )",
+            "return True",
+        ]
+
+    def body_Until(self, node: Until) -> T.List[str]:
+        lines = [
+            "while True:",
+            *["    " + line for line in self.call(node.delimiter)],
+            "    if r is not FAILURE:",
+            "        break",
+            "    if ctx.is_eof():",
+            "        return False",
+            "    try:",
+            *["        " + line for line in self.call(node.child)],
+            "        if r is not SUCCESS:",
+            "            ctx.skip_unexpected_token()",
+        ]
+        if node.between_delimiter is not None:
+            lines += [
+                *["        " + line for line in self.call(node.between_delimiter)],
+                "        if r is FAILURE:",
+                *["            " + line for line in self.call(node.delimiter)],
+                "            if r is not FAILURE:",
+                "                return True",
+                "            if ctx.is_eof():",
+                "                return False",
+                "            ctx.skip_unexpected_token()",
+            ]
+        return lines + [
+            "    except CompileError as e:",
+            "        ctx.errors.append(e)",
+            "        ctx.next_token()",
+            "return True",
+        ]
+
+    def body_ZeroOrMore(self, node: ZeroOrMore) -> T.List[str]:
+        return [
+            "while True:",
+            "    try:",
+            *["        " + line for line in self.call(node.child)],
+            "        if r is not SUCCESS:",
+            "            return True",
+            "    except CompileError as e:",
+            "        ctx.errors.append(e)",
+            "        ctx.next_token()",
+        ]
+
+    def body_Delimited(self, node: Delimited) -> T.List[str]:
+        return [
+            "while True:",
+            *["    " + line for line in self.call(node.child)],
+            "    if r is not SUCCESS:",
+            "        return True",
+            *["    " + line for line in self.call(node.delimiter)],
+            "    if r is not SUCCESS:",
+            "        return True",
+        ]
+
+    def body_Optional(self, node: Optional) -> T.List[str]:
+        return [*self.call(node.child), "return True"]
+
+
+def _set_literal(values: T.Iterable) -> str:
+    return "{" + ", ".join(repr(value) for value in sorted(values)) + "}"
+
+
+def generate(root: ParseNode) -> str:
+    """Generates the source of a parser module for the grammar rooted at
+    `root`."""
+    nodes = collect_nodes(root)
+    return _Generator(nodes).generate(fingerprint(nodes))
+
+
+def _compile(source: str) -> types.CodeType:
+    return compile(source, "<generated parser>", "exec")
+
+
+def _bind(code: types.CodeType, nodes: T.List[ParseNode]) -> CompiledParser:
+    namespace: T.Dict[str, T.Any] = {}
+    exec(code, namespace)
+    return namespace["bind"](nodes)
+
+
+def compile_parser(root: ParseNode) -> CompiledParser:
+    """Generates and compiles a parser in memory, without using the cache.
+    The returned function does the same as `root.parse(ctx)`, except that it
+    doesn't support packrat parsing."""
+
+    nodes = collect_nodes(root)
+    return _bind(_compile(generate(root)), nodes)
+
+
+def load_parser(root: ParseNode) -> T.Optional[CompiledParser]:
+    """Loads the generated parser for the grammar rooted at `root` from the
+    cache, generating it first if necessary. Returns None if the parser can't
+    be generated, in which case the caller should use the interpreter."""
+
+    nodes = collect_nodes(root)
+    hash = fingerprint(nodes)
+    owner = cache_owner()
+    # The cache holds compiled bytecode, which is specific to the Python
+    # version, so that loading it is just a matter of unmarshalling
+    path = cache_dir() / f"parser-{owner}-{hash}.{sys.implementation.cache_tag}"
+
+    try:
+        code = marshal.loads(path.read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        code = None
+
+    if not isinstance(code, types.CodeType):
+        try:
+            code = _compile(_Generator(nodes).generate(hash))
+        except Exception:  # pragma: no cover
+            return None
+
+        # Replace the parsers this installation generated for previous
+        # versions of the grammar. Those for other Python versions are kept,
+        # since they may still be in use.
+        write_cache_file(
+            path,
+            marshal.dumps(code),
+            replaces=f"parser-{owner}-*.{sys.implementation.cache_tag}",
+        )
+
+    return _bind(code, nodes)
+
+
+def main():
+    from .language import UI
+
+    parser = argparse.ArgumentParser(
+        prog="python3 -m blueprintcompiler.parser_codegen",
+        description="Generates the cached parser module for the blueprint grammar.",
+    )
+    parser.add_argument(
+        "--print",
+        action="store_true",
+        help="print the generated code instead of caching it",
+    )
+    opts = parser.parse_args()
+
+    root = AnyOf(UI)
+    if opts.print:
+        sys.stdout.write(generate(root))
+    else:
+        load_parser(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,8 @@
 
 import re
 import typing as T
+from array import array
+from bisect import bisect_left, bisect_right
 from enum import Enum
 
 from .utils import Range
@@ -38,10 +40,10 @@ class TokenType(Enum):
 
 _tokens = [
     (TokenType.IDENT, r"[A-Za-z_][\d\w\-_]*"),
-    (TokenType.QUOTED, r'"(\\(.|\n)|[^\\"\n])*"'),
-    (TokenType.QUOTED, r"'(\\(.|\n)|[^\\'\n])*'"),
+    (TokenType.QUOTED, r'"(?:\\(?:.|\n)|[^\\"\n])*"'),
+    (TokenType.QUOTED, r"'(?:\\(?:.|\n)|[^\\'\n])*'"),
     (TokenType.NUMBER, r"0x[A-Za-z0-9_]+"),
-    (TokenType.NUMBER, r"[\d_]+(\.[\d_]+)?"),
+    (TokenType.NUMBER, r"[\d_]+(?:\.[\d_]+)?"),
     (TokenType.NUMBER, r"\.[\d_]+"),
     (TokenType.WHITESPACE, r"\s+"),
     (TokenType.COMMENT, r"\/\*[\s\S]*?\*\/"),
@@ -49,10 +51,29 @@ _tokens = [
     (TokenType.OP, r"\$|<<|>>|=>|::|<|>|:=|\.|\|\||\||\+|\-|\*|=|:|/"),
     (TokenType.PUNCTUATION, r"\(|\)|\{|\}|;|\[|\]|\,"),
 ]
-_TOKENS = [(type, re.compile(regex)) for (type, regex) in _tokens]
+
+# All of the token regexes are combined into a single alternation, so each
+# token is found with one match() call. Alternatives are tried left to right,
+# so the order of _tokens is significant, just like it was when each regex was
+# tried separately. The index of the matched group tells us the token type
+# (groups are 1-based, hence the placeholder).
+_TOKEN_REGEX = re.compile("|".join(f"({regex})" for (_, regex) in _tokens))
+_TOKEN_TYPE_VALUES = [-1] + [type.value for (type, _) in _tokens]
+
+# Maps the raw values stored in a TokenStream back to TokenType members
+_TOKEN_TYPES_BY_VALUE = sorted(TokenType, key=lambda type: type.value)
+
+# Tokens that the parser skips over
+_TRIVIA_VALUES = (TokenType.WHITESPACE.value, TokenType.COMMENT.value)
 
 
 class Token:
+    """A single token. Tokens are lightweight views into a TokenStream; they
+    are created on demand and are not unique, so don't compare them by
+    identity."""
+
+    __slots__ = ("type", "start", "end", "string")
+
     def __init__(self, type: TokenType, start: int, end: int, string: str):
         self.type = type
         self.start = start
@@ -91,29 +112,257 @@ class Token:
             raise CompileError(f"{str(self)} is not a valid number literal", self.range)
 
 
-def _tokenize(ui_ml: str):
+class TokenStream(T.Sequence[Token]):
+    """The tokens of a source file, stored column-wise in compact arrays
+    rather than as a list of Token objects. Indexing or iterating over the
+    stream creates Token views on demand; the parser and other hot paths
+    should use the type_at(), start_at(), etc. accessors or the columns
+    directly to avoid creating them at all."""
+
+    __slots__ = ("string", "types", "starts", "ends", "_next_significant")
+
+    def __init__(self, string: str) -> None:
+        self.string = string
+        self.types = array("B")
+        self.starts = array("i")
+        self.ends = array("i")
+        self._next_significant: T.Optional[array] = None
+
+    def append(self, type: int, start: int, end: int) -> None:
+        self.types.append(type)
+        self.starts.append(start)
+        self.ends.append(end)
+        self._next_significant = None
+
+    @property
+    def next_significant(self) -> array:
+        """For each token index, the index of the first token at or after it
+        that isn't whitespace or a comment. This lets the parser step over
+        trivia in constant time, no matter how often it backtracks. The
+        trivia itself stays in the stream for the formatter and the language
+        server.
+
+        The table is built on first use, so it must not be accessed until
+        the stream is complete."""
+
+        if self._next_significant is None:
+            types = self.types
+            n = len(types)
+            table = array("i", range(n + 1))
+            next_index = n
+            for i in range(n - 1, -1, -1):
+                if types[i] in _TRIVIA_VALUES:
+                    table[i] = next_index
+                else:
+                    next_index = i
+            self._next_significant = table
+        return self._next_significant
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    @T.overload
+    def __getitem__(self, index: int) -> Token: ...
+
+    @T.overload
+    def __getitem__(self, index: slice) -> T.List[Token]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        return Token(
+            _TOKEN_TYPES_BY_VALUE[self.types[index]],
+            self.starts[index],
+            self.ends[index],
+            self.string,
+        )
+
+    def __iter__(self) -> T.Iterator[Token]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def type_at(self, index: int) -> TokenType:
+        return _TOKEN_TYPES_BY_VALUE[self.types[index]]
+
+    def start_at(self, index: int) -> int:
+        return self.starts[index]
+
+    def end_at(self, index: int) -> int:
+        return self.ends[index]
+
+    def text_at(self, index: int) -> str:
+        return self.string[self.starts[index] : self.ends[index]]
+
+
+def _unrecognized_syntax(ui_ml: str, i: int):
     from .errors import CompileError
 
+    return CompileError(
+        "Could not determine what kind of syntax is meant here",
+        Range(i, i, ui_ml),
+    )
+
+
+def _tokenize(ui_ml: str) -> TokenStream:
+    match_token = _TOKEN_REGEX.match
+    type_values = _TOKEN_TYPE_VALUES
+
+    stream = TokenStream(ui_ml)
+    types = stream.types
+    starts = stream.starts
+    ends = stream.ends
+
     i = 0
-    while i < len(ui_ml):
-        matched = False
-        for type, regex in _TOKENS:
-            match = regex.match(ui_ml, i)
+    end = len(ui_ml)
+    while i < end:
+        match = match_token(ui_ml, i)
+
+        if match is None:
+            raise _unrecognized_syntax(ui_ml, i)
+
+        match_end = match.end()
+        types.append(type_values[match.lastindex])  # type: ignore
+        starts.append(i)
+        ends.append(match_end)
+        i = match_end
+
+    stream.append(TokenType.EOF.value, i, i)
+    return stream
+
+
+def tokenize(data: str) -> TokenStream:
+    return _tokenize(data)
+
+
+# How many characters past the end of a token the token regexes may need to
+# look at (e.g. "1." is only known not to be a float after seeing the
+# character after the dot). See retokenize() for the one exception.
+_LOOKAHEAD = 2
+
+
+def retokenize(
+    tokens: TokenStream, data: str, start: int, end: int, new_end: int
+) -> TokenStream:
+    """Updates a token stream after an edit, without re-scanning the whole
+    text. `tokens` is the stream for the text before the edit, in which the
+    range [start, end) was replaced to produce `data`. The replacement text
+    is data[start:new_end].
+
+    Scanning restarts at the last token boundary that can't have been
+    affected by the edit and stops as soon as it reaches a token boundary
+    that the old stream also had, after the edit. The remaining old tokens
+    are reused with their offsets shifted."""
+
+    old_text = tokens.string
+    delta = new_end - end
+
+    # Tokens whose lookahead doesn't reach the edit are unchanged
+    restart = bisect_right(tokens.ends, start - _LOOKAHEAD)
+
+    # A "/*" with no matching "*/" is tokenized as the operators "/" and "*",
+    # but only after the comment regex has scanned all the way to the end of
+    # the file. Such a token depends on all the text after it, so if there is
+    # one before the edit, rescan from there.
+    unclosed = old_text.find("/*", max(old_text.rfind("*/") - 1, 0), start)
+    if unclosed != -1:
+        restart = min(restart, bisect_right(tokens.starts, unclosed) - 1)
+
+    stream = TokenStream(data)
+    types = stream.types = tokens.types[:restart]
+    starts = stream.starts = tokens.starts[:restart]
+    ends = stream.ends = tokens.ends[:restart]
+
+    match_token = _TOKEN_REGEX.match
+    type_values = _TOKEN_TYPE_VALUES
+    old_starts = tokens.starts
+    old_index = restart
+
+    i = tokens.starts[restart]
+    data_end = len(data)
+    while i < data_end:
+        if i >= new_end:
+            # Past the edit, the text is the same as before. If the old stream
+            # had a token boundary here too, the rest of it is still valid.
+            old_index = bisect_left(old_starts, i - delta, old_index)
+            if old_starts[old_index] == i - delta:
+                types.extend(tokens.types[old_index:])
+                shift = delta.__add__
+                starts.extend(map(shift, old_starts[old_index:]))
+                ends.extend(map(shift, tokens.ends[old_index:]))
+                return stream
+
+        match = match_token(data, i)
+
+        if match is None:
+            raise _unrecognized_syntax(data, i)
+
+        match_end = match.end()
+        types.append(type_values[match.lastindex])  # type: ignore
+        starts.append(i)
+        ends.append(match_end)
+        i = match_end
+
+    stream.append(TokenType.EOF.value, i, i)
+    return stream
+
+
+def _common_prefix_length(a: T.Sequence, b: T.Sequence) -> int:
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix_length(a: T.Sequence, b: T.Sequence, limit: int) -> int:
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid :] == b[len(b) - mid :]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
 
-            if match is not None:
-                yield Token(type, match.start(), match.end(), ui_ml)
-                i = match.end()
-                matched = True
-                break
+def unchanged_tokens(old: TokenStream, new: TokenStream) -> T.Tuple[int, int, int]:
+    """Compares the token streams of two versions of a text. Returns a tuple
+    (prefix, old_suffix, new_suffix): the first `prefix` tokens of both
+    streams are identical, and old[old_suffix:] is identical to
+    new[new_suffix:] apart from its offsets, which are shifted by the change
+    in the length of the text."""
 
-        if not matched:
-            raise CompileError(
-                "Could not determine what kind of syntax is meant here",
-                Range(i, i, ui_ml),
-            )
+    old_text, new_text = old.string, new.string
+    common_prefix = _common_prefix_length(old_text, new_text)
+    common_suffix = _common_suffix_length(
+        old_text, new_text, min(len(old_text), len(new_text)) - common_prefix
+    )
 
-    yield Token(TokenType.EOF, i, i, ui_ml)
+    # Tokens that end inside the common prefix of the text are usually
+    # unchanged, but one may be followed by a different token of the same
+    # text (e.g. an unclosed comment), so check the columns too
+    limit = min(bisect_right(old.ends, common_prefix), len(new))
+    prefix = min(
+        _common_prefix_length(old.types[:limit], new.types[:limit]),
+        _common_prefix_length(old.starts[:limit], new.starts[:limit]),
+        _common_prefix_length(old.ends[:limit], new.ends[:limit]),
+    )
 
+    # After the edit, the tokenizer produces the same tokens from the same
+    # text, so once both streams have a token boundary at the same place in
+    # the common suffix, the rest of the tokens are the same
+    delta = len(new_text) - len(old_text)
+    old_suffix = bisect_left(old.starts, len(old_text) - common_suffix)
+    new_suffix = 0
+    while old_suffix < len(old):
+        position = old.starts[old_suffix] + delta
+        new_suffix = bisect_left(new.starts, position, new_suffix)
+        if new_suffix < len(new) and new.starts[new_suffix] == position:
+            break
+        old_suffix += 1
 
-def tokenize(data: str) -> T.List[Token]:
-    return list(_tokenize(data))
+    return prefix, old_suffix, new_suffix
@@ -88,12 +88,26 @@ class GirType:
         return None
 
 
+class InternedType(GirType):
+    """A type that is interned: constructing it again with the same arguments
+    returns the same instance, so instances can be compared by identity and
+    used as keys in caches."""
+
+    _instances: T.ClassVar[T.Dict[tuple, "InternedType"]] = {}
+
+    def __new__(cls, *args):
+        key = (cls, *args)
+        if (instance := InternedType._instances.get(key)) is None:
+            instance = InternedType._instances[key] = super().__new__(cls)
+        return instance
+
+
 class ObjectType(GirType):
     def castable_to(self, other: GirType) -> bool:
         return self.assignable_to(other) or other.assignable_to(self)
 
 
-class ArrayType(GirType):
+class ArrayType(InternedType):
     def __init__(self, inner: GirType) -> None:
         self._inner = inner
 
@@ -113,7 +127,7 @@ class ArrayType(GirType):
         return self._inner.full_name + "[]"
 
 
-class GListType(GirType):
+class GListType(InternedType):
     """GList values don't have any blueprint syntax, but they can be passed between functions in expressions."""
 
     def __init__(self, inner: GirType) -> None:
@@ -135,7 +149,7 @@ class GListType(GirType):
         return "GList<" + self._inner.full_name + ">"
 
 
-class BasicType(GirType):
+class BasicType(InternedType):
     name: str = "unknown type"
 
     @property
@@ -149,7 +163,7 @@ class BasicType(GirType):
         return self.transformable_to(other)
 
 
-class VoidType(GirType):
+class VoidType(InternedType):
     name: str = "void"
     glib_type_name: str = "void"
 
@@ -17,8 +17,15 @@
 #
 # SPDX-License-Identifier: LGPL-3.0-or-later
 
+import hashlib
+import os
+import re
 import typing as T
+from array import array
+from bisect import bisect_right
 from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from pathlib import Path
 
 
 class Colors:
@@ -38,6 +45,69 @@ def terminal_link(text: str, url: str):
     return f"\033]8;;{url}\033\\{text}\033]8;;\033\\"
 
 
+def cache_dir() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "blueprint-compiler"
+
+
+def write_cache_file(path: Path, data: bytes, replaces: T.Optional[str] = None):
+    """Writes a file in the cache directory. Not being able to write the cache
+    is not fatal, so errors are ignored.
+
+    `replaces` is a glob pattern matching the older versions of the file. Once
+    the file is written, they are removed. The pattern should only match files
+    with this installation's `cache_owner()` in their name, so that
+    installations sharing the cache directory don't remove each other's
+    files."""
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, so a concurrent process never sees
+        # a partial file
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        return
+
+    if replaces is not None:
+        for stale in path.parent.glob(replaces):
+            if stale != path:
+                try:
+                    stale.unlink()
+                except OSError:
+                    pass
+
+
+def cache_owner(*extra: str) -> str:
+    """Returns a key that identifies this installation of the compiler, along
+    with `extra`. It stays the same when the compiler is upgraded in place,
+    but differs between, for example, a copy bundled as a meson subproject and
+    the one installed on the system."""
+
+    key = "\0".join([os.path.dirname(os.path.abspath(__file__)), *extra])
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def file_cache_key(path: str, *extra: str) -> T.Optional[str]:
+    """Returns a key for cached data derived from a file. The key changes
+    whenever the file, the compiler, or any of `extra` does. Returns None if
+    the file can't be read."""
+
+    from .main import VERSION
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    key = "\0".join(
+        [os.path.abspath(path), str(stat.st_size), str(stat.st_mtime_ns), VERSION]
+        + list(extra)
+    )
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
 def did_you_mean(word: str, options: T.List[str]) -> T.Optional[str]:
     if len(options) == 0:
         return None
@@ -77,22 +147,77 @@ def did_you_mean(word: str, options: T.List[str]) -> T.Optional[str]:
     return None
 
 
+# Line boundaries recognized by str.splitlines(), other than "\n" and "\r\n"
+_OTHER_LINE_BREAKS = re.compile("\r(?!\n)|[\v\f\x1c\x1d\x1e\x85\u2028\u2029]")
+
+
+class LineIndex:
+    """The offsets at which each line of a text starts, for converting between
+    offsets and (line, column) positions with a binary search rather than by
+    scanning the text. Use get_line_index() to get a cached instance."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.line_starts = array("i", [0])
+
+        i = text.find("\n")
+        while i != -1:
+            self.line_starts.append(i + 1)
+            i = text.find("\n", i + 1)
+
+    def idx_to_pos(self, idx: int) -> T.Tuple[int, int]:
+        if idx == 0 or len(self.text) == 0:
+            return (0, 0)
+        line_num = bisect_right(self.line_starts, idx) - 1
+        return (line_num, idx - self.line_starts[line_num])
+
+    def pos_to_idx(self, line: int, col: int) -> int:
+        line_starts = self._split_line_starts
+        if line >= len(line_starts):
+            return len(self.text) + col
+        return line_starts[line] + col
+
+    @cached_property
+    def _split_line_starts(self) -> array:
+        # pos_to_idx() counts every line boundary that str.splitlines() does,
+        # such as a lone "\r", while idx_to_pos() only counts "\n". Both
+        # agree unless the text contains one of the other boundaries.
+        if _OTHER_LINE_BREAKS.search(self.text) is None:
+            return self.line_starts
+
+        line_starts = array("i", [0])
+        for line in self.text.splitlines(keepends=True):
+            line_starts.append(line_starts[-1] + len(line))
+        return line_starts
+
+    def line_text(self, line: int) -> str:
+        """Returns the text of the given line, including its newline."""
+        if line >= len(self.line_starts):
+            return ""
+        start = self.line_starts[line]
+        if line + 1 < len(self.line_starts):
+            return self.text[start : self.line_starts[line + 1]]
+        else:
+            return self.text[start:]
+
+
+@lru_cache(maxsize=16)
+def get_line_index(text: str) -> LineIndex:
+    return LineIndex(text)
+
+
 def idx_to_pos(idx: int, text: str) -> T.Tuple[int, int]:
-    if idx == 0 or len(text) == 0:
-        return (0, 0)
-    line_num = text.count("\n", 0, idx) + 1
-    col_num = idx - text.rfind("\n", 0, idx) - 1
-    return (line_num - 1, col_num)
+    return get_line_index(text).idx_to_pos(idx)
 
 
 def pos_to_idx(line: int, col: int, text: str) -> int:
-    lines = text.splitlines(keepends=True)
-    return sum([len(line) for line in lines[:line]]) + col
+    return get_line_index(text).pos_to_idx(line, col)
 
 
 def idxs_to_range(start: int, end: int, text: str):
-    start_l, start_c = idx_to_pos(start, text)
-    end_l, end_c = idx_to_pos(end, text)
+    line_index = get_line_index(text)
+    start_l, start_c = line_index.idx_to_pos(start)
+    end_l, end_c = line_index.idx_to_pos(end)
     return {
         "start": {
             "line": start_l,
@@ -174,6 +299,10 @@ def unescape_quote(string: str) -> str:
 
 @dataclass
 class Range:
+    # A range is created for every token that ends up in the parse tree, so
+    # keep it small
+    __slots__ = ("start", "end", "original_text")
+
     start: int
     end: int
     original_text: str
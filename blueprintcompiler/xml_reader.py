@@ -18,41 +18,26 @@
 # SPDX-License-Identifier: LGPL-3.0-or-later
 
 
+import sys
 import typing as T
-from functools import cached_property
 from xml import sax
 
-# To speed up parsing, we ignore all tags except these
-PARSE_GIR = set(
-    [
-        "repository",
-        "namespace",
-        "class",
-        "interface",
-        "property",
-        "glib:signal",
-        "include",
-        "implements",
-        "type",
-        "parameter",
-        "parameters",
-        "enumeration",
-        "member",
-        "bitfield",
-    ]
-)
-
 
 class Element:
+    __slots__ = ("tag", "attrs", "children", "cdata_chunks")
+
     def __init__(self, tag: str, attrs: T.Dict[str, str]):
         self.tag = tag
         self.attrs = attrs
         self.children: T.List["Element"] = []
         self.cdata_chunks: T.List[str] = []
 
-    @cached_property
-    def cdata(self):
-        return "".join(self.cdata_chunks)
+    @property
+    def cdata(self) -> str:
+        # Join the chunks once, and keep the result as the only chunk
+        if len(self.cdata_chunks) != 1:
+            self.cdata_chunks = ["".join(self.cdata_chunks)]
+        return self.cdata_chunks[0]
 
     def get_elements(self, name: str) -> T.List["Element"]:
         return [child for child in self.children if child.tag == name]
@@ -64,10 +49,14 @@ class Element:
 class Handler(sax.handler.ContentHandler):
     def __init__(self):
         self.root = None
-        self.stack = []
+        self.stack: T.List[Element] = []
 
     def startElement(self, name, attrs):
-        element = Element(name, attrs.copy())
+        # Tag and attribute names repeat throughout a file, so share them
+        element = Element(
+            sys.intern(name),
+            {sys.intern(key): value for key, value in attrs.items()},
+        )
 
         if len(self.stack):
             last = self.stack[-1]
@@ -94,5 +83,5 @@ def parse(filename):
 
 def parse_string(xml):
     handler = Handler()
-    parser = sax.parseString(xml, handler)
+    sax.parseString(xml, handler)
     return handler.root
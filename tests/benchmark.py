@@ -0,0 +1,559 @@
+# benchmark.py
+#
+# Copyright 2026 agent <agent@local>
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This file is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+
+"""Performance benchmarks for blueprint-compiler.
+
+Run with `python3 tests/benchmark.py [name ...]`. With no arguments, every
+benchmark is run. These are not part of the unit test suite."""
+
+import argparse
+import os
+import sys
+import time
+import typing as T
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from blueprintcompiler import tokenizer, utils
+
+TESTS_DIR = Path(__file__).parent
+
+BENCHMARKS: T.Dict[str, T.Callable[[argparse.Namespace], None]] = {}
+
+
+def benchmark(name: str):
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+
+    return decorator
+
+
+def best_time(func: T.Callable[[], T.Any], repeat: int) -> float:
+    """Returns the fastest of `repeat` runs of func, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def read_samples(directory: str = "samples") -> T.List[str]:
+    return [
+        path.read_text()
+        for path in sorted((TESTS_DIR / directory).glob("*.blp"))
+        if path.stem != "unrecognized_syntax"
+    ]
+
+
+def report(name: str, value: float, unit: str):
+    print(f"  {name:<40} {value:>14,.1f} {unit}")
+
+
+@benchmark("tokenize")
+def bench_tokenize(opts):
+    """Tokenizes every file in tests/samples and reports tokens per second.
+    The samples are also concatenated into one large file to measure
+    throughput on big inputs."""
+
+    samples = read_samples()
+    big = "\n".join(samples) * 20
+
+    n_tokens = sum(len(tokenizer.tokenize(sample)) for sample in samples)
+    elapsed = best_time(
+        lambda: [tokenizer.tokenize(sample) for sample in samples], opts.repeat
+    )
+    report("samples", n_tokens / elapsed, "tokens/s")
+
+    n_tokens = len(tokenizer.tokenize(big))
+    elapsed = best_time(lambda: tokenizer.tokenize(big), opts.repeat)
+    report(f"samples x20 ({len(big) // 1024} KiB)", n_tokens / elapsed, "tokens/s")
+
+
+@benchmark("retokenize")
+def bench_retokenize(opts):
+    """Simulates typing one character in the middle of a ~10k line file and
+    compares re-tokenizing the whole file with retokenize()."""
+
+    samples = read_samples()
+    text = "\n".join(samples)
+    text = text * (10000 // text.count("\n") + 1)
+    tokens = tokenizer.tokenize(text)
+
+    idx = text.index("\n", len(text) // 2)
+    new_text = text[:idx] + "x" + text[idx:]
+
+    full = best_time(lambda: tokenizer.tokenize(new_text), opts.repeat)
+    incremental = best_time(
+        lambda: tokenizer.retokenize(tokens, new_text, idx, idx, idx + 1),
+        opts.repeat,
+    )
+    lines = text.count("\n")
+    report(f"tokenize ({lines} lines)", full * 1000, "ms")
+    report(f"retokenize ({lines} lines)", incremental * 1000, "ms")
+
+
+@benchmark("positions")
+def bench_positions(opts):
+    """Converts the range of every token in a ~10k line file to an LSP
+    position, as is done for diagnostics and semantic tokens."""
+
+    text = "\n".join(read_samples())
+    text = text * (10000 // text.count("\n") + 1)
+    ranges = [token.range for token in tokenizer.tokenize(text)][::10]
+
+    def run():
+        utils.get_line_index.cache_clear()
+        for range in ranges:
+            range.to_json()
+
+    elapsed = best_time(run, opts.repeat)
+    report(f"{len(ranges)} ranges", elapsed * 1000, "ms")
+
+
+def parse_tree(tokens: tokenizer.TokenStream, packrat: bool = False):
+    """Runs the grammar over a token stream, without building or validating
+    the AST (which needs the GIR typelibs)."""
+
+    from blueprintcompiler import parser
+
+    ctx = parser.ParseContext(tokens, tokens.string, memo={} if packrat else None)
+    parser.AnyOf(parser.UI).parse(ctx)
+
+
+@benchmark("parse")
+def bench_parse(opts):
+    """Parses every file in tests/samples and tests/sample_errors with the
+    grammar interpreter and with the generated parser, and reports tokens
+    per second."""
+
+    from blueprintcompiler import parser, parser_codegen
+
+    compiled = parser_codegen.compile_parser(parser.AnyOf(parser.UI))
+
+    for directory in ("samples", "sample_errors"):
+        tokens_list = [tokenizer.tokenize(sample) for sample in read_samples(directory)]
+        n_tokens = sum(len(tokens) for tokens in tokens_list)
+
+        elapsed = best_time(
+            lambda: [parse_tree(tokens) for tokens in tokens_list], opts.repeat
+        )
+        report(f"{directory} (interpreted)", n_tokens / elapsed, "tokens/s")
+
+        elapsed = best_time(
+            lambda: [
+                compiled(parser.ParseContext(tokens, tokens.string))
+                for tokens in tokens_list
+            ],
+            opts.repeat,
+        )
+        report(f"{directory} (generated)", n_tokens / elapsed, "tokens/s")
+
+
+@benchmark("reparse")
+def bench_reparse(opts):
+    """Simulates typing one character in the middle of a large file and
+    compares parsing the whole file again with reparsing it incrementally,
+    reusing the top-level blocks that the edit didn't touch."""
+
+    from blueprintcompiler import parser
+
+    samples = read_samples()
+    text = "\n".join(samples[:1] + [s.split("\n", 1)[1] for s in samples] * 20)
+    tokens = tokenizer.tokenize(text)
+    previous = parser.Reparse(tokens)
+    ctx = parser.IncrementalContext(tokens, text)
+    ctx.reparse = previous
+    parser.AnyOf(parser.UI).parse(ctx)
+
+    idx = text.index("\n", len(text) // 2)
+    new_tokens = tokenizer.tokenize(text[:idx] + "x" + text[idx:])
+
+    def reparse():
+        ctx = parser.IncrementalContext(new_tokens, new_tokens.string)
+        ctx.reparse = parser.Reparse(new_tokens, previous)
+        parser.AnyOf(parser.UI).parse(ctx)
+
+    lines = text.count("\n")
+    full = best_time(lambda: parse_tree(new_tokens), opts.repeat)
+    report(f"full parse ({lines} lines)", full * 1000, "ms")
+    incremental = best_time(reparse, opts.repeat)
+    report(f"incremental ({lines} lines)", incremental * 1000, "ms")
+
+
+@benchmark("validate")
+def bench_validate(opts):
+    """Builds and validates the AST of a file with 10,000 objects, then runs
+    the linter on it. This needs the GTK 4 typelibs."""
+
+    from blueprintcompiler import parser
+    from blueprintcompiler.linter import lint
+
+    text = (
+        "using Gtk 4.0;\n\nBox {\n"
+        + '  Label {\n    label: "Hello";\n    visible: true;\n  }\n' * 10000
+        + "}\n"
+    )
+    tokens = tokenizer.tokenize(text)
+
+    elapsed = best_time(lambda: parser.parse(tokens), opts.repeat)
+    report("parse and validate", elapsed * 1000, "ms")
+
+    ast, _errors, _warnings = parser.parse(tokens)
+    assert ast is not None
+    elapsed = best_time(lambda: lint(ast), opts.repeat)
+    report("lint", elapsed * 1000, "ms")
+
+
+@benchmark("lookup")
+def bench_lookup(opts):
+    """Finds the innermost AST node and the token at 1000 positions in files
+    of increasing size, as hover, go-to-definition and completion do. The
+    time per lookup should not grow with the size of the file."""
+
+    import random
+    from bisect import bisect_left
+
+    from blueprintcompiler import parser
+
+    samples = read_samples()
+    for copies in (1, 10, 100):
+        text = "\n".join(samples[:1] + [s.split("\n", 1)[1] for s in samples] * copies)
+        tokens = tokenizer.tokenize(text)
+        ctx = parser.ParseContext(tokens, text)
+        parser.AnyOf(parser.UI).parse(ctx)
+        assert ctx.last_group is not None
+        ast = ctx.last_group.to_ast()
+
+        rng = random.Random(0)
+        positions = [rng.randrange(len(text)) for _ in range(1000)]
+
+        def run():
+            for idx in positions:
+                bisect_left(tokens.starts, idx)
+                node = ast
+                while len(children := node.children_at(idx)):
+                    node = children[0]
+
+        elapsed = best_time(run, opts.repeat)
+        lines = text.count("\n")
+        report(f"{lines} lines", elapsed / len(positions) * 1e6, "us/lookup")
+
+
+def nested_objects(depth: int, errors: bool = False) -> str:
+    """Generates a blueprint with `depth` levels of nested objects. If
+    `errors` is true, each level also has two broken properties that the
+    parser has to recover from."""
+    properties = "  orientation: vertical;\n"
+    if errors:
+        properties += "  orientation vertical;\n  label: _(;\n"
+    return (
+        "using Gtk 4.0;\n"
+        + ("Box {\n" + properties + "  [start] Box {\n") * depth
+        + "}\n}\n" * depth
+    )
+
+
+@benchmark("packrat")
+def bench_packrat(opts):
+    """Parses the error samples and deeply nested files, with and without
+    packrat memoization. The nesting is limited by the recursion limit of the
+    recursive descent parser."""
+
+    inputs = {
+        "sample_errors": [tokenizer.tokenize(t) for t in read_samples("sample_errors")],
+        "nested, depth 10": [tokenizer.tokenize(nested_objects(10))],
+        "nested, depth 25": [tokenizer.tokenize(nested_objects(25))],
+        "nested with errors, depth 10": [
+            tokenizer.tokenize(nested_objects(10, errors=True))
+        ],
+        "nested with errors, depth 25": [
+            tokenizer.tokenize(nested_objects(25, errors=True))
+        ],
+    }
+
+    for name, tokens_list in inputs.items():
+        for packrat in (False, True):
+            elapsed = best_time(
+                lambda: [parse_tree(tokens, packrat) for tokens in tokens_list],
+                opts.repeat,
+            )
+            label = "packrat" if packrat else "no packrat"
+            report(f"{name} ({label})", elapsed * 1000, "ms")
+
+
+@benchmark("depth")
+def bench_depth(opts):
+    """Builds, validates and looks up context in synthetic trees that are
+    nested 100 to 5000 levels deep, and reports the time per node, which
+    should not grow with the depth. The trees are made of ParseGroups
+    directly, since the recursive descent parser can't nest that deeply."""
+
+    from blueprintcompiler.ast_utils import AstNode, context, validate
+    from blueprintcompiler.parse_tree import ParseGroup
+
+    class Depth(int):
+        pass
+
+    class Nested(AstNode):
+        @validate()
+        def has_root(self):
+            assert isinstance(self.root, Root)
+            assert self.context[Depth] == 0
+
+    class Root(Nested):
+        @context(Depth)
+        def depth(self) -> Depth:
+            return Depth(0)
+
+    for depth in (100, 1000, 5000):
+        groups = [ParseGroup(Root if i == 0 else Nested, i, "") for i in range(depth)]
+        for parent, child in zip(groups, groups[1:]):
+            parent.children.append(child)
+
+        def run():
+            root = groups[0].to_ast()
+            assert root.errors == []
+            leaf = root
+            while (child := leaf.children[0]) is not None:
+                leaf = child
+            assert leaf.context[Depth] == 0
+
+        elapsed = best_time(run, opts.repeat)
+        report(f"depth {depth}", elapsed / depth * 1e6, "us/node")
+
+
+@benchmark("memory")
+def bench_memory(opts):
+    """Measures the memory used by the parse tree and the AST of a large file
+    with tracemalloc, and reports it in bytes per token."""
+
+    import tracemalloc
+
+    from blueprintcompiler import parser
+
+    samples = read_samples()
+    text = "\n".join(samples[:1] + [s.split("\n", 1)[1] for s in samples] * 20)
+    tokens = tokenizer.tokenize(text)
+
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        ctx = parser.ParseContext(tokens, text)
+        parser.AnyOf(parser.UI).parse(ctx)
+        assert ctx.last_group is not None
+        parse_tree = tracemalloc.get_traced_memory()[0]
+        ast = ctx.last_group.to_ast()
+        full = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    report(
+        f"parse tree ({len(tokens)} tokens)",
+        (parse_tree - start) / len(tokens),
+        "bytes/token",
+    )
+    report(
+        f"AST ({len(tokens)} tokens)", (full - parse_tree) / len(tokens), "bytes/token"
+    )
+
+
+def find_gir(filename: str) -> T.Optional[Path]:
+    search_paths = [
+        *os.environ.get("GI_GIR_PATH", "").split(os.pathsep),
+        *[
+            os.path.join(path, "gir-1.0")
+            for path in os.environ.get("XDG_DATA_DIRS", "").split(os.pathsep)
+        ],
+        "/usr/share/gir-1.0",
+        "/usr/local/share/gir-1.0",
+    ]
+    for search_path in search_paths:
+        if search_path and (path := Path(search_path) / filename).is_file():
+            return path
+    return None
+
+
+@benchmark("gir")
+def bench_gir(opts):
+    """Builds the documentation index the language server uses for
+    Gtk-4.0.gir, and looks up the docs of every symbol in it."""
+
+    import tracemalloc
+
+    from blueprintcompiler import gir_docs
+
+    if (path := find_gir("Gtk-4.0.gir")) is None:
+        print("  Gtk-4.0.gir not found, skipping")
+        return
+
+    def traced(func):
+        tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            result = func()
+            return result, tracemalloc.get_traced_memory()[0] - start
+        finally:
+            tracemalloc.stop()
+
+    data = path.read_bytes()
+    elapsed = best_time(lambda: gir_docs.build_index(data), opts.repeat)
+    index, size = traced(lambda: gir_docs.build_index(data))
+    report("build doc index", elapsed * 1000, "ms")
+    report("memory, doc index", size / 1024 / 1024, "MiB")
+
+    docs = gir_docs.DocIndex(str(path), index)
+    elapsed = best_time(lambda: [docs.get_doc(symbol) for symbol in index], 1)
+    report(f"look up docs ({len(index)} symbols)", elapsed / len(index) * 1e6, "us")
+
+
+@benchmark("members")
+def bench_members(opts):
+    """Builds the property and signal tables of every class in Gtk-4.0 and
+    Adw-1, and reports the memory they use, compared to copying every
+    inherited member into a flat dict per class."""
+
+    import tracemalloc
+
+    from blueprintcompiler import gir
+    from blueprintcompiler.errors import CompileError
+
+    try:
+        classes = [
+            klass
+            for ns, version in [("Gtk", "4.0"), ("Adw", "1")]
+            for klass in gir.get_namespace(ns, version).classes.values()
+        ]
+    except CompileError as e:
+        print(f"  {e.message}, skipping")
+        return
+
+    # Load everything the tables refer to first, so only the tables are
+    # measured
+    for klass in classes:
+        klass.own_properties, klass.own_signals, klass.parent
+        for impl in klass.implements:
+            impl.properties, impl.signals
+
+    def traced(func):
+        tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            result = func()
+            return result, tracemalloc.get_traced_memory()[0] - start
+        finally:
+            tracemalloc.stop()
+
+    tables, size = traced(lambda: [(k.properties, k.signals) for k in classes])
+    report(f"member tables ({len(classes)} classes)", size / 1024, "KiB")
+
+    _, size = traced(lambda: [(dict(p), dict(s)) for p, s in tables])
+    report(f"flat dicts ({len(classes)} classes)", size / 1024, "KiB")
+
+
+@benchmark("assignable")
+def bench_assignable(opts):
+    """Checks whether every class in Gtk-4.0 and Adw-1 is assignable to every
+    interface and to a few common base classes, as validating a large
+    template does, and reports the time per check: first with the supertype
+    sets still to be built, then with them cached."""
+
+    from blueprintcompiler import gir
+    from blueprintcompiler.errors import CompileError
+
+    try:
+        namespaces = [gir.get_namespace("Gtk", "4.0"), gir.get_namespace("Adw", "1")]
+    except CompileError as e:
+        print(f"  {e.message}, skipping")
+        return
+
+    entries = [entry for ns in namespaces for entry in ns.entries.values()]
+    classes = [entry for entry in entries if isinstance(entry, gir.Class)]
+    targets = [entry for entry in entries if isinstance(entry, gir.Interface)]
+    targets += [
+        namespaces[0].lookup_type(name)
+        for name in ["GObject.Object", "Gtk.Widget", "Gtk.Window", "Gtk.Box"]
+    ]
+    checks = len(classes) * len(targets)
+
+    def run():
+        for klass in classes:
+            for target in targets:
+                klass.assignable_to(target)
+
+    start = time.perf_counter()
+    run()
+    report("first pass", (time.perf_counter() - start) / checks * 1e6, "us/check")
+    report("cached", best_time(run, opts.repeat) / checks * 1e6, "us/check")
+
+
+@benchmark("namespaces")
+def bench_namespaces(opts):
+    """Loads Adw-1 and all of its dependencies, first with an empty cache
+    directory and then with the cache written by the first run, and reports
+    how long each namespace took to load."""
+
+    import tempfile
+    from unittest import mock
+
+    from blueprintcompiler import gir
+    from blueprintcompiler.errors import CompileError
+
+    def load():
+        gir._namespace_cache.clear()
+        gir.load_times.clear()
+        adw = gir.get_namespace("Adw", "1")
+        for ns, version in adw.records.dependencies.items():
+            gir.get_namespace(ns, version)
+
+        for ns, (source, elapsed) in sorted(gir.load_times.items()):
+            report(f"{ns} ({source})", elapsed * 1000, "ms")
+        report("total", sum(t for _, t in gir.load_times.values()) * 1000, "ms")
+
+    with tempfile.TemporaryDirectory() as cache_home:
+        with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": cache_home}):
+            try:
+                load()
+            except CompileError as e:
+                print(f"  {e.message}, skipping")
+                return
+            load()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("names", nargs="*", metavar="name")
+    parser.add_argument("--repeat", type=int, default=5)
+    opts = parser.parse_args()
+
+    for name in opts.names:
+        if name not in BENCHMARKS:
+            parser.error(
+                f"unknown benchmark '{name}' (choose from {', '.join(BENCHMARKS)})"
+            )
+
+    for name in opts.names or BENCHMARKS:
+        print(f"{name}:")
+        BENCHMARKS[name](opts)
+
+
+if __name__ == "__main__":
+    main()
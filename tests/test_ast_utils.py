@@ -0,0 +1,186 @@
+# test_ast_utils.py
+#
+# Copyright 2026 agent <agent@local>
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This file is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+
+
+import unittest
+
+from blueprintcompiler.ast_utils import AstNode, ValidatorProfile, context, validate
+from blueprintcompiler.errors import CompileError, MultipleErrors
+from blueprintcompiler.language import UI
+from blueprintcompiler.parse_tree import AnyOf, ParseContext, ParseGroup
+from blueprintcompiler.tokenizer import tokenize
+
+
+class Base(AstNode):
+    pass
+
+
+class Derived(Base):
+    pass
+
+
+class Other(AstNode):
+    pass
+
+
+class Unused(AstNode):
+    pass
+
+
+class Name(str):
+    pass
+
+
+class Number(int):
+    pass
+
+
+class NameProvider(AstNode):
+    @context(Name)
+    def name(self) -> Name:
+        return Name(self.tokens["name"])
+
+
+class NumberProvider(AstNode):
+    @context(Number)
+    def number(self) -> Number:
+        return Number(len(self.children._children))
+
+
+class Checked(AstNode):
+    @validate()
+    def check_name(self):
+        if self.tokens["name"] == "bad":
+            raise CompileError("bad name")
+        elif self.tokens["name"] == "worse":
+            raise MultipleErrors([CompileError("worse"), CompileError("name")])
+
+    @validate()
+    def check_nothing(self):
+        pass
+
+
+class TestAstUtils(unittest.TestCase):
+    def test_children_by_type(self):
+        a, b, c = Derived(None, [], {}), Other(None, [], {}), Base(None, [], {})
+        node = AstNode(None, [a, b, c], {})
+
+        self.assertEqual(node.children.first(Base), a)
+        self.assertEqual(node.children[Base], [a, c])
+        self.assertEqual(node.children[Derived], [a])
+        self.assertEqual(node.children[Other], [b])
+        self.assertIs(node.children[Base], node.children[Base])
+        self.assertEqual(node.children.first(Other), b)
+        self.assertIsNone(node.children.first(Unused))
+        self.assertEqual(node.children[Unused], [])
+        self.assertEqual(node.children[1], b)
+        self.assertIsNone(node.children[3])
+
+    def test_context(self):
+        leaf = AstNode(None, [], {})
+        inner = NameProvider(None, [AstNode(None, [leaf], {})], {"name": "inner"})
+        numbers = NumberProvider(None, [inner, Other(None, [], {})], {})
+        root = NameProvider(None, [numbers], {"name": "outer"})
+
+        # The nearest provider wins
+        self.assertEqual(leaf.context[Name], "inner")
+        self.assertEqual(leaf.context[Number], 2)
+        self.assertEqual(inner.context[Name], "inner")
+        self.assertEqual(numbers.context[Name], "outer")
+        self.assertEqual(root.context[Name], "outer")
+        self.assertIsNone(root.context[Number])
+        self.assertIsNone(leaf.context[int])
+
+        # Nodes that don't provide a context share their parent's table
+        self.assertIs(leaf._context_providers, leaf.parent._context_providers)
+        self.assertIsNot(inner._context_providers, numbers._context_providers)
+
+    def test_children_at(self):
+        def node(start, end, children=[]):
+            group = ParseGroup(AstNode, start, "")
+            group.end = end
+            return AstNode(group, children, {})
+
+        # The second child is empty, so its end is before its start
+        a, b, c, d = node(0, 3), node(4, 3), node(4, 6), node(6, 9)
+        parent = node(0, 9, [a, b, c, d])
+
+        self.assertEqual(parent.children_at(0), [a])
+        self.assertEqual(parent.children_at(3), [a])
+        self.assertEqual(parent.children_at(4), [c])
+        self.assertEqual(parent.children_at(6), [c, d])
+        self.assertEqual(parent.children_at(9), [d])
+        self.assertEqual(parent.children_at(10), [])
+        self.assertIsNotNone(parent._child_starts)
+
+    def test_validator_profile(self):
+        def node(name, children=[]):
+            group = ParseGroup(Checked, 0, "")
+            group.end = 0
+            return Checked(group, children, {"name": name})
+
+        root = node("ok", [node("bad"), node("worse"), node("ok")])
+
+        with ValidatorProfile() as profile:
+            self.assertEqual(len(root.errors), 3)
+        self.assertIsNone(ValidatorProfile.active)
+
+        # Validators that run outside the block are not recorded
+        self.assertEqual(root.warnings, [])
+
+        stats = dict(profile.results())
+        self.assertEqual(
+            set(stats),
+            {
+                "test_ast_utils.Checked.check_name",
+                "test_ast_utils.Checked.check_nothing",
+            },
+        )
+        self.assertEqual(stats["test_ast_utils.Checked.check_name"].calls, 4)
+        self.assertEqual(stats["test_ast_utils.Checked.check_name"].errors, 3)
+        self.assertEqual(stats["test_ast_utils.Checked.check_nothing"].calls, 4)
+        self.assertEqual(stats["test_ast_utils.Checked.check_nothing"].errors, 0)
+
+        self.assertEqual(
+            [result["validator"] for result in profile.to_json()],
+            [name for name, _ in profile.results()],
+        )
+        self.assertEqual(len(profile.format_table().splitlines()), 3)
+
+    def test_children_at_overlapping(self):
+        # In malformed documents, siblings can overlap. Here the broken
+        # `using` statement extends over the objects after it.
+        text = "u[ing Gtk 4.0;\n\nBox {}\nLabel {\n  label: 'a';\n}\n"
+        tokens = tokenize(text)
+        ctx = ParseContext(tokens, text)
+        AnyOf(UI).parse(ctx)
+        assert ctx.last_group is not None
+        root = ctx.last_group.to_ast()
+
+        directive, box, label = root.children
+        self.assertGreater(directive.range.end, label.range.start)
+        self.assertIsNone(root._child_starts)
+        self.assertEqual(root.children_at(18), [directive, box])
+        self.assertEqual(root.children_at(30), [directive, label])
+
+        for idx in range(len(text) + 1):
+            self.assertEqual(
+                root.children_at(idx),
+                [child for child in root.children if idx in child.range],
+            )
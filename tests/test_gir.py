@@ -0,0 +1,122 @@
+# test_gir.py
+#
+# Copyright 2026 agent <agent@local>
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This file is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+
+
+import unittest
+
+from blueprintcompiler.errors import CompileError
+from blueprintcompiler.gir import MemberTable, Repository
+
+
+class Records:
+    """A namespace with a small class hierarchy:
+
+    Object <- Widget (implements Buildable) <- Button (implements Actionable)
+    Actionable requires Widget, Buildable requires Object"""
+
+    name = "Test"
+    version = "1.0"
+    dependencies = {"Test": "1.0"}
+    kinds = {
+        "Object": "class",
+        "Widget": "class",
+        "Button": "class",
+        "Buildable": "interface",
+        "Actionable": "interface",
+    }
+
+    def __getitem__(self, name):
+        if self.kinds[name] == "interface":
+            prerequisite = "Widget" if name == "Actionable" else "Object"
+            return {
+                "deprecated": False,
+                "type_name": f"Test{name}",
+                "prerequisites": [("Test", prerequisite)],
+                "properties": [],
+                "signals": [],
+            }
+
+        parent, implements = {
+            "Object": (None, []),
+            "Widget": ("Object", ["Buildable"]),
+            "Button": ("Widget", ["Actionable"]),
+        }[name]
+        return {
+            "deprecated": False,
+            "type_name": f"Test{name}",
+            "abstract": False,
+            "parent": ("Test", parent) if parent else None,
+            "implements": [("Test", iface) for iface in implements],
+            "properties": [],
+            "signals": [],
+        }
+
+
+class TestGir(unittest.TestCase):
+    def test_assignable_to(self):
+        ns = Repository(Records()).lookup_namespace("Test")
+        types = {name: ns.get_type(name) for name in Records.kinds}
+
+        assignable = {
+            "Object": ["Object"],
+            "Widget": ["Object", "Widget", "Buildable"],
+            "Button": ["Object", "Widget", "Button", "Buildable", "Actionable"],
+            "Buildable": ["Object", "Buildable"],
+            "Actionable": ["Object", "Widget", "Buildable", "Actionable"],
+        }
+        for name, type in types.items():
+            self.assertEqual(
+                [other for other in types if type.assignable_to(types[other])],
+                [other for other in types if other in assignable[name]],
+                name,
+            )
+
+    def test_lookup_namespace(self):
+        repo = Repository(Records())
+        self.assertIs(repo.lookup_namespace("Test"), repo.lookup_namespace("Test"))
+        with self.assertRaises(CompileError):
+            repo.lookup_namespace("Missing")
+
+    def test_member_table(self):
+        iface = {"a": "iface a", "i": "iface i"}
+        grandparent = MemberTable({"a": "grandparent a", "g": "g"}, [iface])
+        parent = MemberTable({"p": "p"}, [grandparent, iface])
+        child = MemberTable({"a": "child a", "c": "c"}, [parent, iface])
+
+        # Own members win over inherited ones, and the parent's over the
+        # interfaces'
+        self.assertEqual(child["a"], "child a")
+        self.assertEqual(parent["a"], "grandparent a")
+        self.assertEqual(child.get("i"), "iface i")
+        self.assertIsNone(child.get("x"))
+        with self.assertRaises(KeyError):
+            child["x"]
+
+        self.assertEqual(list(child), ["a", "c", "p", "g", "i"])
+        self.assertEqual(len(child), 5)
+        self.assertIn("g", child)
+        self.assertNotIn("x", child)
+        self.assertEqual(
+            dict(child),
+            {"a": "child a", "c": "c", "p": "p", "g": "g", "i": "iface i"},
+        )
+
+        # Layers are shared, not copied, and each appears once
+        self.assertEqual(len(child._layers), 4)
+        self.assertIs(child._layers[-1], iface)
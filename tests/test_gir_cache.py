@@ -0,0 +1,125 @@
+# test_gir_cache.py
+#
+# Copyright 2026 agent <agent@local>
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This file is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from blueprintcompiler import gir_cache
+
+
+class Records:
+    name = "Test"
+    version = "1.0"
+    dependencies = {"Test": "1.0", "GObject": "2.0"}
+    kinds = {"Widget": "class", "Align": "enum", "callback": None}
+
+    def __init__(self):
+        self.requested = []
+
+    def __getitem__(self, name):
+        self.requested.append(name)
+        if name == "Widget":
+            return {
+                "deprecated": False,
+                "type_name": "TestWidget",
+                "abstract": True,
+                "parent": ("GObject", "Object"),
+                "implements": [],
+                "properties": [("label", ("string",), True, False, False)],
+                "signals": [("clicked", False, [], ("void",))],
+            }
+        else:
+            return {
+                "deprecated": True,
+                "type_name": "TestAlign",
+                "members": [("start", 0, "TEST_ALIGN_START", False)],
+            }
+
+
+class TestGirCache(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+
+        patch = mock.patch.dict(os.environ, {"XDG_CACHE_HOME": str(self.tmp)})
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_roundtrip(self):
+        records = Records()
+        path = self.tmp / "Test-1.0.cache"
+        gir_cache.write(path, records)
+        # Entries the compiler doesn't use are not read
+        self.assertEqual(records.requested, ["Widget", "Align"])
+
+        cached = gir_cache.load(path)
+        assert cached is not None
+        self.assertEqual(cached.name, "Test")
+        self.assertEqual(cached.version, "1.0")
+        self.assertEqual(cached.dependencies, records.dependencies)
+        self.assertEqual(cached.kinds, records.kinds)
+        self.assertEqual(cached["Widget"], records["Widget"])
+        self.assertEqual(cached["Align"], records["Align"])
+
+    def test_invalid(self):
+        path = self.tmp / "Test-1.0.cache"
+        self.assertIsNone(gir_cache.load(path))
+
+        gir_cache.write(path, Records())
+        data = path.read_bytes()
+
+        for invalid in [b"", b"garbage", data[:-1], data + b"\0", b"x" + data[1:]]:
+            path.write_bytes(invalid)
+            self.assertIsNone(gir_cache.load(path))
+
+    def test_cache_path(self):
+        typelib = self.tmp / "Test-1.0.typelib"
+        self.assertIsNone(gir_cache.cache_path("Test", "1.0", str(typelib)))
+
+        typelib.write_bytes(b"typelib")
+        path = gir_cache.cache_path("Test", "1.0", str(typelib))
+        assert path is not None
+        self.assertTrue(path.is_relative_to(self.tmp))
+        self.assertEqual(path, gir_cache.cache_path("Test", "1.0", str(typelib)))
+
+        # A changed typelib gets a new cache file
+        os.utime(typelib, ns=(0, 0))
+        new_path = gir_cache.cache_path("Test", "1.0", str(typelib))
+        assert new_path is not None
+        self.assertNotEqual(path, new_path)
+
+        # Writing it removes the old one, but not the cache of another typelib
+        # with the same name
+        other_typelib = self.tmp / "other" / "Test-1.0.typelib"
+        other_typelib.parent.mkdir()
+        other_typelib.write_bytes(b"typelib")
+        other_path = gir_cache.cache_path("Test", "1.0", str(other_typelib))
+        assert other_path is not None
+
+        for file in [path, other_path]:
+            gir_cache.write(file, Records())
+        gir_cache.write(new_path, Records())
+        self.assertEqual(
+            sorted(new_path.parent.iterdir()), sorted([new_path, other_path])
+        )
@@ -0,0 +1,121 @@
+# test_gir_docs.py
+#
+# Copyright 2026 agent <agent@local>
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This file is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from blueprintcompiler import gir_docs
+
+GIR = """<?xml version="1.0"?>
+<repository xmlns:glib="http://www.gtk.org/introspection/glib/1.0">
+  <namespace name="Gtk" version="4.0">
+    <doc>The GTK toolkit.</doc>
+    <class name="Button" version="4.2">
+      <doc xml:space="preserve">A button, like &lt;button&gt; in HTML.
+Shows a label. Café.</doc>
+      <method name="clicked"><doc>Emits clicked.</doc></method>
+      <property name="label">
+        <doc-deprecated>Use a child &amp; a label.</doc-deprecated>
+        <doc>The label.</doc>
+      </property>
+      <glib:signal name="label"><doc>Not the property.</doc></glib:signal>
+    </class>
+    <enumeration name="Align">
+      <member name="start"><doc/></member>
+      <member name="end"/>
+    </enumeration>
+    <record name="ButtonClass"><doc>Not indexed.</doc></record>
+  </namespace>
+</repository>
+"""
+
+
+class TestGirDocs(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+
+        patch = mock.patch.dict(os.environ, {"XDG_CACHE_HOME": str(self.tmp)})
+        patch.start()
+        self.addCleanup(patch.stop)
+
+        self.path = self.tmp / "Gtk-4.0.gir"
+        self.path.write_text(GIR)
+
+    def test_lookup(self):
+        docs = gir_docs.load(str(self.path))
+
+        self.assertEqual(docs.get_doc("Gtk"), "The GTK toolkit.")
+        self.assertEqual(
+            docs.get_doc("Gtk.Button"),
+            "A button, like <button> in HTML.\nShows a label. Café.",
+        )
+        self.assertEqual(docs.get_version("Gtk.Button"), "4.2")
+        self.assertEqual(docs.get_doc("Gtk.Button:label"), "The label.")
+        self.assertEqual(
+            docs.get_doc("Gtk.Button:label", "doc-deprecated"),
+            "Use a child & a label.",
+        )
+        self.assertIsNone(docs.get_doc("Gtk.Button", "doc-deprecated"))
+        self.assertEqual(docs.get_doc("Gtk.Button::label"), "Not the property.")
+        self.assertEqual(docs.get_doc("Gtk.Align.start"), "")
+        self.assertIsNone(docs.get_doc("Gtk.Align.end"))
+        self.assertIsNone(docs.get_version("Gtk.Align.end"))
+
+        for symbol in ["Gtk.Button.clicked", "Gtk.ButtonClass", "Gtk.Label"]:
+            self.assertNotIn(symbol, docs)
+            with self.assertRaises(KeyError):
+                docs.get_doc(symbol)
+
+    def test_cache(self):
+        gir_docs.load(str(self.path))
+        [index_path] = (self.tmp / "blueprint-compiler" / "gir-docs").iterdir()
+
+        # The saved index is used if it's there...
+        with mock.patch.object(gir_docs, "build_index") as build_index:
+            docs = gir_docs.load(str(self.path))
+            build_index.assert_not_called()
+        self.assertEqual(docs.get_doc("Gtk"), "The GTK toolkit.")
+
+        # ...and rebuilt if it's unreadable
+        index_path.write_bytes(b"garbage")
+        self.assertEqual(
+            gir_docs.load(str(self.path)).get_doc("Gtk"), "The GTK toolkit."
+        )
+
+        # Another file with the same name gets an index of its own
+        other_path = self.tmp / "other" / self.path.name
+        other_path.parent.mkdir()
+        other_path.write_text(GIR)
+        gir_docs.load(str(other_path))
+        [other_index_path] = set(index_path.parent.iterdir()) - {index_path}
+
+        # A changed file gets a new index, which replaces the old one
+        self.path.write_text(GIR.replace("GTK", "Gtk"))
+        self.assertEqual(
+            gir_docs.load(str(self.path)).get_doc("Gtk"), "The Gtk toolkit."
+        )
+        self.assertFalse(index_path.exists())
+        self.assertTrue(other_index_path.exists())
+        self.assertEqual(len(list(index_path.parent.iterdir())), 2)
@@ -0,0 +1,236 @@
+# test_parse_tree.py
+#
+# Copyright 2026 agent <agent@local>
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This file is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+
+
+import tracemalloc
+import unittest
+
+from blueprintcompiler.ast_utils import AstNode, context, validate
+from blueprintcompiler.errors import CompileError
+from blueprintcompiler.parse_tree import *
+from blueprintcompiler.tokenizer import TokenType, tokenize
+
+
+class TestParseTree(unittest.TestCase):
+    def parse(self, node: ParseNode, text: str):
+        ctx = ParseContext(tokenize(text), text)
+        result = node.parse(ctx)
+        return result, ctx
+
+    def test_first_set(self):
+        self.assertEqual(first_set(Match("a")), FirstSet(texts=frozenset(["a"])))
+        self.assertEqual(
+            first_set(Sequence(Optional("a"), UseIdent("b"), "c")),
+            FirstSet(frozenset(["a"]), frozenset([TokenType.IDENT.value])),
+        )
+        self.assertEqual(
+            first_set(AnyOf("a", ZeroOrMore(UseNumber("b")))),
+            FirstSet(frozenset(["a"]), frozenset([TokenType.NUMBER.value]), True),
+        )
+
+        # Nodes that can raise an error on any token must always be tried
+        self.assertIsNone(first_set(Match("a").expected("a")))
+        self.assertIsNone(first_set(Sequence(Optional("a"), Until("b", "c"))))
+        self.assertIsNone(first_set(Statement(Optional("a"))))
+
+    def test_any_of_order(self):
+        # Both alternatives can start with "a"; the first one must win
+        node = AnyOf(
+            [UseIdent("first"), "b"],
+            [Keyword("a"), UseLiteral("second", True)],
+            [UseIdent("third")],
+        )
+
+        result, ctx = self.parse(node, "a b")
+        self.assertEqual(result, ParseResult.SUCCESS)
+        self.assertEqual(list(ctx.group_keys), ["first"])
+
+        result, ctx = self.parse(node, "a c")
+        self.assertEqual(result, ParseResult.SUCCESS)
+        self.assertEqual(list(ctx.group_keys), ["a", "second"])
+
+        result, ctx = self.parse(node, "x")
+        self.assertEqual(list(ctx.group_keys), ["third"])
+
+        result, ctx = self.parse(node, "1")
+        self.assertEqual(result, ParseResult.FAILURE)
+
+    def test_any_of_unknown_first_set(self):
+        node = AnyOf("a", Match("b").expected("b"))
+
+        result, ctx = self.parse(node, "  a")
+        self.assertEqual(result, ParseResult.SUCCESS)
+
+        with self.assertRaises(CompileError):
+            self.parse(node, "c")
+
+    def test_any_of_children_changed(self):
+        node = AnyOf("a")
+        self.assertEqual(self.parse(node, "b")[0], ParseResult.FAILURE)
+
+        node.children = ["a", "b"]
+        self.assertEqual(self.parse(node, "b")[0], ParseResult.SUCCESS)
+
+    def test_reparse(self):
+        class File:
+            pass
+
+        class Block:
+            pass
+
+        block = Group(
+            Block,
+            [
+                UseIdent("name"),
+                Match("{").expected("{"),
+                Until(Group(Block, [UseIdent("name"), ";"]), "}"),
+            ],
+        )
+        node = Group(File, Until(block, Eof(), reusable=True))
+
+        def dump(ctx):
+            def dump_group(group):
+                return (
+                    group.start,
+                    group.end,
+                    group.keys,
+                    {key: (r.start, r.end) for key, r in group.ranges.items()},
+                    [dump_group(child) for child in group.children],
+                )
+
+            return (
+                dump_group(ctx.last_group),
+                [(e.message, e.range.start, e.range.end) for e in ctx.errors],
+            )
+
+        previous = None
+
+        def reparse(text):
+            nonlocal previous
+            tokens = tokenize(text)
+            reparse = Reparse(tokens, previous)
+            ctx = IncrementalContext(tokens, text)
+            ctx.reparse = reparse
+            node.parse(ctx)
+            self.assertEqual(dump(ctx), dump(self.parse(node, text)[1]))
+            previous = reparse
+            return reparse.reused
+
+        self.assertEqual(reparse("a { x; } b { y; } c { z; }"), 0)
+        # Only the edited block is parsed again
+        self.assertEqual(reparse("a { x; } b { yy; } c { z; }"), 2)
+        self.assertEqual(reparse("a { x; } b { yy; w; } c { z; }"), 2)
+        # A block looks at the token after it, so "a" is parsed again too
+        self.assertEqual(reparse("a { x; } ; b { yy; w; } c { z; }"), 2)
+        # Unexpected tokens are merged into one error, which is replayed
+        self.assertEqual(reparse("a { x; } ; ; b { yy; w; } c { z; }"), 3)
+        self.assertEqual(reparse("a { x; } ; ; b { yy; w; } ; c { z; }"), 4)
+        # Deleting a brace merges "b" and "c", so the old "c" can't be reused
+        # once it is restored
+        self.assertEqual(reparse("a { x; } ; ; b { yy; w; ; c { z; }"), 3)
+        self.assertEqual(reparse("a { x; } b { yy; w; } c { z; }"), 0)
+
+    def test_reparse_any_of_peek(self):
+        # AnyOf looks at the next token to choose which children to try, so
+        # that token counts as examined even if no child consumes it
+        node = AnyOf(Keyword("a"), Keyword("b"))
+        tokens = tokenize("  c")
+        ctx = IncrementalContext(tokens, tokens.string)
+        ctx.reparse = Reparse(tokens)
+
+        self.assertFalse(node.parse(ctx).matched())
+        self.assertEqual(ctx.index, 0)
+        self.assertEqual(ctx.reparse.furthest, 1)
+
+    def test_deep_tree(self):
+        class Name(str):
+            pass
+
+        class Node(AstNode):
+            @validate()
+            def check(self):
+                if self.tokens["fatal"]:
+                    raise CompileError(self.tokens["name"], fatal=True)
+                elif self.tokens["name"]:
+                    raise CompileError(self.tokens["name"])
+
+        class Root(Node):
+            @context(Name)
+            def name(self) -> Name:
+                return Name("root")
+
+        def group(ast_type, **keys):
+            group = ParseGroup(ast_type, 0, "")
+            group.keys = keys
+            return group
+
+        # Deep enough to hit the recursion limit if the tree was walked
+        # recursively
+        groups = [group(Root)] + [group(Node) for _ in range(5000)]
+        for parent, child in zip(groups, groups[1:]):
+            parent.children.append(child)
+
+        # Errors are reported in document order, and a fatal error stops the
+        # validation of the node's children
+        groups[1].children += [
+            group(Node, name="a", fatal=True),
+            group(Node, name="b"),
+        ]
+        groups[1].children[-2].children.append(group(Node, name="skipped"))
+        groups[1].children[-1].children.append(group(Node, name="c"))
+        groups[-1].children.append(group(Node, name="d"))
+
+        root = groups[0].to_ast()
+        self.assertEqual([e.message for e in root.errors], ["d", "a", "b", "c"])
+
+        leaf = root
+        while (child := leaf.children[0]) is not None:
+            leaf = child
+        self.assertIs(leaf.root, root)
+        self.assertEqual(leaf.context[Name], "root")
+        self.assertIs(leaf.parent_by_type(Root), root)
+
+    def test_memory(self):
+        def traced(func):
+            tracemalloc.start()
+            try:
+                start = tracemalloc.get_traced_memory()[0]
+                result = func()
+                return result, tracemalloc.get_traced_memory()[0] - start
+            finally:
+                tracemalloc.stop()
+
+        # The absolute sizes depend on the Python version, so compare with
+        # the same class without __slots__ (the "memory" benchmark in
+        # benchmark.py reports the sizes)
+        UnslottedGroup = type("UnslottedGroup", (), {"__init__": ParseGroup.__init__})
+        groups, size = traced(lambda: [ParseGroup(AstNode, 0, "") for _ in range(1000)])
+        _, unslotted_size = traced(
+            lambda: [UnslottedGroup(AstNode, 0, "") for _ in range(1000)]
+        )
+        self.assertLess(size, unslotted_size * 0.9)
+        self.assertFalse(hasattr(groups[0], "__dict__"))
+
+        # Groups without keys or ranges share empty dicts
+        self.assertIs(groups[0].keys, groups[1].keys)
+        self.assertIs(groups[0].ranges, groups[1].ranges)
+
+        tokens = tokenize("using Gtk 4.0;")
+        self.assertFalse(hasattr(tokens[0], "__dict__"))
+        self.assertFalse(hasattr(tokens[0].range, "__dict__"))
@@ -0,0 +1,192 @@
+# test_parser_codegen.py
+#
+# Copyright 2026 agent <agent@local>
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This file is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+
+
+import os
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from blueprintcompiler import gir, parser, parser_codegen, utils
+from blueprintcompiler.errors import CompileError
+from blueprintcompiler.language import UI
+from blueprintcompiler.parse_tree import AnyOf, ParseContext, ParseGroup
+from blueprintcompiler.tokenizer import tokenize
+
+# Tokens that are spliced into the corpus to produce broken inputs, as the
+# fuzzer would
+MUTATIONS = [
+    *"{}();[]:.|$<>,",
+    "=>",
+    '"x"',
+    "1",
+    "foo",
+    "Gtk.Box",
+    "template",
+    "menu",
+    "item",
+    "bind",
+    "expr",
+    "as",
+    "using",
+    " ",
+    "/* c */",
+    "// x\n",
+]
+
+
+def serialize_group(group: ParseGroup):
+    return (
+        group.ast_type.__name__,
+        group.start,
+        group.end,
+        group.incomplete,
+        [(key, repr(value)) for key, value in group.keys.items()],
+        [
+            (key, (token.start, token.end) if token else None)
+            for key, token in group.tokens.items()
+        ],
+        [(key, (range.start, range.end)) for key, range in group.ranges.items()],
+        [serialize_group(child) for child in group.children],
+    )
+
+
+def serialize_errors(errors):
+    return [(type(e).__name__, e.message, e.range.start, e.range.end) for e in errors]
+
+
+class TestParserCodegen(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.compiled = staticmethod(parser_codegen.compile_parser(AnyOf(UI)))
+
+        tests_dir = Path(__file__).parent
+        cls.corpus = [
+            path.read_text()
+            for directory in ("samples", "sample_errors")
+            for path in sorted((tests_dir / directory).glob("*.blp"))
+            if path.stem != "unrecognized_syntax"
+        ]
+
+    def run_parser(self, parse, text: str, packrat: bool = False):
+        tokens = tokenize(text)
+        ctx = ParseContext(tokens, text, memo={} if packrat else None)
+        try:
+            result = parse(ctx)
+        except CompileError as e:
+            return ("exception", serialize_errors([e]), serialize_errors(ctx.errors))
+
+        tree = serialize_group(ctx.last_group) if ctx.last_group else None
+        return (result, tree, serialize_errors(ctx.errors))
+
+    def assert_same_parse(self, text: str):
+        expected = self.run_parser(AnyOf(UI).parse, text)
+        actual = self.run_parser(self.compiled, text)
+        self.assertEqual(actual, expected, text)
+
+    def test_corpus(self):
+        for text in self.corpus:
+            self.assert_same_parse(text)
+
+    def mutated_corpus(self, count: int):
+        rng = random.Random(0)
+        for _ in range(count):
+            text = rng.choice(self.corpus)
+            for _ in range(rng.randint(1, 4)):
+                start = rng.randint(0, len(text))
+                end = min(len(text), start + rng.randint(0, 6))
+                text = text[:start] + rng.choice(MUTATIONS) + text[end:]
+
+            try:
+                tokenize(text)
+            except CompileError:
+                continue
+
+            yield text
+
+    def test_mutated_corpus(self):
+        for text in self.mutated_corpus(300):
+            self.assert_same_parse(text)
+
+    def test_packrat(self):
+        # Replaying memoized groups must give the same tree and errors as
+        # parsing them again
+        for text in [*self.corpus, *self.mutated_corpus(300)]:
+            self.assertEqual(
+                self.run_parser(AnyOf(UI).parse, text, packrat=True),
+                self.run_parser(AnyOf(UI).parse, text),
+                text,
+            )
+
+    def test_packrat_parse(self):
+        try:
+            gir.get_namespace("Gtk", "4.0")
+        except CompileError:
+            self.skipTest("GTK 4 typelibs not available")
+
+        for text in self.corpus:
+            tokens = tokenize(text)
+            _ast, errors, warnings = parser.parse(tokens, packrat=True)
+            _ast, expected_errors, expected_warnings = parser.parse(tokens)
+            self.assertEqual(
+                serialize_errors(errors.errors if errors else []),
+                serialize_errors(expected_errors.errors if expected_errors else []),
+            )
+            self.assertEqual(
+                serialize_errors(warnings), serialize_errors(expected_warnings)
+            )
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as cache_home:
+            with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": cache_home}):
+                # Parsers this installation generated for old grammars are
+                # removed, but not those for other Python versions or those
+                # of other installations
+                cache_dir = parser_codegen.cache_dir()
+                cache_dir.mkdir(parents=True)
+                owner = utils.cache_owner()
+                tag = sys.implementation.cache_tag
+                stale = cache_dir / f"parser-{owner}-old.{tag}"
+                other_python = cache_dir / f"parser-{owner}-old.other-python"
+                other_install = cache_dir / f"parser-0123456789abcdef-old.{tag}"
+                for file in [stale, other_python, other_install]:
+                    file.write_bytes(b"")
+
+                self.assertIsNotNone(parser_codegen.load_parser(AnyOf(UI)))
+                [path] = cache_dir.glob(f"parser-{owner}-*.{tag}")
+                self.assertFalse(stale.exists())
+                self.assertTrue(other_python.exists())
+                self.assertTrue(other_install.exists())
+
+                # The cached code is used if it's there...
+                with mock.patch.object(parser_codegen, "_compile") as compile:
+                    self.assertIsNotNone(parser_codegen.load_parser(AnyOf(UI)))
+                    compile.assert_not_called()
+
+                # ...and regenerated if it's unreadable
+                path.write_bytes(b"garbage")
+                parse = parser_codegen.load_parser(AnyOf(UI))
+                self.assertIsNotNone(parse)
+                self.assertEqual(
+                    self.run_parser(parse, self.corpus[0]),
+                    self.run_parser(AnyOf(UI).parse, self.corpus[0]),
+                )
@@ -18,10 +18,18 @@
 # SPDX-License-Identifier: LGPL-3.0-or-later
 
 
+import random
 import unittest
+from pathlib import Path
 
-from blueprintcompiler.errors import PrintableError
-from blueprintcompiler.tokenizer import Token, TokenType, tokenize
+from blueprintcompiler.errors import CompileError, PrintableError
+from blueprintcompiler.tokenizer import (
+    Token,
+    TokenType,
+    retokenize,
+    tokenize,
+    unchanged_tokens,
+)
 
 
 class TestTokenizer(unittest.TestCase):
@@ -86,3 +94,109 @@ class TestTokenizer(unittest.TestCase):
                 (TokenType.EOF, ""),
             ],
         )
+
+    def test_numbers(self):
+        self.assert_tokenize(
+            "0x1F 1_000.5 .5 1.",
+            [
+                (TokenType.NUMBER, "0x1F"),
+                (TokenType.WHITESPACE, " "),
+                (TokenType.NUMBER, "1_000.5"),
+                (TokenType.WHITESPACE, " "),
+                (TokenType.NUMBER, ".5"),
+                (TokenType.WHITESPACE, " "),
+                (TokenType.NUMBER, "1"),
+                (TokenType.OP, "."),
+                (TokenType.EOF, ""),
+            ],
+        )
+
+    def test_unrecognized(self):
+        with self.assertRaises(CompileError) as cm:
+            tokenize("ident ? ident")
+        self.assertEqual(cm.exception.range.start, 6)
+        self.assertEqual(cm.exception.range.end, 6)
+
+    def test_token_stream(self):
+        tokens = tokenize("a: 1;")
+        self.assertEqual(len(tokens), 6)
+        self.assertEqual(tokens.type_at(2), TokenType.WHITESPACE)
+        self.assertEqual(tokens.text_at(3), "1")
+        self.assertEqual((tokens.start_at(4), tokens.end_at(4)), (4, 5))
+
+        token = tokens[3]
+        self.assertEqual(token.type, TokenType.NUMBER)
+        self.assertEqual((token.start, token.end), (3, 4))
+        self.assertEqual(token.get_number(), 1)
+
+        self.assertEqual([str(token) for token in tokens[:2]], ["a", ":"])
+        self.assertEqual(tokens[-1].type, TokenType.EOF)
+
+    def test_next_significant(self):
+        tokens = tokenize("a /* b */ c\n// d\n")
+        self.assertEqual(list(tokens.next_significant), [0, 4, 4, 4, 4, 8, 8, 8, 8, 9])
+
+        # The table is rebuilt if the stream changes
+        tokens = tokenize("a ")
+        self.assertEqual(list(tokens.next_significant), [0, 2, 2, 3])
+        tokens.append(TokenType.WHITESPACE.value, 2, 2)
+        self.assertEqual(list(tokens.next_significant), [0, 2, 2, 4, 4])
+
+    def test_unchanged_tokens(self):
+        old = tokenize("a { b: 1; } c { }")
+        self.assertEqual(
+            unchanged_tokens(old, tokenize("a { b: 12; } c { }")), (7, 8, 8)
+        )
+        self.assertEqual(unchanged_tokens(old, tokenize("a { } c { }")), (4, 10, 4))
+        self.assertEqual(unchanged_tokens(old, old), (18, 17, 17))
+
+        # The "a" is a different token once the "b" is appended to it
+        self.assertEqual(unchanged_tokens(tokenize("a"), tokenize("ab")), (0, 1, 1))
+
+        # An unclosed comment is tokenized as operators, so the tokens after
+        # it are not reused until the text after the comment
+        old = tokenize("a /* b */ c")
+        self.assertEqual(unchanged_tokens(old, tokenize("a /* b * c")), (2, 3, 8))
+
+    def assert_retokenize(self, text: str, start: int, end: int, replacement: str):
+        new_text = text[:start] + replacement + text[end:]
+        old_tokens = tokenize(text)
+
+        try:
+            expected = tokenize(new_text)
+        except CompileError as e:
+            with self.assertRaises(CompileError) as cm:
+                retokenize(old_tokens, new_text, start, end, start + len(replacement))
+            self.assertEqual(cm.exception.range.start, e.range.start)
+            return
+
+        actual = retokenize(old_tokens, new_text, start, end, start + len(replacement))
+        self.assertEqual(
+            [(t.type, t.start, t.end) for t in actual],
+            [(t.type, t.start, t.end) for t in expected],
+        )
+
+    def test_retokenize(self):
+        self.assert_retokenize("abc def", 3, 3, "x")
+        self.assert_retokenize("abc def", 3, 4, "")
+        self.assert_retokenize("1 .5", 1, 2, "")
+        self.assert_retokenize('a "b c" d', 2, 2, '"')
+        self.assert_retokenize("a /* b c d", 10, 10, " */")
+        self.assert_retokenize("a /* b */ c */ d", 7, 9, "")
+        self.assert_retokenize("a // b\nc d", 6, 7, "")
+        self.assert_retokenize("", 0, 0, "abc")
+        self.assert_retokenize("abc", 0, 3, "")
+
+    def test_retokenize_samples(self):
+        rng = random.Random(0)
+        samples = [
+            path.read_text()
+            for path in sorted((Path(__file__).parent / "samples").glob("*.blp"))
+        ]
+        replacements = ["", "a", " ", "\n", "1", ".", "/*", "*/", "//", '"', "{"]
+
+        for _ in range(500):
+            text = rng.choice(samples)
+            start = rng.randint(0, len(text))
+            end = min(len(text), start + rng.choice([0, 1, 5]))
+            self.assert_retokenize(text, start, end, rng.choice(replacements))
@@ -0,0 +1,41 @@
+# test_types.py
+#
+# Copyright 2026 agent <agent@local>
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This file is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+
+
+import unittest
+
+from blueprintcompiler.types import *
+
+
+class TestTypes(unittest.TestCase):
+    def test_interned(self):
+        for basic in [*BASIC_TYPES.values(), VoidType, DoubleType]:
+            self.assertIs(basic(), basic())
+
+        self.assertIsNot(IntType(), UIntType())
+        self.assertIs(ArrayType(StringType()), ArrayType(StringType()))
+        self.assertIsNot(ArrayType(StringType()), ArrayType(IntType()))
+        self.assertIsNot(ArrayType(StringType()), GListType(StringType()))
+        self.assertIs(
+            GListType(ArrayType(BoolType())), GListType(ArrayType(BoolType()))
+        )
+        self.assertEqual(ArrayType(StringType()).full_name, "string[]")
+
+        self.assertTrue(ArrayType(StringType()).assignable_to(ArrayType(StringType())))
+        self.assertFalse(ArrayType(StringType()).assignable_to(ArrayType(IntType())))
@@ -0,0 +1,58 @@
+# test_utils.py
+#
+# Copyright 2026 agent <agent@local>
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This file is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+
+
+import unittest
+
+from blueprintcompiler import utils
+
+
+class TestUtils(unittest.TestCase):
+    def test_line_index(self):
+        text = "ab\n\ncd\nef"
+        line_index = utils.get_line_index(text)
+
+        self.assertIs(utils.get_line_index(text), line_index)
+
+        positions = [(0, 0), (0, 1), (0, 2), (1, 0), (2, 0), (2, 1), (2, 2), (3, 0)]
+        for idx, pos in enumerate(positions):
+            self.assertEqual(utils.idx_to_pos(idx, text), pos)
+            self.assertEqual(utils.pos_to_idx(*pos, text), idx)
+
+        self.assertEqual(utils.idx_to_pos(9, text), (3, 2))
+        self.assertEqual(utils.pos_to_idx(4, 1, text), 10)
+
+        self.assertEqual(line_index.line_text(0), "ab\n")
+        self.assertEqual(line_index.line_text(1), "\n")
+        self.assertEqual(line_index.line_text(3), "ef")
+        self.assertEqual(line_index.line_text(4), "")
+
+    def test_line_index_trailing_newline(self):
+        text = "ab\n"
+        self.assertEqual(utils.idx_to_pos(3, text), (1, 0))
+        self.assertEqual(utils.get_line_index(text).line_text(1), "")
+        self.assertEqual(utils.idx_to_pos(0, ""), (0, 0))
+
+    def test_pos_to_idx_line_breaks(self):
+        # Positions count every line break that str.splitlines() does, such
+        # as a lone "\r" or a Unicode line separator
+        text = "ab\rcd\r\nef\u2028gh"
+        positions = [(0, 1), (1, 0), (2, 1), (3, 0), (4, 0)]
+        for pos, idx in zip(positions, [1, 3, 8, 10, 12]):
+            self.assertEqual(utils.pos_to_idx(*pos, text), idx)
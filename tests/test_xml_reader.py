@@ -0,0 +1,45 @@
+# test_xml_reader.py
+#
+# Copyright 2026 agent <agent@local>
+#
+# This file is free software; you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This file is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+
+
+import unittest
+
+from blueprintcompiler import xml_reader
+
+GIR = """<repository>
+  <namespace name="Gtk">
+    <class name="Button">
+      <doc>A <em>button</em>.</doc>
+      <method name="clicked"><doc>Emits clicked.</doc></method>
+      <property name="label"><doc-deprecated>Use a child.</doc-deprecated></property>
+    </class>
+  </namespace>
+</repository>"""
+
+
+class TestXmlReader(unittest.TestCase):
+    def test_all_tags(self):
+        root = xml_reader.parse_string(GIR)
+        [klass] = root.get_elements("namespace")[0].get_elements("class")
+        self.assertEqual(
+            [child.tag for child in klass.children], ["doc", "method", "property"]
+        )
+        self.assertEqual(klass["name"], "Button")
+        self.assertEqual(klass.get_elements("doc")[0].cdata, "A .")
+        self.assertFalse(hasattr(klass, "__dict__"))